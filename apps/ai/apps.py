@@ -1,6 +1,14 @@
 from django.apps import AppConfig
+from django.conf import settings
+from django.test.signals import setting_changed
 
 
 class AiConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.ai"
+
+    def ready(self):
+        from .services.embedding import reset_on_setting_change, start_model_warmup
+
+        setting_changed.connect(reset_on_setting_change, dispatch_uid="embedding-setting-changed")
+        start_model_warmup(settings.EMBEDDING_STARTUP_MODE)
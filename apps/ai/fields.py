@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import base64
+
+import numpy as np
+from django.core.exceptions import ValidationError
+from django.db import models
+
+VECTOR_DTYPES = ("float32", "float16", "int8")
+_INT8_SCALE = np.dtype("<f4")
+
+
+def encode_vector(value, dtype: str = "float32") -> bytes:
+    array = np.asarray(value, dtype=np.float32).reshape(-1)
+    if dtype == "float32":
+        return array.astype("<f4", copy=False).tobytes()
+    if dtype == "float16":
+        return array.astype("<f2").tobytes()
+    # int8 stores a little-endian float32 scale followed by the quantized components.
+    peak = float(np.max(np.abs(array))) if array.size else 0.0
+    scale = peak / 127 if peak else 1.0
+    quantized = np.clip(np.rint(array / scale), -127, 127).astype(np.int8)
+    return np.asarray([scale], dtype=_INT8_SCALE).tobytes() + quantized.tobytes()
+
+
+def decode_vector(data, dtype: str = "float32") -> np.ndarray:
+    if dtype == "float32":
+        return np.frombuffer(data, dtype="<f4")
+    if dtype == "float16":
+        return np.frombuffer(data, dtype="<f2")
+    scale = np.frombuffer(data, dtype=_INT8_SCALE, count=1)[0]
+    quantized = np.frombuffer(data, dtype=np.int8, offset=_INT8_SCALE.itemsize)
+    return quantized.astype(np.float32) * scale
+
+
+class VectorField(models.BinaryField):
+    description = "Dense vector stored as raw bytes"
+
+    def __init__(self, *args, dtype: str = "float32", **kwargs):
+        if dtype not in VECTOR_DTYPES:
+            raise ValueError(f"Unsupported vector dtype {dtype!r}.")
+        self.dtype = dtype
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        if self.dtype != "float32":
+            kwargs["dtype"] = self.dtype
+        return name, path, args, kwargs
+
+    def from_db_value(self, value, expression, connection):
+        if value is None:
+            return None
+        return decode_vector(value, self.dtype)
+
+    def to_python(self, value):
+        if value is None or isinstance(value, np.ndarray):
+            return value
+        if isinstance(value, str):
+            value = base64.b64decode(value.encode("ascii"))
+        if isinstance(value, (bytes, bytearray, memoryview)):
+            return decode_vector(value, self.dtype)
+        try:
+            return np.asarray(value, dtype=np.float32)
+        except (TypeError, ValueError) as exc:
+            raise ValidationError("Enter a sequence of numbers.", code="invalid") from exc
+
+    def get_prep_value(self, value):
+        if value is None or isinstance(value, (bytes, bytearray, memoryview)):
+            return value
+        return encode_vector(value, self.dtype)
+
+    def value_to_string(self, obj):
+        value = self.value_from_object(obj)
+        if value is None:
+            return None
+        return base64.b64encode(self.get_prep_value(value)).decode("ascii")
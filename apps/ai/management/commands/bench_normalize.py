@@ -0,0 +1,34 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.ai.services.text import _normalize_cached, normalize_text, normalize_texts
+
+WORDS = ["pwoli", "machaa", "Sheri!", "beach", "trip", "chai,", "rain", "ഞാന്‍", "ഉറങ്ങി", "lol", "movies"]
+
+
+class Command(BaseCommand):
+    help = "Measure the per-answer cost of text normalization."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--answers", type=int, default=20000)
+        parser.add_argument("--unique", type=int, default=2000)
+        parser.add_argument("--seed", type=int, default=7)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        pool = [" ".join(rng.choices(WORDS, k=rng.randint(1, 6))) for _ in range(options["unique"])]
+        answers = [rng.choice(pool) for _ in range(options["answers"])]
+
+        def per_answer_us(label, texts, run):
+            _normalize_cached.cache_clear()
+            started = time.perf_counter()
+            run(texts)
+            elapsed = time.perf_counter() - started
+            self.stdout.write(f"{label}: {elapsed / len(texts) * 1e6:.2f} us/answer")
+
+        per_answer_us("normalize_text", answers, lambda texts: [normalize_text(text) for text in texts])
+        per_answer_us("normalize_text (all unique)", pool, lambda texts: [normalize_text(text) for text in texts])
+        per_answer_us("normalize_texts", answers, normalize_texts)
+        per_answer_us("normalize_texts (all unique)", pool, normalize_texts)
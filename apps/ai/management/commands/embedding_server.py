@@ -0,0 +1,44 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+
+from apps.ai.services.embedding import local_batch_encode_text, local_model_identity, warm_up_model
+from apps.ai.services.remote import EmbeddingServer, EmbeddingServerError
+
+
+class Command(BaseCommand):
+    help = "Serve embeddings from one shared model instance to every worker on this host."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--address",
+            default=settings.EMBEDDING_SERVER_ADDRESS or "tcp://127.0.0.1:8765",
+            help="unix:/path/to.sock or tcp://host:port",
+        )
+        parser.add_argument("--window-ms", type=int, default=settings.EMBEDDING_BATCH_WINDOW_MS)
+        parser.add_argument("--batch-size", type=int, default=settings.EMBEDDING_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        # The server owns the model, so its own encodes must not try to reach itself.
+        with override_settings(EMBEDDING_SERVER_ADDRESS=""):
+            self.serve(options)
+
+    def serve(self, options):
+        warm_up_model()
+        try:
+            server = EmbeddingServer(
+                options["address"],
+                encoder=local_batch_encode_text,
+                identity=local_model_identity,
+                window_seconds=options["window_ms"] / 1000,
+                max_batch_size=options["batch_size"],
+            )
+        except (EmbeddingServerError, OSError) as exc:
+            raise CommandError(str(exc)) from exc
+        self.stdout.write(f"Embedding server listening on {server.address}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.shutdown()
@@ -0,0 +1,60 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.ai.services import embedding
+
+
+class Command(BaseCommand):
+    help = "Export the embedding model to ONNX and int8 ONNX, then check parity with the PyTorch vectors."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--output",
+            default=embedding.EMBEDDING_MODEL_PATH or f"models/{Path(embedding.MODEL_NAME).name}",
+            help="Directory to write the exported model to; point EMBEDDING_MODEL_PATH at it.",
+        )
+        parser.add_argument(
+            "--quantization",
+            default=embedding.EMBEDDING_ONNX_QUANTIZATION,
+            choices=["arm64", "avx2", "avx512", "avx512_vnni"],
+        )
+        parser.add_argument("--skip-parity", action="store_true")
+
+    def handle(self, *args, **options):
+        try:
+            from sentence_transformers import SentenceTransformer, export_dynamic_quantized_onnx_model
+        except ImportError as exc:
+            raise CommandError("sentence-transformers with the onnx extra is required to export.") from exc
+
+        output = options["output"]
+        onnx_model = SentenceTransformer(embedding.MODEL_NAME, backend="onnx")
+        onnx_model.save_pretrained(output)
+        export_dynamic_quantized_onnx_model(onnx_model, options["quantization"], output)
+        self.stdout.write(f"Exported {embedding.MODEL_NAME} to {output}")
+        if options["skip_parity"]:
+            return
+
+        reference = SentenceTransformer(embedding.MODEL_NAME).encode(
+            embedding.PARITY_TEXTS, normalize_embeddings=True
+        )
+        candidates = {
+            "onnx": SentenceTransformer(output, backend="onnx"),
+            "onnx-int8": SentenceTransformer(
+                output,
+                backend="onnx",
+                model_kwargs={"file_name": embedding.quantized_model_file(options["quantization"])},
+            ),
+        }
+        failed = []
+        for backend, model in candidates.items():
+            vectors = model.encode(embedding.PARITY_TEXTS, normalize_embeddings=True)
+            agreement = embedding.backend_agreement(reference, vectors)
+            threshold = embedding.BACKEND_MIN_AGREEMENT[backend]
+            self.stdout.write(
+                f"{backend}: min cosine {agreement.min():.4f}, mean {agreement.mean():.4f} (threshold {threshold})"
+            )
+            if agreement.min() < threshold:
+                failed.append(backend)
+        if failed:
+            raise CommandError(f"Parity check failed for: {', '.join(failed)}")
@@ -0,0 +1,23 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.ai.services.cache import prune_store
+
+
+class Command(BaseCommand):
+    help = "Delete shared embedding cache entries older than the retention period."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--older-than-days", type=int, default=settings.EMBEDDING_CACHE_RETENTION_DAYS)
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        if options["older_than_days"] <= 0:
+            self.stdout.write("Embedding cache retention is disabled; nothing pruned.")
+            return
+        cutoff = timezone.now() - timedelta(days=options["older_than_days"])
+        deleted = prune_store(cutoff, batch_size=options["batch_size"])
+        self.stdout.write(f"Pruned {deleted} embedding cache entries created before {cutoff:%Y-%m-%d %H:%M}")
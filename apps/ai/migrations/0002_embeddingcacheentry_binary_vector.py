@@ -0,0 +1,28 @@
+import apps.ai.fields
+from django.db import migrations
+
+
+def clear_cache(apps, schema_editor):
+    # Cached vectors are recomputable, so they are dropped instead of converted.
+    apps.get_model('ai', 'EmbeddingCacheEntry').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(clear_cache, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='embeddingcacheentry',
+            name='vector',
+        ),
+        migrations.AddField(
+            model_name='embeddingcacheentry',
+            name='vector',
+            field=apps.ai.fields.VectorField(default=b''),
+            preserve_default=False,
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 07:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai', '0002_embeddingcacheentry_binary_vector'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='embeddingcacheentry',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, db_index=True),
+        ),
+    ]
@@ -0,0 +1,16 @@
+from __future__ import annotations
+
+from django.db import models
+
+from .fields import VectorField
+
+
+class EmbeddingCacheEntry(models.Model):
+    key = models.CharField(max_length=64, primary_key=True)
+    model_name = models.CharField(max_length=128)
+    vector = VectorField()
+    # Pruned by age (prune_embedding_cache).
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self) -> str:
+        return f"{self.model_name}:{self.key[:12]}"
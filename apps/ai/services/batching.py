@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+import time
+from typing import Callable, Hashable, Sequence
+
+from .embedding import batch_encode_text
+
+logger = logging.getLogger(__name__)
+
+BatchHandler = Callable[[list[tuple[Hashable, str, list[float]]]], None]
+ErrorHandler = Callable[[list[Hashable], Exception], None]
+
+
+class EmbeddingBatcher:
+    def __init__(
+        self,
+        handler: BatchHandler,
+        window_seconds: float = 0.025,
+        max_batch_size: int = 32,
+        encoder: Callable[[Sequence[str]], list[list[float]]] = batch_encode_text,
+        error_handler: ErrorHandler | None = None,
+    ) -> None:
+        self.handler = handler
+        self.window_seconds = window_seconds
+        self.max_batch_size = max(1, max_batch_size)
+        self.encoder = encoder
+        self.error_handler = error_handler
+        self._queue: queue.Queue[tuple[Hashable, str]] = queue.Queue()
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    def submit(self, key: Hashable, text: str) -> None:
+        self._ensure_started()
+        self._queue.put((key, text))
+
+    def wait_idle(self) -> None:
+        self._queue.join()
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run,
+                    name="embedding-batcher",
+                    daemon=True,
+                )
+                self._thread.start()
+
+    def _collect(self) -> list[tuple[Hashable, str]]:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.window_seconds
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._collect()
+            try:
+                self._process(batch)
+            except Exception as exc:
+                logger.exception("Embedding batch of %d items failed", len(batch))
+                if self.error_handler is not None:
+                    self.error_handler([key for key, _ in batch], exc)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _process(self, batch: list[tuple[Hashable, str]]) -> None:
+        # Identical texts in one window share a single slot in the model batch.
+        unique_texts = list(dict.fromkeys(text for _, text in batch))
+        vectors = dict(zip(unique_texts, self.encoder(unique_texts)))
+        self.handler([(key, text, vectors[text]) for key, text in batch])
@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Sequence
+
+import numpy as np
+from django.conf import settings
+from django.db import DatabaseError, transaction
+
+from apps.ai.models import EmbeddingCacheEntry
+
+from .embedding import current_model_identity, identified_batch_encode_text
+
+_memory: OrderedDict[str, np.ndarray] = OrderedDict()
+_lock = threading.Lock()
+_stats = {"memory_hits": 0, "store_hits": 0, "misses": 0, "store_errors": 0}
+
+
+def cache_key(text: str, model_name: str | None = None) -> str:
+    model_name = model_name or current_model_identity()
+    return hashlib.sha256(f"{model_name}\x00{text}".encode("utf-8")).hexdigest()
+
+
+def cache_stats() -> dict:
+    with _lock:
+        stats = dict(_stats)
+        stats["memory_entries"] = len(_memory)
+    lookups = stats["memory_hits"] + stats["store_hits"] + stats["misses"]
+    stats["hit_ratio"] = round((lookups - stats["misses"]) / lookups, 4) if lookups else 0.0
+    return stats
+
+
+def clear_memory_cache() -> None:
+    with _lock:
+        _memory.clear()
+        for name in _stats:
+            _stats[name] = 0
+
+
+def _memory_get(key: str) -> np.ndarray | None:
+    with _lock:
+        vector = _memory.get(key)
+        if vector is not None:
+            _memory.move_to_end(key)
+        return vector
+
+
+def _memory_put(key: str, vector: np.ndarray) -> None:
+    limit = settings.EMBEDDING_CACHE_MAX_ENTRIES
+    if limit <= 0:
+        return
+    with _lock:
+        _memory[key] = vector
+        _memory.move_to_end(key)
+        while len(_memory) > limit:
+            _memory.popitem(last=False)
+
+
+def _count(name: str, amount: int = 1) -> None:
+    if amount:
+        with _lock:
+            _stats[name] += amount
+
+
+def _store_get_many(keys: list[str]) -> dict[str, list[float]]:
+    if not keys or not settings.EMBEDDING_CACHE_STORE_ENABLED:
+        return {}
+    try:
+        with transaction.atomic():
+            return dict(EmbeddingCacheEntry.objects.filter(key__in=keys).values_list("key", "vector"))
+    except DatabaseError:
+        _count("store_errors")
+        return {}
+
+
+def _store_put_many(entries: dict[str, list[float]], model_name: str) -> None:
+    if not entries or not settings.EMBEDDING_CACHE_STORE_ENABLED:
+        return
+    try:
+        with transaction.atomic():
+            EmbeddingCacheEntry.objects.bulk_create(
+                [
+                    EmbeddingCacheEntry(key=key, model_name=model_name, vector=vector)
+                    for key, vector in entries.items()
+                ],
+                ignore_conflicts=True,
+            )
+    except DatabaseError:
+        _count("store_errors")
+
+
+def prune_store(created_before: datetime, batch_size: int = 1000) -> int:
+    # Deleted in batches so a large backlog never holds one long delete against live lookups.
+    deleted = 0
+    while True:
+        keys = list(
+            EmbeddingCacheEntry.objects.filter(created_at__lt=created_before)
+            .order_by("created_at")
+            .values_list("key", flat=True)[:batch_size]
+        )
+        if not keys:
+            return deleted
+        deleted += EmbeddingCacheEntry.objects.filter(key__in=keys).delete()[0]
+
+
+def cached_batch_encode_text(texts: Sequence[str]) -> list[list[float]]:
+    identity = current_model_identity()
+    keys = [cache_key(text, identity) for text in texts]
+    found: dict[str, np.ndarray] = {}
+    for key in dict.fromkeys(keys):
+        vector = _memory_get(key)
+        if vector is not None:
+            found[key] = vector
+    _count("memory_hits", sum(1 for key in keys if key in found))
+
+    missing = [key for key in dict.fromkeys(keys) if key not in found]
+    stored = _store_get_many(missing)
+    for key, vector in stored.items():
+        found[key] = np.asarray(vector, dtype=np.float32)
+        _memory_put(key, found[key])
+    _count("store_hits", sum(1 for key in keys if key in stored))
+
+    text_by_key = dict(zip(keys, texts))
+    to_encode = [key for key in missing if key not in stored]
+    if to_encode:
+        pending = set(to_encode)
+        _count("misses", sum(1 for key in keys if key in pending))
+        encoded_by, encoded = identified_batch_encode_text([text_by_key[key] for key in to_encode])
+        # The encoder that actually ran (fallback, server) may not be the one guessed for the lookup.
+        store_keys = to_encode
+        if encoded_by != identity:
+            store_keys = [cache_key(text_by_key[key], encoded_by) for key in to_encode]
+        for key, store_key, vector in zip(to_encode, store_keys, encoded):
+            found[key] = np.asarray(vector, dtype=np.float32)
+            _memory_put(store_key, found[key])
+        _store_put_many(dict(zip(store_keys, encoded)), encoded_by)
+
+    return [found[key].tolist() for key in keys]
+
+
+def cached_encode_text(text: str) -> list[float]:
+    return cached_batch_encode_text([text])[0]
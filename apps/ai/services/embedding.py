@@ -1,29 +1,209 @@
 from __future__ import annotations
 
 import hashlib
+import logging
 import os
+import threading
+import time
 from functools import lru_cache
 from typing import Sequence
 
 import numpy as np
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
 
-try:
-    from sentence_transformers import SentenceTransformer
-except Exception:  # pragma: no cover - fallback only used if dependency missing
-    SentenceTransformer = None  # type: ignore
-
+logger = logging.getLogger(__name__)
 
 MODEL_NAME = os.getenv("ST_MODEL_NAME", "paraphrase-multilingual-MiniLM-L12-v2")
+EMBEDDING_MODEL_PATH = os.getenv("EMBEDDING_MODEL_PATH", "")
+EMBEDDING_ONNX_QUANTIZATION = os.getenv("EMBEDDING_ONNX_QUANTIZATION", "avx2")
+EMBEDDING_BACKENDS = ("sentence-transformers", "onnx", "onnx-int8", "hash")
+BACKEND_MIN_AGREEMENT = {"onnx": 0.99, "onnx-int8": 0.95}
+PARITY_TEXTS = [
+    "pizza",
+    "sleep all day",
+    "beach trip with the gang",
+    "chai and rain",
+    "biriyani at midnight",
+    "pwoli",
+    "ഉറക്കം",
+    "weekend binge of old movies",
+]
 FALLBACK_DIM = 384
+FALLBACK_IDENTITY = "hash-fallback"
+WARMUP_TEXT = "warm up"
+
+_ready = threading.Event()
+_warmup_lock = threading.Lock()
+_warmup_thread: threading.Thread | None = None
+_local_identity: str | None = None
+_startup_metrics: dict[str, float | str | None] = {
+    "mode": None,
+    "backend": None,
+    "import_seconds": None,
+    "load_seconds": None,
+    "warmup_seconds": None,
+    "error": None,
+}
+
+
+def embedding_backend() -> str:
+    backend = settings.EMBEDDING_BACKEND
+    if backend not in EMBEDDING_BACKENDS:
+        raise ImproperlyConfigured(f"Unknown embedding backend {backend!r}.")
+    return backend
+
+
+def reset_embedding_model() -> None:
+    global _local_identity
+    _local_identity = None
+    _get_model.cache_clear()
+    _ready.clear()
+
+
+def reset_on_setting_change(setting: str, **kwargs) -> None:
+    # override_settings (tests, benchmarks, the embedding server) switches backends or servers; the loaded model
+    # and the client belong to the old ones.
+    if setting == "EMBEDDING_BACKEND":
+        reset_embedding_model()
+    elif setting in {"EMBEDDING_SERVER_ADDRESS", "EMBEDDING_SERVER_TIMEOUT"}:
+        _get_client.cache_clear()
 
 
 @lru_cache(maxsize=1)
-def _get_model():
-    if SentenceTransformer is None:
+def _get_client():
+    if not settings.EMBEDDING_SERVER_ADDRESS:
+        return None
+    from .remote import EmbeddingClient
+
+    return EmbeddingClient(settings.EMBEDDING_SERVER_ADDRESS, timeout=settings.EMBEDDING_SERVER_TIMEOUT)
+
+
+def _remote_batch_encode(texts: Sequence[str]) -> tuple[str, list[list[float]]] | None:
+    client = _get_client()
+    if client is None or not client.available():
         return None
+    try:
+        identity, vectors = client.identified_batch_encode(texts)
+    except Exception:
+        logger.warning("Embedding server %s unavailable; encoding in-process", client.address, exc_info=True)
+        return None
+    _ready.set()
+    return identity, vectors
+
+
+def _import_sentence_transformer():
+    # Importing sentence_transformers pulls in torch, so it is deferred until a model is actually needed.
+    started = time.perf_counter()
+    try:
+        from sentence_transformers import SentenceTransformer
+    except Exception:  # pragma: no cover - fallback only used if dependency missing
+        SentenceTransformer = None  # type: ignore
+    _startup_metrics["import_seconds"] = round(time.perf_counter() - started, 4)
+    return SentenceTransformer
+
+
+def model_identity(backend: str | None = None) -> str:
+    # Quantized and ONNX vectors drift slightly from the PyTorch ones, so they are cached separately.
+    backend = backend or embedding_backend()
+    if backend == "hash":
+        return FALLBACK_IDENTITY
+    if backend == "sentence-transformers":
+        return MODEL_NAME
+    return f"{MODEL_NAME}@{backend}"
+
+
+def local_model_identity() -> str:
+    # A configured model that failed to import or load encodes with the hash fallback, and is cached as such.
+    _get_model()
+    return _local_identity
+
+
+def current_model_identity() -> str:
+    # Best guess before encoding, used for lookups; vectors are stored under the identity that produced them.
+    client = _get_client()
+    if client is not None and client.available() and client.model_identity:
+        return client.model_identity
+    return _local_identity or model_identity()
+
+
+def quantized_model_file(quantization: str = EMBEDDING_ONNX_QUANTIZATION) -> str:
+    return f"onnx/model_qint8_{quantization}.onnx"
+
+
+def load_model(backend: str):
+    SentenceTransformer = _import_sentence_transformer()
+    if SentenceTransformer is None or backend == "hash":
+        return None
+    # The exported directory only holds ONNX graphs; the PyTorch path keeps loading the hub model.
+    source = EMBEDDING_MODEL_PATH or MODEL_NAME
+    if backend == "onnx":
+        return SentenceTransformer(source, backend="onnx")
+    if backend == "onnx-int8":
+        return SentenceTransformer(
+            source,
+            backend="onnx",
+            model_kwargs={"file_name": quantized_model_file()},
+        )
     return SentenceTransformer(MODEL_NAME)
 
 
+@lru_cache(maxsize=1)
+def _get_model():
+    global _local_identity
+    backend = embedding_backend()
+    _startup_metrics["backend"] = backend
+    model = None
+    if backend != "hash":
+        started = time.perf_counter()
+        try:
+            model = load_model(backend)
+        except Exception as exc:
+            # Cached like a successful load, so requests do not each retry a multi-second load that fails.
+            _startup_metrics["error"] = repr(exc)
+            logger.exception("Embedding model %s failed to load; using the hash fallback", backend)
+        if model is not None:
+            _startup_metrics["load_seconds"] = round(time.perf_counter() - started, 4)
+    _local_identity = model_identity() if model is not None else FALLBACK_IDENTITY
+    _ready.set()
+    return model
+
+
+def warm_up_model() -> None:
+    started = time.perf_counter()
+    try:
+        encode_text(WARMUP_TEXT)
+    except Exception as exc:
+        _startup_metrics["error"] = repr(exc)
+        logger.exception("Embedding model warm-up failed")
+        return
+    _startup_metrics["warmup_seconds"] = round(time.perf_counter() - started, 4)
+    logger.info("Embedding model ready: %s", startup_metrics())
+
+
+def start_model_warmup(mode: str) -> threading.Thread | None:
+    global _warmup_thread
+    _startup_metrics["mode"] = mode
+    if mode == "lazy":
+        return None
+    if mode == "blocking":
+        warm_up_model()
+        return None
+    with _warmup_lock:
+        if _warmup_thread is None or not _warmup_thread.is_alive():
+            _warmup_thread = threading.Thread(target=warm_up_model, name="embedding-warmup", daemon=True)
+            _warmup_thread.start()
+        return _warmup_thread
+
+
+def is_model_ready() -> bool:
+    return _ready.is_set()
+
+
+def startup_metrics() -> dict:
+    return {**_startup_metrics, "ready": is_model_ready()}
+
+
 def _fallback_embedding(text: str, dim: int = FALLBACK_DIM) -> list[float]:
     # Deterministic hash-based embedding so local dev still works without model download.
     digest = hashlib.sha256(text.encode("utf-8")).digest()
@@ -36,6 +216,9 @@ def _fallback_embedding(text: str, dim: int = FALLBACK_DIM) -> list[float]:
 
 
 def encode_text(text: str) -> list[float]:
+    remote = _remote_batch_encode([text])
+    if remote is not None:
+        return remote[1][0]
     model = _get_model()
     if model is None:
         return _fallback_embedding(text)
@@ -44,11 +227,33 @@ def encode_text(text: str) -> list[float]:
 
 
 def batch_encode_text(texts: Sequence[str]) -> list[list[float]]:
+    return identified_batch_encode_text(texts)[1]
+
+
+def identified_batch_encode_text(texts: Sequence[str]) -> tuple[str, list[list[float]]]:
+    remote = _remote_batch_encode(texts)
+    if remote is not None:
+        return remote
+    return local_identified_batch_encode_text(texts)
+
+
+def local_batch_encode_text(texts: Sequence[str]) -> list[list[float]]:
+    return local_identified_batch_encode_text(texts)[1]
+
+
+def local_identified_batch_encode_text(texts: Sequence[str]) -> tuple[str, list[list[float]]]:
     model = _get_model()
     if model is None:
-        return [_fallback_embedding(text) for text in texts]
+        return FALLBACK_IDENTITY, [_fallback_embedding(text) for text in texts]
     vectors = model.encode(list(texts), normalize_embeddings=True)
-    return [np.asarray(vector, dtype=np.float32).tolist() for vector in vectors]
+    return _local_identity, [np.asarray(vector, dtype=np.float32).tolist() for vector in vectors]
+
+
+def backend_agreement(reference, candidate) -> np.ndarray:
+    a = np.asarray(reference, dtype=np.float32)
+    b = np.asarray(candidate, dtype=np.float32)
+    norms = np.linalg.norm(a, axis=1) * np.linalg.norm(b, axis=1)
+    return np.divide((a * b).sum(axis=1), norms, out=np.zeros(len(a), dtype=np.float32), where=norms > 0)
 
 
 def cosine_similarity(vector1: Sequence[float], vector2: Sequence[float]) -> float:
@@ -0,0 +1,221 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import socket
+import socketserver
+import struct
+import threading
+import time
+from typing import Callable, Sequence
+
+import numpy as np
+
+from .batching import EmbeddingBatcher
+
+logger = logging.getLogger(__name__)
+
+_FRAME_HEADER = struct.Struct("!I")
+MAX_FRAME_BYTES = 64 * 1024 * 1024
+
+
+class EmbeddingServerError(Exception):
+    pass
+
+
+def parse_address(address: str):
+    if address.startswith("unix:"):
+        return socket.AF_UNIX, address[len("unix:") :]
+    host, _, port = address.removeprefix("tcp://").rpartition(":")
+    if not port.isdigit():
+        raise EmbeddingServerError(f"Invalid embedding server address {address!r}.")
+    return socket.AF_INET, (host or "127.0.0.1", int(port))
+
+
+def send_frame(sock: socket.socket, data: bytes) -> None:
+    sock.sendall(_FRAME_HEADER.pack(len(data)) + data)
+
+
+def _recv_exact(sock: socket.socket, size: int) -> bytes:
+    buffer = bytearray()
+    while len(buffer) < size:
+        chunk = sock.recv(size - len(buffer))
+        if not chunk:
+            raise ConnectionError("Embedding server connection closed.")
+        buffer.extend(chunk)
+    return bytes(buffer)
+
+
+def recv_frame(sock: socket.socket) -> bytes:
+    (size,) = _FRAME_HEADER.unpack(_recv_exact(sock, _FRAME_HEADER.size))
+    if size > MAX_FRAME_BYTES:
+        raise EmbeddingServerError(f"Frame of {size} bytes exceeds the limit.")
+    return _recv_exact(sock, size)
+
+
+class EmbeddingClient:
+    def __init__(self, address: str, timeout: float = 5.0, retry_seconds: float = 5.0) -> None:
+        self.address = address
+        self.family, self.target = parse_address(address)
+        self.timeout = timeout
+        self.retry_seconds = retry_seconds
+        self._local = threading.local()
+        self._unavailable_until = 0.0
+        self.model_identity: str | None = None
+
+    def available(self) -> bool:
+        return time.monotonic() >= self._unavailable_until
+
+    def _connection(self) -> socket.socket:
+        sock = getattr(self._local, "sock", None)
+        if sock is None:
+            sock = socket.socket(self.family, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            try:
+                sock.connect(self.target)
+            except OSError:
+                sock.close()
+                raise
+            self._local.sock = sock
+        return sock
+
+    def close(self) -> None:
+        sock = getattr(self._local, "sock", None)
+        if sock is not None:
+            self._local.sock = None
+            sock.close()
+
+    def batch_encode(self, texts: Sequence[str]) -> list[list[float]]:
+        return self.identified_batch_encode(texts)[1]
+
+    def identified_batch_encode(self, texts: Sequence[str]) -> tuple[str | None, list[list[float]]]:
+        # The server reports which model produced the vectors; that, not the local config, is their cache identity.
+        if not texts:
+            return self.model_identity, []
+        try:
+            sock = self._connection()
+            send_frame(sock, json.dumps({"texts": list(texts)}).encode("utf-8"))
+            header = json.loads(recv_frame(sock))
+            if "error" in header:
+                raise EmbeddingServerError(header["error"])
+            if not header.get("model"):
+                raise EmbeddingServerError("Embedding server did not report its model.")
+            data = recv_frame(sock)
+        except (OSError, ValueError, EmbeddingServerError):
+            self.close()
+            self._unavailable_until = time.monotonic() + self.retry_seconds
+            raise
+        self.model_identity = header["model"]
+        return header["model"], np.frombuffer(data, dtype="<f4").reshape(header["count"], header["dim"]).tolist()
+
+
+class _PendingRequest:
+    def __init__(self, size: int) -> None:
+        self.vectors: list[list[float] | None] = [None] * size
+        self.remaining = size
+        self.error: Exception | None = None
+        self.done = threading.Event()
+        self._lock = threading.Lock()
+
+    def resolve(self, index: int, vector: list[float]) -> None:
+        with self._lock:
+            self.vectors[index] = vector
+            self.remaining -= 1
+            if self.remaining <= 0:
+                self.done.set()
+
+    def fail(self, error: Exception) -> None:
+        self.error = error
+        self.done.set()
+
+
+class _EmbeddingRequestHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        while True:
+            try:
+                request = json.loads(recv_frame(self.request))
+            except (ConnectionError, EmbeddingServerError, ValueError):
+                return
+            try:
+                vectors = self.server.embedding_server.encode(request.get("texts", []))
+            except Exception as exc:
+                send_frame(self.request, json.dumps({"error": str(exc)}).encode("utf-8"))
+                continue
+            dim = vectors.shape[1] if vectors.ndim == 2 else 0
+            header = {"count": len(vectors), "dim": dim, "model": self.server.embedding_server.identity()}
+            send_frame(self.request, json.dumps(header).encode("utf-8"))
+            send_frame(self.request, vectors.astype("<f4", copy=False).tobytes())
+
+
+class _ThreadingTCPServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class _ThreadingUnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class EmbeddingServer:
+    def __init__(
+        self,
+        address: str,
+        encoder: Callable[[Sequence[str]], list[list[float]]],
+        identity: Callable[[], str],
+        window_seconds: float = 0.025,
+        max_batch_size: int = 32,
+        request_timeout: float = 30.0,
+    ) -> None:
+        self.identity = identity
+        self.request_timeout = request_timeout
+        self.batcher = EmbeddingBatcher(
+            self._deliver,
+            window_seconds=window_seconds,
+            max_batch_size=max_batch_size,
+            encoder=encoder,
+            error_handler=self._fail,
+        )
+        family, target = parse_address(address)
+        if family == socket.AF_UNIX:
+            if os.path.exists(target):
+                os.unlink(target)
+            self.server = _ThreadingUnixServer(target, _EmbeddingRequestHandler)
+            self.address = f"unix:{target}"
+        else:
+            self.server = _ThreadingTCPServer(target, _EmbeddingRequestHandler)
+            host, port = self.server.server_address[:2]
+            self.address = f"tcp://{host}:{port}"
+        self.server.embedding_server = self
+
+    def _deliver(self, items) -> None:
+        for (request, index), _, vector in items:
+            request.resolve(index, vector)
+
+    def _fail(self, keys, error: Exception) -> None:
+        for request, _ in keys:
+            request.fail(error)
+
+    def encode(self, texts: Sequence[str]) -> np.ndarray:
+        # Requests from every connected worker share the batcher, so concurrent answers land in one model call.
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+        request = _PendingRequest(len(texts))
+        for index, text in enumerate(texts):
+            self.batcher.submit((request, index), text)
+        if not request.done.wait(self.request_timeout):
+            raise EmbeddingServerError("Timed out waiting for the embedding batch.")
+        if request.error is not None:
+            raise request.error
+        return np.asarray(request.vectors, dtype=np.float32)
+
+    def serve_forever(self) -> None:
+        logger.info("Embedding server listening on %s", self.address)
+        self.server.serve_forever()
+
+    def shutdown(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+        family, target = parse_address(self.address)
+        if family == socket.AF_UNIX and os.path.exists(target):
+            os.unlink(target)
@@ -1,26 +1,134 @@
 from __future__ import annotations
 
+import json
+import logging
+import os
 import re
 import string
+import time
+import unicodedata
+from functools import lru_cache
+from pathlib import Path
+from typing import Sequence
 
+logger = logging.getLogger(__name__)
 
-SLANG_MAP = {
-    "machaa": "macha",
-    "macha": "friend",
-    "pwoli": "awesome",
-    "sheri": "ok",
-    "alle": "right",
-    "ishtam": "love",
-    "njan": "i",
-    "nee": "you",
-    "entha": "what",
+DEFAULT_LEXICON_PATH = Path(__file__).resolve().parent.parent / "data" / "slang.json"
+SLANG_LEXICON_PATHS = [
+    Path(path) for path in os.getenv("SLANG_LEXICON_PATHS", str(DEFAULT_LEXICON_PATH)).split(os.pathsep) if path
+]
+SLANG_RELOAD_SECONDS = float(os.getenv("SLANG_RELOAD_SECONDS", "5"))
+
+_ZERO_WIDTH = "\u200b\u200c\u200d\u2060\ufeff"
+# Older Malayalam input methods spell chillu letters as consonant + virama + ZWJ; fold them to the atomic letters.
+_CHILLU = {
+    "\u0d23\u0d4d\u200d": "\u0d7a",
+    "\u0d28\u0d4d\u200d": "\u0d7b",
+    "\u0d30\u0d4d\u200d": "\u0d7c",
+    "\u0d32\u0d4d\u200d": "\u0d7d",
+    "\u0d33\u0d4d\u200d": "\u0d7e",
+    "\u0d15\u0d4d\u200d": "\u0d7f",
 }
+_CHILLU_PATTERN = re.compile("|".join(_CHILLU))
+_BATCH_SEPARATOR = "\x00"
+
+
+def _build_strip_table() -> dict[int, None]:
+    # Unicode punctuation below the CJK blocks covers what players type; combining marks are kept for Malayalam.
+    table = {ord(char): None for char in string.punctuation}
+    for codepoint in range(0x80, 0x3040):
+        if unicodedata.category(chr(codepoint)).startswith("P"):
+            table[codepoint] = None
+    for char in _ZERO_WIDTH:
+        table[ord(char)] = None
+    return table
+
+
+_STRIP_TABLE = _build_strip_table()
+
+
+class SlangLexicon:
+    def __init__(self, paths: Sequence[Path], reload_seconds: float = 5.0) -> None:
+        self.paths = list(paths)
+        self.reload_seconds = reload_seconds
+        self.mapping: dict[str, str] = {}
+        self.version = 0
+        self._mtimes: tuple[float | None, ...] = ()
+        self._checked_at = 0.0
+        self.reload()
+
+    def _stat(self) -> tuple[float | None, ...]:
+        mtimes = []
+        for path in self.paths:
+            try:
+                mtimes.append(path.stat().st_mtime)
+            except OSError:
+                mtimes.append(None)
+        return tuple(mtimes)
+
+    def reload(self) -> None:
+        mapping: dict[str, str] = {}
+        for path in self.paths:
+            try:
+                entries = json.loads(path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                logger.exception("Could not load slang lexicon %s", path)
+                continue
+            # Later files override earlier ones, so deployments can layer regional lexicons on the bundled one.
+            for slang, replacement in entries.items():
+                mapping[_fold(slang)] = _fold(replacement)
+        self.mapping = mapping
+        self._mtimes = self._stat()
+        self._checked_at = time.monotonic()
+        self.version += 1
+        _normalize_cached.cache_clear()
+
+    def refresh(self) -> None:
+        now = time.monotonic()
+        if now - self._checked_at < self.reload_seconds:
+            return
+        self._checked_at = now
+        if self._stat() != self._mtimes:
+            self.reload()
+
+
+def _fold(text: str) -> str:
+    text = unicodedata.normalize("NFC", text).casefold()
+    if "\u200d" in text:
+        text = _CHILLU_PATTERN.sub(lambda match: _CHILLU[match.group()], text)
+    return text.translate(_STRIP_TABLE)
+
+
+def _map_tokens(folded: str, mapping: dict[str, str]) -> str:
+    return " ".join([mapping.get(token, token) for token in folded.split()])
+
+
+@lru_cache(maxsize=4096)
+def _normalize_cached(text: str) -> str:
+    return _map_tokens(_fold(text), _lexicon.mapping)
+
+
+_lexicon = SlangLexicon(SLANG_LEXICON_PATHS, SLANG_RELOAD_SECONDS)
+
+
+def get_slang_lexicon() -> SlangLexicon:
+    return _lexicon
 
 
 def normalize_text(text: str) -> str:
-    lowered = text.lower().strip()
-    lowered = lowered.translate(str.maketrans("", "", string.punctuation))
-    lowered = re.sub(r"\s+", " ", lowered)
-    tokens = lowered.split(" ")
-    normalized_tokens = [SLANG_MAP.get(token, token) for token in tokens]
-    return " ".join(token for token in normalized_tokens if token)
+    _lexicon.refresh()
+    return _normalize_cached(text)
+
+
+def normalize_texts(texts: Sequence[str]) -> list[str]:
+    # Folds the whole batch in one pass over a joined string, then maps tokens per unique answer.
+    _lexicon.refresh()
+    if not texts:
+        return []
+    unique = list(dict.fromkeys(texts))
+    folded = _fold(_BATCH_SEPARATOR.join(unique)).split(_BATCH_SEPARATOR)
+    if len(folded) != len(unique):
+        folded = [_fold(text) for text in unique]
+    mapping = _lexicon.mapping
+    normalized = {text: _map_tokens(value, mapping) for text, value in zip(unique, folded)}
+    return [normalized[text] for text in texts]
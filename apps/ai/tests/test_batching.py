@@ -0,0 +1,44 @@
+import threading
+
+from django.test import SimpleTestCase
+
+from apps.ai.services.batching import EmbeddingBatcher
+
+
+class EmbeddingBatcherTests(SimpleTestCase):
+    def test_groups_submissions_into_one_encode_call(self):
+        calls: list[list[str]] = []
+        handled: list[tuple] = []
+        release = threading.Event()
+
+        def encoder(texts):
+            release.wait(1)
+            calls.append(list(texts))
+            return [[float(len(text))] for text in texts]
+
+        batcher = EmbeddingBatcher(handled.extend, window_seconds=0.05, max_batch_size=8, encoder=encoder)
+        for key, text in enumerate(["pizza", "lol", "pizza", "awesome"]):
+            batcher.submit(key, text)
+        release.set()
+        batcher.wait_idle()
+
+        self.assertEqual(calls, [["pizza", "lol", "awesome"]])
+        self.assertEqual(
+            sorted(handled),
+            [(0, "pizza", [5.0]), (1, "lol", [3.0]), (2, "pizza", [5.0]), (3, "awesome", [7.0])],
+        )
+
+    def test_batch_size_caps_each_pass(self):
+        calls: list[int] = []
+
+        def encoder(texts):
+            calls.append(len(texts))
+            return [[0.0] for _ in texts]
+
+        batcher = EmbeddingBatcher(lambda items: None, window_seconds=0.2, max_batch_size=2, encoder=encoder)
+        for key in range(5):
+            batcher.submit(key, f"text {key}")
+        batcher.wait_idle()
+
+        self.assertEqual(sum(calls), 5)
+        self.assertTrue(all(size <= 2 for size in calls))
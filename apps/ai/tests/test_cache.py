@@ -0,0 +1,67 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from apps.ai.models import EmbeddingCacheEntry
+from apps.ai.services import cache, embedding
+from apps.ai.services.embedding import identified_batch_encode_text
+
+
+class EmbeddingCacheTests(TestCase):
+    def setUp(self):
+        cache.clear_memory_cache()
+        self.addCleanup(cache.clear_memory_cache)
+
+    def test_repeated_texts_are_encoded_once(self):
+        with mock.patch.object(cache, "identified_batch_encode_text", wraps=identified_batch_encode_text) as encoder:
+            first = cache.cached_batch_encode_text(["awesome", "pizza", "awesome"])
+            second = cache.cached_encode_text("pizza")
+
+        encoder.assert_called_once_with(["awesome", "pizza"])
+        self.assertEqual(first[0], first[2])
+        self.assertEqual(second, first[1])
+        stats = cache.cache_stats()
+        self.assertEqual((stats["misses"], stats["memory_hits"]), (3, 1))
+
+    def test_shared_store_survives_memory_eviction(self):
+        vector = cache.cached_encode_text("pwoli")
+        self.assertTrue(EmbeddingCacheEntry.objects.filter(key=cache.cache_key("pwoli")).exists())
+
+        cache.clear_memory_cache()
+        with mock.patch.object(cache, "identified_batch_encode_text") as encoder:
+            self.assertEqual(cache.cached_encode_text("pwoli"), vector)
+        encoder.assert_not_called()
+        self.assertEqual(cache.cache_stats()["store_hits"], 1)
+
+    def test_fallback_vectors_are_not_cached_under_the_model_identity(self):
+        with (
+            override_settings(EMBEDDING_BACKEND="sentence-transformers"),
+            mock.patch.object(embedding, "load_model", return_value=None),
+        ):
+            cache.cached_encode_text("pwoli")
+
+        self.assertEqual(
+            set(EmbeddingCacheEntry.objects.values_list("model_name", flat=True)), {embedding.FALLBACK_IDENTITY}
+        )
+        self.assertFalse(EmbeddingCacheEntry.objects.filter(key=cache.cache_key("pwoli", embedding.MODEL_NAME)).exists())
+
+    @override_settings(EMBEDDING_CACHE_MAX_ENTRIES=2, EMBEDDING_CACHE_STORE_ENABLED=False)
+    def test_memory_tier_is_bounded(self):
+        cache.cached_batch_encode_text(["a", "b", "c"])
+        self.assertEqual(cache.cache_stats()["memory_entries"], 2)
+
+    @override_settings(EMBEDDING_BACKEND="hash", EMBEDDING_CACHE_RETENTION_DAYS=30)
+    def test_prune_deletes_store_entries_past_retention(self):
+        cache.cached_batch_encode_text(["pizza", "pwoli", "chai"])
+        old_keys = [cache.cache_key(text) for text in ("pizza", "pwoli")]
+        EmbeddingCacheEntry.objects.filter(key__in=old_keys).update(created_at=timezone.now() - timedelta(days=31))
+
+        out = StringIO()
+        call_command("prune_embedding_cache", "--batch-size", "1", stdout=out)
+
+        self.assertIn("Pruned 2 embedding cache entries", out.getvalue())
+        self.assertEqual(list(EmbeddingCacheEntry.objects.values_list("key", flat=True)), [cache.cache_key("chai")])
@@ -0,0 +1,96 @@
+import importlib.util
+from unittest import mock, skipUnless
+
+from django.core.exceptions import ImproperlyConfigured
+from django.test import SimpleTestCase, override_settings
+
+from apps.ai.services import embedding
+
+
+class ModelStartupTests(SimpleTestCase):
+    def setUp(self):
+        self.previous_mode = embedding._startup_metrics["mode"]
+        self.enterContext(override_settings(EMBEDDING_BACKEND="hash"))
+
+    def tearDown(self):
+        embedding._startup_metrics["mode"] = self.previous_mode
+
+    def test_lazy_mode_defers_model_load(self):
+        self.assertIsNone(embedding.start_model_warmup("lazy"))
+
+        self.assertFalse(embedding.is_model_ready())
+        embedding.encode_text("pizza")
+        self.assertTrue(embedding.is_model_ready())
+
+    def test_background_warmup_sets_ready_flag_and_timings(self):
+        thread = embedding.start_model_warmup("background")
+        thread.join(5)
+
+        metrics = embedding.startup_metrics()
+        self.assertTrue(metrics["ready"])
+        self.assertEqual(metrics["mode"], "background")
+        self.assertEqual(metrics["backend"], "hash")
+        self.assertIsNotNone(metrics["warmup_seconds"])
+
+    def test_readiness_endpoint_waits_for_warmup(self):
+        embedding._startup_metrics["mode"] = "background"
+
+        self.assertEqual(self.client.get("/readyz").status_code, 503)
+        embedding.warm_up_model()
+        response = self.client.get("/readyz")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()["ready"])
+
+
+class ModelLoadFailureTests(SimpleTestCase):
+    def setUp(self):
+        previous_error = embedding._startup_metrics["error"]
+        self.addCleanup(embedding._startup_metrics.__setitem__, "error", previous_error)
+        self.enterContext(override_settings(EMBEDDING_BACKEND="onnx"))
+
+    def test_failed_load_falls_back_to_hash_once(self):
+        with mock.patch.object(embedding, "load_model", side_effect=OSError("no model files")) as load:
+            first = embedding.encode_text("pizza")
+            second = embedding.encode_text("pizza")
+
+            self.assertEqual(load.call_count, 1)
+            self.assertEqual(embedding.local_model_identity(), embedding.FALLBACK_IDENTITY)
+        self.assertEqual(first, second)
+        self.assertEqual(first, embedding._fallback_embedding("pizza"))
+        self.assertIn("no model files", embedding.startup_metrics()["error"])
+
+
+class EmbeddingBackendTests(SimpleTestCase):
+    def test_backend_agreement_is_rowwise_cosine(self):
+        agreement = embedding.backend_agreement([[1.0, 0.0], [0.0, 0.0]], [[2.0, 0.0], [1.0, 1.0]])
+
+        self.assertEqual(agreement.tolist(), [1.0, 0.0])
+
+    def test_quantized_backends_get_their_own_cache_identity(self):
+        self.assertEqual(embedding.model_identity("sentence-transformers"), embedding.MODEL_NAME)
+        self.assertNotEqual(embedding.model_identity("onnx-int8"), embedding.model_identity("onnx"))
+
+    @override_settings(EMBEDDING_BACKEND="tensorrt")
+    def test_rejects_unknown_backend(self):
+        with self.assertRaises(ImproperlyConfigured):
+            embedding.model_identity()
+
+
+@skipUnless(
+    importlib.util.find_spec("sentence_transformers") and importlib.util.find_spec("onnxruntime"),
+    "sentence-transformers and onnxruntime are required for backend parity",
+)
+class BackendParityTests(SimpleTestCase):
+    def test_onnx_backends_agree_with_pytorch_vectors(self):
+        reference = embedding.load_model("sentence-transformers").encode(
+            embedding.PARITY_TEXTS, normalize_embeddings=True
+        )
+        backends = ["onnx"]
+        if embedding.EMBEDDING_MODEL_PATH:
+            backends.append("onnx-int8")
+        for backend in backends:
+            with self.subTest(backend=backend):
+                vectors = embedding.load_model(backend).encode(embedding.PARITY_TEXTS, normalize_embeddings=True)
+                agreement = embedding.backend_agreement(reference, vectors)
+                self.assertGreaterEqual(agreement.min(), embedding.BACKEND_MIN_AGREEMENT[backend])
@@ -0,0 +1,31 @@
+import numpy as np
+from django.test import SimpleTestCase
+
+from apps.ai.fields import VectorField, decode_vector, encode_vector
+
+
+class VectorFieldTests(SimpleTestCase):
+    def setUp(self):
+        rng = np.random.default_rng(7)
+        vector = rng.normal(size=384).astype(np.float32)
+        self.vector = vector / np.linalg.norm(vector)
+
+    def test_float32_round_trip_is_exact_and_compact(self):
+        data = encode_vector(self.vector.tolist())
+        self.assertEqual(len(data), 384 * 4)
+        decoded = decode_vector(data)
+        self.assertFalse(decoded.flags.owndata)
+        np.testing.assert_array_equal(decoded, self.vector)
+
+    def test_quantized_dtypes_stay_close(self):
+        for dtype, size, tolerance in (("float16", 768, 1e-3), ("int8", 388, 1e-2)):
+            with self.subTest(dtype=dtype):
+                data = encode_vector(self.vector, dtype)
+                self.assertEqual(len(data), size)
+                np.testing.assert_allclose(decode_vector(data, dtype), self.vector, atol=tolerance)
+
+    def test_field_prepares_lists_and_reads_arrays(self):
+        field = VectorField()
+        data = field.get_prep_value([0.5, -0.25])
+        np.testing.assert_array_equal(field.from_db_value(data, None, None), [0.5, -0.25])
+        self.assertIsNone(field.from_db_value(None, None, None))
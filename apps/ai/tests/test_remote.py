@@ -0,0 +1,68 @@
+import tempfile
+import threading
+from pathlib import Path
+
+from django.test import SimpleTestCase, override_settings
+
+from apps.ai.services import embedding
+from apps.ai.services.remote import EmbeddingClient, EmbeddingServer
+
+
+class EmbeddingServerTests(SimpleTestCase):
+    def start_server(self, address, encoder, identity="remote-model@onnx"):
+        server = EmbeddingServer(
+            address, encoder=encoder, identity=lambda: identity, window_seconds=0.05, max_batch_size=16
+        )
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(server.shutdown)
+        return server
+
+    def test_concurrent_clients_share_one_model_batch(self):
+        calls = []
+
+        def encoder(texts):
+            calls.append(list(texts))
+            return [[float(len(text)), 1.0] for text in texts]
+
+        server = self.start_server("tcp://127.0.0.1:0", encoder)
+        client = EmbeddingClient(server.address)
+        results = {}
+
+        def worker(text):
+            results[text] = client.batch_encode([text])
+            client.close()
+
+        threads = [threading.Thread(target=worker, args=(text,)) for text in ("pizza", "lol", "chai")]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(5)
+
+        self.assertEqual(results, {"pizza": [[5.0, 1.0]], "lol": [[3.0, 1.0]], "chai": [[4.0, 1.0]]})
+        self.assertEqual(len(calls), 1)
+
+    def test_unix_socket_round_trip(self):
+        path = Path(tempfile.mkdtemp()) / "embed.sock"
+        server = self.start_server(f"unix:{path}", lambda texts: [[0.5] * 3 for _ in texts])
+        client = EmbeddingClient(server.address)
+        self.addCleanup(client.close)
+
+        self.assertEqual(client.batch_encode(["a", "b"]), [[0.5] * 3, [0.5] * 3])
+
+    @override_settings(EMBEDDING_BACKEND="sentence-transformers")
+    def test_vectors_carry_the_servers_model_identity(self):
+        server = self.start_server("tcp://127.0.0.1:0", lambda texts: [[1.0, 0.0] for _ in texts], "minilm@onnx-int8")
+        self.enterContext(override_settings(EMBEDDING_SERVER_ADDRESS=server.address))
+
+        identity, vectors = embedding.identified_batch_encode_text(["pizza"])
+
+        self.assertEqual((identity, vectors), ("minilm@onnx-int8", [[1.0, 0.0]]))
+        self.assertEqual(embedding.current_model_identity(), "minilm@onnx-int8")
+
+    @override_settings(EMBEDDING_BACKEND="hash", EMBEDDING_SERVER_ADDRESS="tcp://127.0.0.1:1")
+    def test_shim_falls_back_in_process_when_server_is_down(self):
+        with self.assertLogs("apps.ai.services.embedding", "WARNING"):
+            vectors = embedding.batch_encode_text(["pizza"])
+
+        self.assertEqual(vectors, [embedding._fallback_embedding("pizza")])
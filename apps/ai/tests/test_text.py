@@ -0,0 +1,40 @@
+import json
+import tempfile
+from pathlib import Path
+
+from django.test import SimpleTestCase
+
+from apps.ai.services.text import DEFAULT_LEXICON_PATH, SlangLexicon, normalize_text, normalize_texts
+
+
+class NormalizeTextTests(SimpleTestCase):
+    def test_strips_punctuation_collapses_whitespace_and_maps_slang(self):
+        self.assertEqual(normalize_text("  Pwoli!!  machaa,\tsheri. "), "awesome macha ok")
+        self.assertEqual(normalize_text("don’t STOP…"), "dont stop")
+
+    def test_keeps_malayalam_marks_and_folds_legacy_chillu(self):
+        self.assertEqual(normalize_text("ഞാന്‍ ഉറങ്ങി!"), "ഞാൻ ഉറങ്ങി")
+        self.assertEqual(normalize_text("entha​ macha?"), "what friend")
+
+    def test_batch_matches_single_normalization(self):
+        texts = ["Pwoli!", "lol", "Pwoli!", "ഞാന്‍", "", "a\x00b"]
+
+        self.assertEqual(normalize_texts(texts), [normalize_text(text) for text in texts])
+
+
+class SlangLexiconTests(SimpleTestCase):
+    def test_later_lexicons_override_and_reload_on_change(self):
+        override = Path(tempfile.mkdtemp()) / "slang.json"
+        override.write_text(json.dumps({"Pwoli": "great"}), encoding="utf-8")
+        lexicon = SlangLexicon([DEFAULT_LEXICON_PATH, override], reload_seconds=0)
+
+        self.assertEqual(lexicon.mapping["pwoli"], "great")
+        self.assertEqual(lexicon.mapping["sheri"], "ok")
+
+        override.write_text(json.dumps({"pwoli": "superb", "adipoli": "excellent"}), encoding="utf-8")
+        lexicon._mtimes = ()
+        lexicon.refresh()
+
+        self.assertEqual(lexicon.mapping["pwoli"], "superb")
+        self.assertEqual(lexicon.mapping["adipoli"], "excellent")
+        self.assertEqual(lexicon.version, 2)
@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Any, Callable
+
+from django.conf import settings
+
+from .services import GameServiceError
+
+
+class ActionPayloadError(GameServiceError):
+    pass
+
+
+class ActionRateLimited(GameServiceError):
+    pass
+
+
+def _uuid(value: Any) -> str:
+    return str(uuid.UUID(str(value)))
+
+
+def _int(value: Any) -> int:
+    if isinstance(value, bool):
+        raise TypeError(value)
+    return int(value)
+
+
+def _text(max_length: int) -> Callable[[Any], str]:
+    def parse(value: Any) -> str:
+        if not isinstance(value, str) or not value.strip() or len(value) > max_length:
+            raise ValueError(value)
+        return value
+
+    return parse
+
+
+@dataclass(frozen=True)
+class Field:
+    name: str
+    parse: Callable[[Any], Any]
+    required: bool = True
+
+
+@dataclass(frozen=True)
+class ActionSpec:
+    name: str
+    handler: str
+    fields: tuple[Field, ...] = ()
+    rate: float = 10.0
+    burst: int = 20
+    # Room actions take a room slot and, with sharding on, go to the room's shard worker.
+    room_action: bool = True
+
+    def validate(self, data: Any) -> dict:
+        if data is None:
+            data = {}
+        if not isinstance(data, dict):
+            raise ActionPayloadError(f"Invalid {self.name} payload.")
+        cleaned = {}
+        for field in self.fields:
+            value = data.get(field.name)
+            if value is None:
+                if field.required:
+                    raise ActionPayloadError(f"Invalid {self.name} payload: {field.name} is required.")
+                continue
+            try:
+                cleaned[field.name] = field.parse(value)
+            except (TypeError, ValueError, AttributeError):
+                raise ActionPayloadError(f"Invalid {self.name} payload: {field.name}.") from None
+        return cleaned
+
+
+# Same field rules as the REST serializers, checked without building a serializer per message.
+ACTIONS = {
+    spec.name: spec
+    for spec in (
+        ActionSpec("sync_state", "_sync_state", rate=2.0, burst=5, room_action=False),
+        ActionSpec("start_round", "_start_round", (Field("question_id", _int, required=False),), rate=2.0, burst=5),
+        ActionSpec("submit_answer", "_submit_answer", (Field("player_id", _uuid), Field("text", _text(1000)))),
+        ActionSpec("reveal_answer", "_reveal_answer", rate=2.0, burst=5),
+        ActionSpec(
+            "submit_guess",
+            "_submit_guess",
+            (Field("player_id", _uuid), Field("answer_id", _int), Field("guessed_player_id", _uuid)),
+        ),
+        ActionSpec("finish_room", "_finish_room", rate=1.0, burst=3),
+    )
+}
+
+
+def get_action(name: Any) -> ActionSpec:
+    spec = ACTIONS.get(name) if isinstance(name, str) else None
+    if spec is None:
+        raise ActionPayloadError("Unsupported action")
+    return spec
+
+
+class TokenBucket:
+    __slots__ = ("rate", "burst", "tokens", "updated")
+
+    def __init__(self, rate: float, burst: int) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def allow(self) -> bool:
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+
+class ActionLimiter:
+    # One per connection; WS_ACTION_RATE_LIMITS overrides the per-action defaults.
+    def __init__(self) -> None:
+        self._buckets: dict[str, TokenBucket] = {}
+
+    def check(self, spec: ActionSpec) -> None:
+        if not settings.WS_RATE_LIMITS_ENABLED:
+            return
+        bucket = self._buckets.get(spec.name)
+        if bucket is None:
+            rate, burst = settings.WS_ACTION_RATE_LIMITS.get(spec.name, (spec.rate, spec.burst))
+            bucket = self._buckets[spec.name] = TokenBucket(rate, burst)
+        if not bucket.allow():
+            raise ActionRateLimited(f"Too many {spec.name} actions; slow down.")
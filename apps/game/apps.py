@@ -1,6 +1,17 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_delete, post_save
+from django.test.signals import setting_changed
 
 
 class GameConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.game"
+
+    def ready(self):
+        from .engine import reset_on_setting_change
+        from .models import Question
+        from .questions import invalidate_question_cache
+
+        post_save.connect(invalidate_question_cache, sender=Question, dispatch_uid="question-cache-save")
+        post_delete.connect(invalidate_question_cache, sender=Question, dispatch_uid="question-cache-delete")
+        setting_changed.connect(reset_on_setting_change, dispatch_uid="coalescer-setting-changed")
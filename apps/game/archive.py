@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+import base64
+import gzip
+import json
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Q
+
+from .models import Answer, Guess, Player, Room, RoomStatus, Round, SyncResult
+
+ROOM_FIELDS = [
+    "id",
+    "code",
+    "status",
+    "current_round",
+    "max_rounds",
+    "host_id",
+    "state_version",
+    "created_at",
+    "updated_at",
+]
+# Child tables are stored column-wise per room: field names once, then one list of values per row.
+CHILD_TABLES = {
+    "players": (Player, "room_id", ["id", "name", "score", "is_host", "joined_at"]),
+    "rounds": (Round, "room_id", ["id", "question_id", "number", "started_at", "ended_at", "reveal_answer_id"]),
+    "answers": (
+        Answer,
+        "room_id",
+        ["id", "round_id", "question_id", "player_id", "text", "normalized_text", "embedding_vector", "submitted_at"],
+    ),
+    "guesses": (
+        Guess,
+        "round__room_id",
+        ["id", "round_id", "answer_id", "guesser_id", "guessed_player_id", "is_correct", "points_awarded", "created_at"],
+    ),
+    "sync_results": (
+        SyncResult,
+        "room_id",
+        [
+            "id",
+            "player_one_id",
+            "player_two_id",
+            "answer_similarity",
+            "correct_guess_rate",
+            "mutual_selection_rate",
+            "sync_percentage",
+            "created_at",
+        ],
+    ),
+}
+
+
+class ArchiveEncoder(DjangoJSONEncoder):
+    def default(self, o):
+        if isinstance(o, (bytes, memoryview)):
+            return base64.b64encode(bytes(o)).decode("ascii")
+        if hasattr(o, "tobytes"):
+            return base64.b64encode(o.astype("<f4").tobytes()).decode("ascii")
+        return super().default(o)
+
+
+@dataclass
+class ReapStats:
+    rooms: int = 0
+    rows: dict[str, int] = field(default_factory=lambda: defaultdict(int))
+    bytes_written: int = 0
+    batches: int = 0
+    started: float = field(default_factory=time.perf_counter)
+
+    def summary(self) -> dict:
+        elapsed = time.perf_counter() - self.started
+        return {
+            "rooms": self.rooms,
+            "rows": dict(self.rows),
+            "batches": self.batches,
+            "bytes_written": self.bytes_written,
+            "seconds": round(elapsed, 3),
+            "rooms_per_second": round(self.rooms / elapsed, 2) if elapsed else 0.0,
+        }
+
+
+def expired_rooms(finished_before: datetime, idle_before: datetime):
+    # Spelled as two (status, updated_at) ranges so both arms can use game_room_status_updated_idx.
+    open_statuses = [status for status in RoomStatus.values if status != RoomStatus.FINISHED]
+    return Room.objects.filter(
+        Q(status=RoomStatus.FINISHED, updated_at__lt=finished_before)
+        | Q(status__in=open_statuses, updated_at__lt=idle_before)
+    )
+
+
+def export_rooms(room_ids: list[int]) -> list[dict]:
+    records = {}
+    for row in Room.objects.filter(id__in=room_ids).values(*ROOM_FIELDS):
+        records[row["id"]] = row
+        for name, (_, _, columns) in CHILD_TABLES.items():
+            row[name] = {"columns": columns, "rows": []}
+    for name, (model, room_lookup, columns) in CHILD_TABLES.items():
+        rows = model.objects.filter(**{f"{room_lookup}__in": room_ids}).values_list(room_lookup, *columns)
+        for room_id, *values in rows.iterator(chunk_size=2000):
+            records[room_id][name]["rows"].append(values)
+    return list(records.values())
+
+
+def delete_rooms(room_ids: list[int]) -> dict[str, int]:
+    # Break the room <-> player/answer cycles first, then delete leaf tables up, so each delete is a plain
+    # batch DELETE on rows nothing else still points at.
+    Room.objects.filter(id__in=room_ids).update(host=None, revealed_answer=None, active_question=None)
+    Round.objects.filter(room_id__in=room_ids).update(reveal_answer=None)
+    deleted = {}
+    for name, (model, room_lookup, _) in reversed(CHILD_TABLES.items()):
+        deleted[name], _ = model.objects.filter(**{f"{room_lookup}__in": room_ids}).delete()
+    deleted["rooms"], _ = Room.objects.filter(id__in=room_ids).delete()
+    return deleted
+
+
+class RoomArchiveWriter:
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = gzip.open(path, "wt", encoding="utf-8")
+
+    def write(self, records: list[dict]) -> int:
+        written = 0
+        for record in records:
+            line = json.dumps(record, cls=ArchiveEncoder, separators=(",", ":")) + "\n"
+            self._file.write(line)
+            written += len(line)
+        return written
+
+    def close(self) -> None:
+        self._file.close()
+
+
+def reap_rooms(
+    finished_before: datetime,
+    idle_before: datetime,
+    writer: RoomArchiveWriter | None,
+    batch_size: int = 100,
+    max_rooms: int | None = None,
+    pause_seconds: float = 0.0,
+    progress=None,
+) -> ReapStats:
+    stats = ReapStats()
+    while max_rooms is None or stats.rooms < max_rooms:
+        limit = batch_size if max_rooms is None else min(batch_size, max_rooms - stats.rooms)
+        with transaction.atomic():
+            # Rooms someone is touching right now are skipped rather than waited on; the next run gets them.
+            room_ids = list(
+                expired_rooms(finished_before, idle_before)
+                .select_for_update(skip_locked=True)
+                .order_by("id")
+                .values_list("id", flat=True)[:limit]
+            )
+            if not room_ids:
+                break
+            records = export_rooms(room_ids)
+            if writer is not None:
+                stats.bytes_written += writer.write(records)
+            deleted = delete_rooms(room_ids)
+
+        stats.rooms += len(room_ids)
+        stats.batches += 1
+        for name, count in deleted.items():
+            stats.rows[name] += count
+        if progress is not None:
+            progress(stats)
+        if pause_seconds:
+            time.sleep(pause_seconds)
+    return stats
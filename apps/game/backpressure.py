@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import weakref
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+
+from django.conf import settings
+
+from .actions import ActionRateLimited, TokenBucket
+from .services import GameServiceError
+
+
+class RoomBusy(GameServiceError):
+    pass
+
+
+@dataclass
+class _RoomSlot:
+    bucket: TokenBucket
+    semaphore: asyncio.Semaphore
+    waiting: int = 0
+    active: int = 0
+    snapshot: asyncio.Future | None = None
+
+    @property
+    def idle(self) -> bool:
+        return not self.active and not self.waiting and self.snapshot is None
+
+
+class RoomGate:
+    # Shared by every connection on one event loop, so a single room (or a client spamming it) can hold at
+    # most max_inflight threadpool slots and row locks, with a short queue behind them.
+    def __init__(self, rate: float, burst: int, max_inflight: int, max_waiting: int, max_rooms: int = 10000):
+        self.rate = rate
+        self.burst = burst
+        self.max_inflight = max_inflight
+        self.max_waiting = max_waiting
+        self.max_rooms = max_rooms
+        self._rooms: OrderedDict[str, _RoomSlot] = OrderedDict()
+        # Plain counters kept up to date on the loop, so stats() never walks _rooms while the loop changes it;
+        # /metrics reads them from a sync worker thread.
+        self._totals = {"limited": 0, "busy": 0, "merged_snapshots": 0}
+        self._active = 0
+
+    def _slot(self, room_code: str) -> _RoomSlot:
+        slot = self._rooms.get(room_code)
+        if slot is None:
+            slot = _RoomSlot(TokenBucket(self.rate, self.burst), asyncio.Semaphore(self.max_inflight))
+            self._rooms[room_code] = slot
+            self._evict()
+        self._rooms.move_to_end(room_code)
+        return slot
+
+    def _evict(self) -> None:
+        if len(self._rooms) <= self.max_rooms:
+            return
+        for code in [code for code, slot in self._rooms.items() if slot.idle][: len(self._rooms) - self.max_rooms]:
+            del self._rooms[code]
+
+    def check_rate(self, room_code: str) -> None:
+        if settings.WS_RATE_LIMITS_ENABLED and not self._slot(room_code).bucket.allow():
+            self._totals["limited"] += 1
+            raise ActionRateLimited("This room is receiving too many actions; slow down.")
+
+    @asynccontextmanager
+    async def slot(self, room_code: str):
+        room = self._slot(room_code)
+        if room.active >= self.max_inflight and room.waiting >= self.max_waiting:
+            self._totals["busy"] += 1
+            raise RoomBusy("Room is busy; try again.")
+        room.waiting += 1
+        try:
+            await room.semaphore.acquire()
+        finally:
+            room.waiting -= 1
+        room.active += 1
+        self._active += 1
+        try:
+            yield
+        finally:
+            room.active -= 1
+            self._active -= 1
+            room.semaphore.release()
+
+    async def snapshot(self, room_code: str, load):
+        # sync_state requests for a room that arrive while a load is running share its result.
+        room = self._slot(room_code)
+        if room.snapshot is not None:
+            self._totals["merged_snapshots"] += 1
+            return await asyncio.shield(room.snapshot)
+        room.snapshot = asyncio.ensure_future(load())
+        try:
+            return await asyncio.shield(room.snapshot)
+        finally:
+            room.snapshot = None
+
+    def stats(self) -> dict:
+        return {**self._totals, "rooms": len(self._rooms), "active": self._active}
+
+
+_gates: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, RoomGate] = weakref.WeakKeyDictionary()
+_gates_lock = threading.Lock()
+
+
+def get_room_gate() -> RoomGate:
+    # asyncio primitives belong to one loop; each server loop (and each test loop) gets its own gate.
+    loop = asyncio.get_running_loop()
+    gate = _gates.get(loop)
+    if gate is None:
+        gate = RoomGate(
+            settings.WS_ROOM_ACTION_RATE,
+            settings.WS_ROOM_ACTION_BURST,
+            settings.WS_ROOM_MAX_INFLIGHT,
+            settings.WS_ROOM_MAX_WAITING,
+        )
+        with _gates_lock:
+            _gates[loop] = gate
+    return gate
+
+
+def room_gate_stats() -> dict:
+    totals: dict[str, int] = {}
+    with _gates_lock:
+        gates = list(_gates.values())
+    for gate in gates:
+        for key, value in gate.stats().items():
+            totals[key] = totals.get(key, 0) + value
+    return totals
@@ -0,0 +1,325 @@
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import random
+import time
+from collections import defaultdict
+from dataclasses import asdict, dataclass
+
+import numpy as np
+from asgiref.sync import sync_to_async
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.db import connection
+from django.test import Client
+from django.urls import re_path, reverse
+
+from .consumers import GameConsumer
+from .models import Answer, Room
+
+SAMPLE_ANSWERS = [
+    "pizza",
+    "pwoli",
+    "sleep all day",
+    "biriyani",
+    "beach trip with the gang",
+    "lol",
+    "movies",
+    "chai and rain",
+]
+
+_query_counter: contextvars.ContextVar[list[int] | None] = contextvars.ContextVar(
+    "benchmark_query_counter", default=None
+)
+
+
+class BenchmarkError(Exception):
+    pass
+
+
+def _count_queries(execute, sql, params, many, context):
+    counter = _query_counter.get()
+    if counter is not None:
+        counter[0] += 1
+    return execute(sql, params, many, context)
+
+
+def _install_query_counter() -> None:
+    if _count_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_count_queries)
+
+
+def _remove_query_counter() -> None:
+    if _count_queries in connection.execute_wrappers:
+        connection.execute_wrappers.remove(_count_queries)
+
+
+@dataclass
+class BenchmarkConfig:
+    rooms: int = 4
+    players: int = 6
+    rounds: int = 1
+    transport: str = "rest"
+    seed: int = 7
+
+
+class Recorder:
+    def __init__(self) -> None:
+        self.durations: dict[str, list[float]] = defaultdict(list)
+        self.queries: dict[str, list[int]] = defaultdict(list)
+        self.errors: dict[str, int] = defaultdict(int)
+
+    def record(self, action: str, seconds: float, queries: int, ok: bool = True) -> None:
+        self.durations[action].append(seconds)
+        self.queries[action].append(queries)
+        if not ok:
+            self.errors[action] += 1
+
+    def summary(self) -> dict:
+        actions = {}
+        for action, durations in sorted(self.durations.items()):
+            millis = np.asarray(durations) * 1000
+            queries = np.asarray(self.queries[action])
+            actions[action] = {
+                "count": len(durations),
+                "errors": self.errors[action],
+                "p50_ms": round(float(np.percentile(millis, 50)), 3),
+                "p95_ms": round(float(np.percentile(millis, 95)), 3),
+                "p99_ms": round(float(np.percentile(millis, 99)), 3),
+                "mean_ms": round(float(millis.mean()), 3),
+                "queries_mean": round(float(queries.mean()), 2),
+                "queries_max": int(queries.max()),
+            }
+        return actions
+
+
+class TimedGameConsumer(GameConsumer):
+    def __init__(self, *args, recorder: Recorder | None = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.recorder = recorder
+        self.action_failed = False
+
+    async def receive_json(self, content, **kwargs):
+        counter = [0]
+        token = _query_counter.set(counter)
+        self.action_failed = False
+        started = time.perf_counter()
+        try:
+            await super().receive_json(content, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - started
+            _query_counter.reset(token)
+            self.recorder.record(content.get("action", "unknown"), elapsed, counter[0], ok=not self.action_failed)
+        await super().send_json({"event": "benchmark_ack", "payload": {"failed": self.action_failed}})
+
+    async def send_json(self, content, close=False):
+        if content.get("event") == "error":
+            self.action_failed = True
+        await super().send_json(content, close=close)
+
+
+class GameBenchmark:
+    def __init__(self, config: BenchmarkConfig) -> None:
+        self.config = config
+        self.recorder = Recorder()
+        self.random = random.Random(config.seed)
+        self.ws_application = URLRouter(
+            [
+                re_path(
+                    r"^ws/game/(?P<room_code>[A-Z0-9]{6})/$",
+                    TimedGameConsumer.as_asgi(recorder=self.recorder),
+                ),
+            ]
+        )
+
+    async def run(self) -> dict:
+        if self.config.transport not in {"rest", "ws"}:
+            raise BenchmarkError(f"Unknown transport {self.config.transport!r}.")
+        if self.config.players < 2:
+            raise BenchmarkError("A room needs at least two players.")
+
+        await sync_to_async(_install_query_counter)()
+        started = time.perf_counter()
+        try:
+            await asyncio.gather(*(self._run_room(index) for index in range(self.config.rooms)))
+        finally:
+            wall_seconds = time.perf_counter() - started
+            await sync_to_async(_remove_query_counter)()
+
+        actions = self.recorder.summary()
+        total = sum(stats["count"] for stats in actions.values())
+        return {
+            "config": asdict(self.config),
+            "actions": actions,
+            "totals": {
+                "actions": total,
+                "errors": sum(stats["errors"] for stats in actions.values()),
+                "wall_seconds": round(wall_seconds, 3),
+                "actions_per_second": round(total / wall_seconds, 2) if wall_seconds else 0.0,
+                "rooms_per_second": round(self.config.rooms / wall_seconds, 3) if wall_seconds else 0.0,
+            },
+        }
+
+    async def _rest(self, client: Client, action: str, path: str, data: dict | None = None) -> dict:
+        def call():
+            counter = [0]
+            token = _query_counter.set(counter)
+            started = time.perf_counter()
+            try:
+                response = client.post(path, data or {}, content_type="application/json")
+            finally:
+                elapsed = time.perf_counter() - started
+                _query_counter.reset(token)
+            ok = response.status_code < 400
+            self.recorder.record(action, elapsed, counter[0], ok=ok)
+            if not ok:
+                raise BenchmarkError(f"{action} failed with {response.status_code}: {response.content!r}")
+            return response.json()
+
+        return await sync_to_async(call)()
+
+    async def _ws(self, communicator: WebsocketCommunicator, action: str, data: dict | None = None) -> None:
+        await communicator.send_json_to({"action": action, "data": data or {}})
+        while True:
+            message = await communicator.receive_json_from(timeout=30)
+            if message["event"] == "benchmark_ack":
+                if message["payload"]["failed"]:
+                    raise BenchmarkError(f"{action} failed over the websocket.")
+                return
+
+    @sync_to_async
+    def _answer_author(self, answer_id: int) -> str:
+        return str(Answer.objects.values_list("player_id", flat=True).get(id=answer_id))
+
+    def _guess_target(self, guesser: str, author: str, players: list[str]) -> str:
+        if self.random.random() < 0.5:
+            return author
+        return self.random.choice([player for player in players if player != guesser])
+
+    async def _run_room(self, index: int) -> None:
+        client = Client()
+        created = await self._rest(client, "create_room", reverse("create-room"), {"name": f"host{index}"})
+        code = created["room_code"]
+        joined = await asyncio.gather(
+            *(
+                self._rest(client, "join_room", reverse("join-room"), {"room_code": code, "name": f"player{i}"})
+                for i in range(1, self.config.players)
+            )
+        )
+        players = [created["player_id"], *(payload["player_id"] for payload in joined)]
+
+        if self.config.transport == "rest":
+            await self._play_rest(client, code, players)
+        else:
+            await self._play_ws(code, players)
+
+    async def _play_rest(self, client: Client, code: str, players: list[str]) -> None:
+        for round_index in range(self.config.rounds):
+            await self._rest(client, "start_round", reverse("start-round"), {"room_code": code})
+            await asyncio.gather(
+                *(
+                    self._rest(
+                        client,
+                        "submit_answer",
+                        reverse("submit-answer"),
+                        {"room_code": code, "player_id": player, "text": self.random.choice(SAMPLE_ANSWERS)},
+                    )
+                    for player in players
+                )
+            )
+            revealed = await self._rest(client, "reveal_answer", reverse("reveal-answer", kwargs={"room_code": code}))
+            answer_id = revealed["revealed_answer_id"]
+            author = await self._answer_author(answer_id)
+            await asyncio.gather(
+                *(
+                    self._rest(
+                        client,
+                        "submit_guess",
+                        reverse("submit-guess"),
+                        {
+                            "room_code": code,
+                            "player_id": player,
+                            "answer_id": answer_id,
+                            "guessed_player_id": self._guess_target(player, author, players),
+                        },
+                    )
+                    for player in players
+                    if player != author
+                )
+            )
+        await self._rest(client, "finish_room", reverse("finish-room", kwargs={"room_code": code}))
+
+    async def _play_ws(self, code: str, players: list[str]) -> None:
+        sockets = {}
+        for player in players:
+            communicator = WebsocketCommunicator(self.ws_application, f"/ws/game/{code}/")
+            started = time.perf_counter()
+            # Every socket of every room connects at once, queueing on the threadpool for its first snapshot.
+            connected, _ = await communicator.connect(timeout=30)
+            if not connected:
+                raise BenchmarkError(f"Websocket connection to {code} was refused.")
+            await communicator.receive_json_from(timeout=30)
+            await communicator.receive_json_from(timeout=30)
+            self.recorder.record("ws_connect", time.perf_counter() - started, 0)
+            sockets[player] = communicator
+
+        host = sockets[players[0]]
+        try:
+            for _ in range(self.config.rounds):
+                await self._ws(host, "start_round")
+                await asyncio.gather(
+                    *(
+                        self._ws(
+                            sockets[player],
+                            "submit_answer",
+                            {"player_id": player, "text": self.random.choice(SAMPLE_ANSWERS)},
+                        )
+                        for player in players
+                    )
+                )
+                await self._ws(host, "reveal_answer")
+                answer_id = await self._revealed_answer_id(code)
+                author = await self._answer_author(answer_id)
+                await asyncio.gather(
+                    *(
+                        self._ws(
+                            sockets[player],
+                            "submit_guess",
+                            {
+                                "player_id": player,
+                                "answer_id": answer_id,
+                                "guessed_player_id": self._guess_target(player, author, players),
+                            },
+                        )
+                        for player in players
+                        if player != author
+                    )
+                )
+            await self._ws(host, "finish_room")
+        finally:
+            for communicator in sockets.values():
+                await communicator.disconnect()
+
+    @sync_to_async
+    def _revealed_answer_id(self, code: str) -> int:
+        return Room.objects.values_list("revealed_answer_id", flat=True).get(code=code)
+
+
+def compare_results(baseline: dict, current: dict) -> list[str]:
+    lines = []
+    for action, stats in current["actions"].items():
+        before = baseline.get("actions", {}).get(action)
+        if before is None:
+            lines.append(f"{action}: new (p95 {stats['p95_ms']} ms, {stats['queries_mean']} queries)")
+            continue
+        p95_change = stats["p95_ms"] - before["p95_ms"]
+        query_change = stats["queries_mean"] - before["queries_mean"]
+        lines.append(
+            f"{action}: p95 {before['p95_ms']} -> {stats['p95_ms']} ms ({p95_change:+.3f}), "
+            f"queries {before['queries_mean']} -> {stats['queries_mean']} ({query_change:+.2f})"
+        )
+    before_rate = baseline.get("totals", {}).get("actions_per_second")
+    if before_rate:
+        lines.append(f"throughput: {before_rate} -> {current['totals']['actions_per_second']} actions/s")
+    return lines
@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import secrets
+import string
+import threading
+from collections import deque
+from datetime import datetime
+
+from django.conf import settings
+
+from .models import Room, RoomStatus
+
+CODE_ALPHABET = string.ascii_uppercase + string.digits
+CODE_LENGTH = 6
+
+
+def random_code(length: int = CODE_LENGTH) -> str:
+    return "".join(secrets.choice(CODE_ALPHABET) for _ in range(length))
+
+
+class RoomCodePool:
+    # Codes are checked against the table a batch at a time; the insert itself is still the authority,
+    # so a code another process grabbed in the meantime just costs a retry.
+    def __init__(self, batch_size: int = 256, low_water: int = 32) -> None:
+        self.batch_size = batch_size
+        self.low_water = low_water
+        self._codes: deque[str] = deque()
+        self._lock = threading.Lock()
+        self._stats = {"allocated": 0, "refills": 0, "collisions": 0}
+
+    def take(self) -> str | None:
+        with self._lock:
+            if len(self._codes) < self.low_water:
+                self._refill()
+            if not self._codes:
+                return None
+            self._stats["allocated"] += 1
+            return self._codes.popleft()
+
+    def refill(self) -> int:
+        with self._lock:
+            return self._refill()
+
+    def _refill(self) -> int:
+        candidates = {random_code() for _ in range(self.batch_size)} - set(self._codes)
+        taken = set(Room.objects.filter(code__in=candidates).values_list("code", flat=True))
+        fresh = candidates - taken
+        self._codes.extend(fresh)
+        self._stats["refills"] += 1
+        self._stats["collisions"] += len(taken)
+        return len(fresh)
+
+    def record_collision(self) -> None:
+        with self._lock:
+            self._stats["collisions"] += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._codes.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {**self._stats, "depth": len(self._codes)}
+
+
+_pool: RoomCodePool | None = None
+_pool_lock = threading.Lock()
+
+
+def get_room_code_pool() -> RoomCodePool:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = RoomCodePool(settings.ROOM_CODE_POOL_BATCH, settings.ROOM_CODE_POOL_LOW_WATER)
+    return _pool
+
+
+def room_code_pool_stats() -> dict:
+    return get_room_code_pool().stats()
+
+
+def release_room_codes(finished_before: datetime, limit: int = 1000) -> list[str]:
+    codes = list(
+        Room.objects.filter(status=RoomStatus.FINISHED, updated_at__lt=finished_before, code__isnull=False)
+        .order_by("updated_at")
+        .values_list("code", flat=True)[:limit]
+    )
+    # Released codes come back through ordinary random draws in any process. Cached state is ordered by room
+    # id, so a new room reusing a code replaces the old room's state and no other process has to be told.
+    if codes:
+        Room.objects.filter(code__in=codes, status=RoomStatus.FINISHED).update(code=None)
+    return codes
@@ -1,9 +1,20 @@
 from __future__ import annotations
 
+import asyncio
+import logging
+import time
+from urllib.parse import parse_qs
+
+from channels.consumer import AsyncConsumer
 from channels.db import database_sync_to_async
 from channels.generic.websocket import AsyncJsonWebsocketConsumer
+from django.conf import settings
 
-from .models import Room, SyncResult
+from .actions import ActionLimiter, ActionPayloadError, get_action
+from .backpressure import get_room_gate
+from .engine import get_coalescer, room_group_name
+from .live import get_presence_writer
+from .metrics import get_metrics_registry
 from .serializers import SyncResultSerializer
 from .services import (
     GameServiceError,
@@ -14,139 +25,324 @@ from .services import (
     submit_answer,
     submit_guess,
 )
+from .sharding import shard_for_room, sharding_enabled
+from .state import get_room_state, state_event
+from .wire import (
+    MSGPACK_SUBPROTOCOL,
+    decode_msgpack,
+    encode_msgpack,
+    frame_content,
+    get_frame_cache,
+    message_version,
+    new_frame_id,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class RoomActionsMixin:
+    # Shared by the websocket consumer and the shard worker. The shard worker serves many rooms, so the room
+    # is passed to every handler rather than kept on the instance.
+    async def perform_action(self, room_code: str, action: str, data: dict):
+        # data has already been through the action's schema.
+        await getattr(self, get_action(action).handler)(room_code, data)
+
+    async def _broadcast_state(self, room_code: str, message: dict | None):
+        if message is None:
+            # A newer state of the room is already cached and published.
+            return
+        started = time.perf_counter()
+        await get_coalescer().send_state(self.channel_layer, room_group_name(room_code), message)
+        get_metrics_registry().observe("game_publish_duration_seconds", time.perf_counter() - started, kind="state")
+
+    async def _broadcast_now(self, room_code: str, event: str, payload: dict):
+        started = time.perf_counter()
+        await get_coalescer().send_immediate(
+            self.channel_layer,
+            room_group_name(room_code),
+            {
+                "type": "game.event",
+                "event": event,
+                "payload": payload,
+                "frame_id": new_frame_id(),
+            },
+        )
+        get_metrics_registry().observe("game_publish_duration_seconds", time.perf_counter() - started, kind="event")
+
+    async def _start_round(self, room_code: str, data: dict):
+        message = await self._start_round_db(room_code, data.get("question_id"))
+        await self._broadcast_state(room_code, message)
+
+    async def _submit_answer(self, room_code: str, data: dict):
+        message = await self._submit_answer_db(room_code, data["player_id"], data["text"])
+        await self._broadcast_state(room_code, message)
+
+    async def _reveal_answer(self, room_code: str, data: dict):
+        message = await self._reveal_answer_db(room_code)
+        await self._broadcast_state(room_code, message)
+
+    async def _submit_guess(self, room_code: str, data: dict):
+        message, reveal_complete = await self._submit_guess_db(
+            room_code,
+            data["player_id"],
+            data["answer_id"],
+            data["guessed_player_id"],
+        )
+        await self._broadcast_state(room_code, message)
+        if reveal_complete:
+            await self._broadcast_now(room_code, "round_reveal_completed", {"room_code": room_code})
 
+    async def _finish_room(self, room_code: str, data: dict):
+        message, results = await self._finish_room_db(room_code)
+        await self._broadcast_now(room_code, "final_results", {"pairs": results})
+        await self._broadcast_state(room_code, message)
 
-def room_group_name(room_code: str) -> str:
-    return f"room_{room_code.upper()}"
+    @database_sync_to_async
+    def _start_round_db(self, room_code: str, question_id) -> dict | None:
+        room, _ = start_round(room_code, question_id=question_id)
+        return state_event(room.id, get_room_snapshot(room))
+
+    @database_sync_to_async
+    def _submit_answer_db(self, room_code: str, player_id: str, text: str) -> dict | None:
+        room, _, _ = submit_answer(room_code, player_id=player_id, text=text)
+        return state_event(room.id, get_room_snapshot(room))
+
+    @database_sync_to_async
+    def _reveal_answer_db(self, room_code: str) -> dict | None:
+        room, _, _ = reveal_random_answer(room_code)
+        return state_event(room.id, get_room_snapshot(room))
 
+    @database_sync_to_async
+    def _submit_guess_db(
+        self, room_code: str, player_id: str, answer_id: int, guessed_player_id: str
+    ) -> tuple[dict | None, bool]:
+        room, _, _, reveal_complete = submit_guess(
+            room_code=room_code,
+            player_id=player_id,
+            answer_id=answer_id,
+            guessed_player_id=guessed_player_id,
+        )
+        return state_event(room.id, get_room_snapshot(room)), reveal_complete
 
-class GameConsumer(AsyncJsonWebsocketConsumer):
+    @database_sync_to_async
+    def _finish_room_db(self, room_code: str) -> tuple[dict | None, list]:
+        room, results = calculate_sync_results(room_code)
+        return state_event(room.id, get_room_snapshot(room)), SyncResultSerializer(results, many=True).data
+
+
+class GameConsumer(RoomActionsMixin, AsyncJsonWebsocketConsumer):
     async def connect(self):
         self.room_code = self.scope["url_route"]["kwargs"]["room_code"].upper()
         self.group_name = room_group_name(self.room_code)
+        query = parse_qs(self.scope.get("query_string", b"").decode())
+        self.wants_patches = query.get("delta") == ["1"]
+        self.player_id = query.get("player_id", [None])[0]
+        # JSON stays the default; clients that offer the msgpack subprotocol get compact binary frames.
+        self.codec = "msgpack" if MSGPACK_SUBPROTOCOL in self.scope.get("subprotocols", []) else "json"
+        self.state_version = None
+        self.limiter = ActionLimiter()
         await self.channel_layer.group_add(self.group_name, self.channel_name)
-        await self.accept()
+        if self.player_id:
+            get_presence_writer().mark(self.player_id, self.room_code, True)
+        await self.accept(subprotocol=MSGPACK_SUBPROTOCOL if self.codec == "msgpack" else None)
         await self.send_json({"event": "connected", "payload": {"room_code": self.room_code}})
         await self._send_snapshot()
 
     async def disconnect(self, close_code):
         await self.channel_layer.group_discard(self.group_name, self.channel_name)
+        if self.player_id:
+            get_presence_writer().mark(self.player_id, self.room_code, False)
 
-    async def receive_json(self, content, **kwargs):
-        action = content.get("action")
-        data = content.get("data", {})
+    async def receive(self, text_data=None, bytes_data=None, **kwargs):
+        # A frame that does not decode, or arrives in the other codec, gets an error reply; the socket stays open.
         try:
-            if action == "sync_state":
-                await self._send_snapshot()
-            elif action == "start_round":
-                await self._start_round(data)
-            elif action == "submit_answer":
-                await self._submit_answer(data)
-            elif action == "reveal_answer":
-                await self._reveal_answer()
-            elif action == "submit_guess":
-                await self._submit_guess(data)
-            elif action == "finish_room":
-                await self._finish_room()
+            if self.codec == "msgpack" and bytes_data is not None:
+                content = decode_msgpack(bytes_data)
+            elif self.codec == "json" and text_data is not None:
+                content = await self.decode_json(text_data)
             else:
-                await self.send_json({"event": "error", "payload": {"message": "Unsupported action"}})
+                raise ValueError("Unexpected frame type.")
+        except ValueError:
+            await self.send_json({"event": "error", "payload": {"message": "Malformed message."}})
+            return
+        await self.receive_json(content)
+
+    async def send_json(self, content, close=False):
+        if self.codec == "msgpack":
+            await self.send(bytes_data=encode_msgpack(content), close=close)
+        else:
+            await super().send_json(content, close=close)
+
+    async def send_frame(self, frame: str | bytes):
+        if isinstance(frame, bytes):
+            await self.send(bytes_data=frame)
+        else:
+            await self.send(text_data=frame)
+
+    async def receive_json(self, content, **kwargs):
+        if not isinstance(content, dict):
+            await self.send_json({"event": "error", "payload": {"message": "Unsupported action"}})
+            return
+        if content.get("action") == "batch":
+            await self._receive_batch(content.get("data"))
+            return
+        try:
+            await self.dispatch_action(content.get("action"), content.get("data"))
         except GameServiceError as exc:
             await self.send_json({"event": "error", "payload": {"message": str(exc)}})
 
+    async def dispatch_action(self, action, data) -> bool:
+        # Returns False when the action was handed to the room's shard worker rather than run here.
+        spec = get_action(action)
+        self.limiter.check(spec)
+        cleaned = spec.validate(data)
+        started = time.perf_counter()
+        try:
+            if not spec.room_action:
+                await getattr(self, spec.handler)(self.room_code, cleaned)
+                return True
+            gate = get_room_gate()
+            gate.check_rate(self.room_code)
+            if sharding_enabled():
+                # The shard worker runs a room's actions one at a time already.
+                await self._forward_to_shard(action, cleaned)
+                return False
+            async with gate.slot(self.room_code):
+                await self.perform_action(self.room_code, action, cleaned)
+            return True
+        finally:
+            get_metrics_registry().observe(
+                "game_ws_dispatch_duration_seconds", time.perf_counter() - started, action=action
+            )
+
+    async def _receive_batch(self, items):
+        # Several actions in one frame, run in order; the sender gets one batch_result instead of an error
+        # event per failure. State broadcasts still go to the room and coalesce as usual. With sharding on,
+        # room actions are only queued here: they are reported as such, and a shard-side rejection still
+        # arrives later as its own error event.
+        if not isinstance(items, list) or not 0 < len(items) <= settings.WS_BATCH_MAX_ACTIONS:
+            message = f"Batch must be a list of 1 to {settings.WS_BATCH_MAX_ACTIONS} actions."
+            await self.send_json({"event": "error", "payload": {"message": message}})
+            return
+        results = []
+        for item in items:
+            action = item.get("action") if isinstance(item, dict) else None
+            try:
+                if action == "batch":
+                    raise ActionPayloadError("Batches cannot be nested.")
+                ran = await self.dispatch_action(action, item.get("data") if isinstance(item, dict) else None)
+            except GameServiceError as exc:
+                results.append({"action": action, "ok": False, "error": str(exc)})
+            else:
+                result = {"action": action, "ok": True} if ran else {"action": action, "ok": None, "queued": True}
+                results.append(result)
+        await self.send_json({"event": "batch_result", "payload": {"results": results}})
+
     async def game_event(self, event):
-        await self.send_json({"event": event["event"], "payload": event["payload"]})
+        patch = event.get("patch")
+        if event["event"] == "state_updated":
+            current_version = self.state_version
+            version = message_version(event)
+            # A state this socket has already seen, or one older than it, arrived late; sending it would roll
+            # the client back.
+            if current_version is not None and version is not None and version <= current_version:
+                return
+            self.state_version = version
+            # A client that missed a version gets the full snapshot instead of a patch it cannot apply.
+            if self.wants_patches and patch and patch["from_version"] == current_version:
+                await self._send_event_frame(event, "patch")
+                return
+        await self._send_event_frame(event, "full")
 
-    async def _broadcast_state(self):
-        snapshot = await self._get_snapshot()
-        await self.channel_layer.group_send(
-            self.group_name,
+    async def _send_event_frame(self, event: dict, variant: str):
+        frames = event.get("json_frames")
+        if self.codec == "json" and frames is not None:
+            frame = frames[variant]
+        else:
+            frame = get_frame_cache().encode(
+                event.get("frame_id"), variant, self.codec, lambda: frame_content(event, variant)
+            )
+        await self.send_frame(frame)
+
+    async def _forward_to_shard(self, action: str, data: dict):
+        await self.channel_layer.send(
+            shard_for_room(self.room_code),
             {
-                "type": "game.event",
-                "event": "state_updated",
-                "payload": snapshot,
+                "type": "room.action",
+                "room_code": self.room_code,
+                "action": action,
+                "data": data,
+                "reply_channel": self.channel_name,
             },
         )
 
+    async def _sync_state(self, room_code: str, data: dict):
+        snapshot = await get_room_gate().snapshot(room_code, self._get_snapshot)
+        self.state_version = snapshot.get("version")
+        await self.send_json({"event": "state_updated", "payload": snapshot})
+
     async def _send_snapshot(self):
         snapshot = await self._get_snapshot()
+        self.state_version = snapshot.get("version")
         await self.send_json({"event": "state_updated", "payload": snapshot})
 
-    async def _start_round(self, data: dict):
-        question_id = data.get("question_id")
-        await self._start_round_db(question_id)
-        await self._broadcast_state()
-
-    async def _submit_answer(self, data: dict):
-        await self._submit_answer_db(data["player_id"], data["text"])
-        await self._broadcast_state()
+    @database_sync_to_async
+    def _get_snapshot(self) -> dict:
+        return get_room_state(self.room_code)
 
-    async def _reveal_answer(self):
-        await self._reveal_answer_db()
-        await self._broadcast_state()
 
-    async def _submit_guess(self, data: dict):
-        reveal_complete = await self._submit_guess_db(
-            data["player_id"],
-            int(data["answer_id"]),
-            data["guessed_player_id"],
-        )
-        await self._broadcast_state()
-        if reveal_complete:
-            await self.channel_layer.group_send(
-                self.group_name,
-                {
-                    "type": "game.event",
-                    "event": "round_reveal_completed",
-                    "payload": {"room_code": self.room_code},
-                },
-            )
+class RoomShardConsumer(RoomActionsMixin, AsyncConsumer):
+    # Runs under `runworker` and owns every room hashed to its shard. Each room gets its own queue, drained
+    # by one task, so a room's actions still run one at a time (never waiting on each other's row lock)
+    # while a slow action, such as finish_room scoring a big room, only holds up its own room. Each queue
+    # holds at most WS_ROOM_MAX_WAITING actions; beyond that the sender gets "Room is busy".
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._queues: dict[str, asyncio.Queue] = {}
+        self._tasks: set[asyncio.Task] = set()
 
-    async def _finish_room(self):
-        await self._finish_room_db()
-        results = await self._sync_results()
-        await self.channel_layer.group_send(
-            self.group_name,
-            {
-                "type": "game.event",
-                "event": "final_results",
-                "payload": {"pairs": results},
-            },
-        )
-        await self._broadcast_state()
+    async def room_action(self, message):
+        room_code = message["room_code"]
+        queue = self._queues.get(room_code)
+        if queue is None:
+            queue = self._queues[room_code] = asyncio.Queue()
+            self._spawn(self._drain(room_code, queue))
+        elif queue.qsize() >= settings.WS_ROOM_MAX_WAITING:
+            await self._reply_error(message["reply_channel"], "Room is busy; try again.")
+            return
+        queue.put_nowait(message)
 
-    @database_sync_to_async
-    def _get_snapshot(self) -> dict:
-        room = Room.objects.get(code=self.room_code)
-        return get_room_snapshot(room)
+    async def _drain(self, room_code: str, queue: asyncio.Queue):
+        while True:
+            try:
+                message = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                # No await between the empty check and the removal, so no message can slip in unseen.
+                del self._queues[room_code]
+                return
+            await self._run_action(room_code, message)
 
-    @database_sync_to_async
-    def _start_round_db(self, question_id):
-        start_round(self.room_code, question_id=question_id)
+    async def _run_action(self, room_code: str, message: dict):
+        try:
+            spec = get_action(message["action"])
+            await self.perform_action(room_code, spec.name, spec.validate(message.get("data")))
+        except GameServiceError as exc:
+            await self._reply_error(message["reply_channel"], str(exc))
+        except Exception:
+            logger.exception("Room action %s failed for %s", message["action"], room_code)
+            await self._reply_error(message["reply_channel"], "Action failed.")
 
-    @database_sync_to_async
-    def _submit_answer_db(self, player_id: str, text: str):
-        submit_answer(self.room_code, player_id=player_id, text=text)
+    def _spawn(self, coroutine) -> None:
+        task = asyncio.create_task(coroutine)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
 
-    @database_sync_to_async
-    def _reveal_answer_db(self):
-        reveal_random_answer(self.room_code)
+    async def _broadcast_state(self, room_code: str, message: dict | None):
+        # Waiting out the coalescing window here would hold up the room's next queued action.
+        self._spawn(super()._broadcast_state(room_code, message))
 
-    @database_sync_to_async
-    def _submit_guess_db(self, player_id: str, answer_id: int, guessed_player_id: str) -> bool:
-        _, _, _, reveal_complete = submit_guess(
-            room_code=self.room_code,
-            player_id=player_id,
-            answer_id=answer_id,
-            guessed_player_id=guessed_player_id,
+    async def _reply_error(self, reply_channel: str, text: str):
+        await self.channel_layer.send(
+            reply_channel,
+            {"type": "game.event", "event": "error", "payload": {"message": text}},
         )
-        return reveal_complete
-
-    @database_sync_to_async
-    def _finish_room_db(self):
-        calculate_sync_results(self.room_code)
-
-    @database_sync_to_async
-    def _sync_results(self):
-        room = Room.objects.get(code=self.room_code)
-        results = SyncResult.objects.filter(room=room).order_by("-sync_percentage")
-        return SyncResultSerializer(results, many=True).data
@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import threading
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+from apps.ai.services.batching import EmbeddingBatcher
+from apps.ai.services.cache import cached_batch_encode_text
+
+from .metrics import embedding_timer
+from .models import Answer, Room
+
+_batcher: EmbeddingBatcher | None = None
+_batcher_lock = threading.Lock()
+
+
+def _store_answer_embeddings(items) -> None:
+    try:
+        with transaction.atomic():
+            for answer_id, text, vector in items:
+                # Skip answers that were edited after they were queued; the newer text is queued too.
+                Answer.objects.filter(id=answer_id, normalized_text=text).update(embedding_vector=vector)
+    finally:
+        close_old_connections()
+
+
+def get_answer_batcher() -> EmbeddingBatcher:
+    global _batcher
+    if _batcher is None:
+        with _batcher_lock:
+            if _batcher is None:
+                _batcher = EmbeddingBatcher(
+                    _store_answer_embeddings,
+                    window_seconds=settings.EMBEDDING_BATCH_WINDOW_MS / 1000,
+                    max_batch_size=settings.EMBEDDING_BATCH_SIZE,
+                    encoder=cached_batch_encode_text,
+                )
+    return _batcher
+
+
+def queue_answer_embedding(answer: Answer) -> None:
+    answer_id, text = answer.id, answer.normalized_text
+    transaction.on_commit(lambda: get_answer_batcher().submit(answer_id, text))
+
+
+def ensure_room_embeddings(room: Room) -> int:
+    pending = list(
+        Answer.objects.filter(room=room, embedding_vector__isnull=True).values_list("id", "normalized_text")
+    )
+    if not pending:
+        return 0
+    with embedding_timer():
+        vectors = cached_batch_encode_text([text for _, text in pending])
+    Answer.objects.bulk_update(
+        [Answer(id=answer_id, embedding_vector=vector) for (answer_id, _), vector in zip(pending, vectors)],
+        ["embedding_vector"],
+    )
+    return len(pending)
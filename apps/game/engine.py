@@ -1,18 +1,175 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+
 from asgiref.sync import async_to_sync
 from channels.layers import get_channel_layer
+from django.conf import settings
+
+from .state import state_event
+from .wire import message_version, new_frame_id, with_json_frames
+
+logger = logging.getLogger(__name__)
 
 
 def room_group_name(room_code: str) -> str:
     return f"room_{room_code.upper()}"
 
 
+def merge_state_messages(older: dict, newer: dict) -> dict:
+    # Publishes from the background broadcaster, the consumer loop and other workers can arrive out of order;
+    # a lower version never replaces the pending one.
+    if message_version(newer) < message_version(older):
+        return older
+    merged = dict(newer)
+    merged["frame_id"] = new_frame_id()
+    old_patch, new_patch = older.get("patch"), newer.get("patch")
+    if old_patch and new_patch and old_patch["version"] == new_patch["from_version"]:
+        merged["patch"] = {
+            "from_version": old_patch["from_version"],
+            "version": new_patch["version"],
+            "ops": [*old_patch["ops"], *new_patch["ops"]],
+        }
+    else:
+        merged.pop("patch", None)
+    return merged
+
+
+class BroadcastCoalescer:
+    # The first state update in a window waits out the window and then sends whatever is latest;
+    # updates arriving meanwhile only replace the pending message.
+    def __init__(self, window_seconds: float) -> None:
+        self.window_seconds = window_seconds
+        self._pending: dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    async def send_state(self, channel_layer, group: str, message: dict) -> None:
+        if self.window_seconds <= 0:
+            await channel_layer.group_send(group, with_json_frames(message))
+            return
+        with self._lock:
+            previous = self._pending.get(group)
+            self._pending[group] = message if previous is None else merge_state_messages(previous, message)
+        if previous is not None:
+            return
+        await asyncio.sleep(self.window_seconds)
+        await self.flush(channel_layer, group)
+
+    async def send_immediate(self, channel_layer, group: str, message: dict) -> None:
+        await self.flush(channel_layer, group)
+        await channel_layer.group_send(group, with_json_frames(message))
+
+    async def flush(self, channel_layer, group: str) -> None:
+        with self._lock:
+            message = self._pending.pop(group, None)
+        if message is not None:
+            await channel_layer.group_send(group, with_json_frames(message))
+
+
+_coalescer: BroadcastCoalescer | None = None
+
+
+def get_coalescer() -> BroadcastCoalescer:
+    global _coalescer
+    if _coalescer is None:
+        _coalescer = BroadcastCoalescer(settings.BROADCAST_COALESCE_WINDOW_MS / 1000)
+    return _coalescer
+
+
+def reset_coalescer() -> None:
+    global _coalescer
+    _coalescer = None
+
+
+def reset_on_setting_change(setting: str, **kwargs) -> None:
+    if setting == "BROADCAST_COALESCE_WINDOW_MS":
+        reset_coalescer()
+
+
+class BackgroundBroadcaster:
+    # Runs channel-layer publishes on a private event loop so request threads never wait on Redis.
+    def __init__(self) -> None:
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._lock = threading.Lock()
+        self._stats = {"published": 0, "failed": 0, "pending": 0}
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="room-broadcaster", daemon=True).start()
+                self._loop = loop
+            return self._loop
+
+    def submit(self, func, *args) -> None:
+        loop = self._ensure_loop()
+        with self._lock:
+            self._stats["pending"] += 1
+        future = asyncio.run_coroutine_threadsafe(func(*args), loop)
+        future.add_done_callback(self._finished)
+
+    def run_inline(self, func, *args) -> None:
+        with self._lock:
+            self._stats["pending"] += 1
+        try:
+            async_to_sync(func)(*args)
+        except Exception as exc:
+            self._record(exc)
+        else:
+            self._record(None)
+
+    def _finished(self, future) -> None:
+        if future.cancelled():
+            self._record(asyncio.CancelledError())
+        else:
+            self._record(future.exception())
+
+    def _record(self, exc: BaseException | None) -> None:
+        with self._lock:
+            self._stats["pending"] -= 1
+            self._stats["failed" if exc is not None else "published"] += 1
+        if exc is not None:
+            logger.error("Room broadcast failed", exc_info=exc)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._stats)
+
+
+_broadcaster = BackgroundBroadcaster()
+
+
+def broadcast_stats() -> dict:
+    return _broadcaster.stats()
+
+
+def _publish(func, *args) -> None:
+    if settings.BROADCAST_MODE == "inline":
+        _broadcaster.run_inline(func, *args)
+    else:
+        _broadcaster.submit(func, *args)
+
+
 def broadcast_room_event(room_code: str, event: str, payload: dict) -> None:
-    channel_layer = get_channel_layer()
-    async_to_sync(channel_layer.group_send)(
+    _publish(
+        get_coalescer().send_immediate,
+        get_channel_layer(),
         room_group_name(room_code),
         {
             "type": "game.event",
             "event": event,
             "payload": payload,
+            "frame_id": new_frame_id(),
         },
     )
+
+
+def broadcast_room_state(room, snapshot: dict, payload: dict | None = None) -> None:
+    # Built before publishing: a request that commits first but gets here after a newer one finds the newer
+    # state cached and publishes nothing.
+    message = state_event(room.id, snapshot, payload)
+    if message is None:
+        return
+    _publish(get_coalescer().send_state, get_channel_layer(), room_group_name(room.code), message)
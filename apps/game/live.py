@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+import uuid
+from collections import defaultdict
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import Q
+
+from .models import Player
+
+logger = logging.getLogger(__name__)
+
+
+def _player_key(value) -> str | None:
+    try:
+        return str(uuid.UUID(str(value)))
+    except (TypeError, ValueError):
+        return None
+
+
+class PresenceWriter:
+    def __init__(self, interval_seconds: float = 0.5) -> None:
+        self.interval_seconds = interval_seconds
+        self._pending: dict[str, tuple[str, bool]] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def mark(self, player_id: str, room_code: str, connected: bool) -> None:
+        # player_id comes straight from the query string; one bad id must not fail the whole batch.
+        key = _player_key(player_id)
+        if key is None:
+            return
+        with self._lock:
+            self._pending[key] = (room_code.upper(), connected)
+        self._ensure_started()
+        self._wake.set()
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="presence-writer", daemon=True)
+                self._thread.start()
+
+    def flush(self) -> int:
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        for connected in (True, False):
+            # Scoped to the room the socket joined, so a client cannot flip presence for other rooms' players.
+            by_room = defaultdict(list)
+            for player_id, (room_code, state) in pending.items():
+                if state is connected:
+                    by_room[room_code].append(player_id)
+            if by_room:
+                match = reduce(or_, (Q(room__code=code, id__in=ids) for code, ids in by_room.items()))
+                Player.objects.filter(match).update(is_connected=connected)
+        return len(pending)
+
+    def _run(self) -> None:
+        while True:
+            self._wake.wait()
+            self._wake.clear()
+            # Connect/disconnect bursts (a room reconnecting after a blip) collapse into one update per state.
+            time.sleep(self.interval_seconds)
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Presence flush failed")
+            finally:
+                close_old_connections()
+
+
+_presence_writer: PresenceWriter | None = None
+_presence_lock = threading.Lock()
+
+
+def get_presence_writer() -> PresenceWriter:
+    global _presence_writer
+    if _presence_writer is None:
+        with _presence_lock:
+            if _presence_writer is None:
+                _presence_writer = PresenceWriter(settings.PRESENCE_FLUSH_MS / 1000)
+    return _presence_writer
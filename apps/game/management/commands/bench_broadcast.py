@@ -0,0 +1,100 @@
+import time
+import uuid
+
+import msgpack
+from asgiref.sync import async_to_sync
+from django.core.management.base import BaseCommand
+
+from apps.game.consumers import GameConsumer
+from apps.game.wire import new_frame_id, with_json_frames
+
+
+class SinkConsumer(GameConsumer):
+    def __init__(self):
+        super().__init__()
+        self.room_code = "BENCH1"
+        self.codec = "json"
+        self.wants_patches = False
+        self.state_version = None
+        self.bytes_sent = 0
+
+    async def send(self, text_data=None, bytes_data=None, close=False):
+        self.bytes_sent += len(text_data or bytes_data)
+
+
+def snapshot(players: int, version: int) -> dict:
+    return {
+        "room_code": "BENCH1",
+        "status": "REVEAL",
+        "round": 3,
+        "max_rounds": 5,
+        "version": version,
+        "question": "What is your chaotic comfort food combo?",
+        "question_type": "FUNNY",
+        "revealed_answer_id": 42,
+        "revealed_answer_text": "Pazham pori with beef curry, no regrets",
+        "players": [
+            {"id": str(uuid.uuid4()), "name": f"Player {index}", "score": index * 10, "is_host": index == 0}
+            for index in range(players)
+        ],
+    }
+
+
+class Command(BaseCommand):
+    help = "Measure CPU per room broadcast: per-socket encoding, the FrameCache, and one pre-encoded frame."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--players", type=int, default=12)
+        parser.add_argument("--sockets", type=int, default=12)
+        parser.add_argument("--broadcasts", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        sockets = [SinkConsumer() for _ in range(options["sockets"])]
+        snapshots = [snapshot(options["players"], version) for version in range(options["broadcasts"])]
+
+        def events(frame_ids: bool) -> list[dict]:
+            # Fresh frame ids per run, so one case never hits frames another case left in the FrameCache.
+            return [
+                {"type": "game.event", "event": "state_updated", "payload": payload}
+                | ({"frame_id": new_frame_id()} if frame_ids else {})
+                for payload in snapshots
+            ]
+
+        async def per_socket(batch):
+            for event in batch:
+                for socket in sockets:
+                    await socket.game_event(event)
+
+        async def serialize_once(batch):
+            for event in batch:
+                framed = with_json_frames(event)
+                for socket in sockets:
+                    await socket.game_event(framed)
+
+        cases = (
+            # No frame id: every socket encodes the event it was handed.
+            ("per-socket encode", per_socket, False, lambda event: event),
+            # Frame id, no pre-encoded text: the first socket encodes, the rest hit the per-process FrameCache.
+            ("frame cache", per_socket, True, lambda event: event),
+            ("serialize once", serialize_once, True, with_json_frames),
+        )
+        results = {}
+        for label, run, frame_ids, publish in cases:
+            batch = events(frame_ids)
+            for socket in sockets:
+                socket.bytes_sent = 0
+                socket.state_version = None
+            started = time.process_time()
+            async_to_sync(run)(batch)
+            elapsed = time.process_time() - started
+            results[label] = elapsed / len(batch)
+            sent = sum(socket.bytes_sent for socket in sockets)
+            # Size of what each broadcast puts on the channel layer, msgpack-packed as channels_redis does.
+            published = sum(len(msgpack.packb(publish(event), use_bin_type=True)) for event in batch) / len(batch)
+            self.stdout.write(
+                f"{label}: {results[label] * 1e6:.1f} us CPU/broadcast, {published:.0f} bytes/channel message, "
+                f"{sent} bytes sent"
+            )
+        after = results["serialize once"]
+        self.stdout.write(f"speedup vs frame cache: {results['frame cache'] / after:.2f}x")
+        self.stdout.write(f"speedup vs per-socket encode: {results['per-socket encode'] / after:.2f}x")
@@ -0,0 +1,89 @@
+import asyncio
+import json
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+
+from apps.game.benchmark import BenchmarkConfig, BenchmarkError, GameBenchmark, compare_results
+
+
+class Command(BaseCommand):
+    help = "Simulate concurrent rooms through the full game lifecycle and report per-action latency."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rooms", type=int, default=4)
+        parser.add_argument("--players", type=int, default=6)
+        parser.add_argument("--rounds", type=int, default=1)
+        parser.add_argument("--transport", choices=["rest", "ws"], default="rest")
+        parser.add_argument("--seed", type=int, default=7)
+        parser.add_argument(
+            "--coalesce-ms",
+            type=int,
+            default=settings.BROADCAST_COALESCE_WINDOW_MS,
+            help="Broadcast coalescing window to run with.",
+        )
+        parser.add_argument("--output", help="Write the results JSON to this path.")
+        parser.add_argument("--compare", help="Baseline results JSON to compare against.")
+
+    def handle(self, *args, **options):
+        config = BenchmarkConfig(
+            rooms=options["rooms"],
+            players=options["players"],
+            rounds=options["rounds"],
+            transport=options["transport"],
+            seed=options["seed"],
+        )
+        baseline = None
+        if options["compare"]:
+            baseline = json.loads(Path(options["compare"]).read_text())
+
+        # Runs against a throwaway test database, an in-memory channel layer and the hash embedder,
+        # so the numbers are reproducible offline and no real rooms are touched.
+        setup_test_environment()
+        if connection.vendor == "sqlite":
+            # A file database lets the embedding and broadcast threads wait on locks instead of failing
+            # the way a shared-cache in-memory database does.
+            connection.settings_dict["TEST"]["NAME"] = str(Path(tempfile.mkdtemp()) / "bench.sqlite3")
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            with override_settings(
+                CHANNEL_LAYERS={"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}},
+                BROADCAST_MODE="inline",
+                BROADCAST_COALESCE_WINDOW_MS=options["coalesce_ms"],
+                EMBEDDING_BACKEND="hash",
+                # Clients here fire every action as soon as the last one is acknowledged; the limits are sized
+                # for people and would only measure the throttle.
+                WS_RATE_LIMITS_ENABLED=False,
+            ):
+                caches["room_state"].clear()
+                results = asyncio.run(GameBenchmark(config).run())
+        except BenchmarkError as exc:
+            raise CommandError(str(exc)) from exc
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        for action, stats in results["actions"].items():
+            self.stdout.write(
+                f"{action:<16} n={stats['count']:<5} p50={stats['p50_ms']:>8.2f}ms p95={stats['p95_ms']:>8.2f}ms "
+                f"p99={stats['p99_ms']:>8.2f}ms queries={stats['queries_mean']:>6.2f} errors={stats['errors']}"
+            )
+        totals = results["totals"]
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{totals['actions']} actions in {totals['wall_seconds']}s "
+                f"({totals['actions_per_second']} actions/s, {totals['errors']} errors)"
+            )
+        )
+
+        if baseline is not None:
+            for line in compare_results(baseline, results):
+                self.stdout.write(line)
+        if options["output"]:
+            Path(options["output"]).write_text(json.dumps(results, indent=2))
+            self.stdout.write(f"Results written to {options['output']}")
@@ -0,0 +1,60 @@
+import time
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.game.archive import RoomArchiveWriter, reap_rooms
+
+
+class Command(BaseCommand):
+    help = "Archive finished or idle rooms past their TTL to JSONL.gz and delete them in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--finished-hours", type=int, default=settings.ROOM_ARCHIVE_AFTER_HOURS)
+        parser.add_argument("--idle-hours", type=int, default=settings.ROOM_IDLE_TTL_HOURS)
+        parser.add_argument("--batch-size", type=int, default=100)
+        parser.add_argument("--max-rooms", type=int, help="Stop after this many rooms.")
+        parser.add_argument("--pause-ms", type=int, default=50, help="Sleep between batches to yield to live traffic.")
+        parser.add_argument("--output-dir", default=str(settings.ROOM_ARCHIVE_DIR))
+        parser.add_argument("--no-archive", action="store_true", help="Delete without writing an archive.")
+        parser.add_argument("--every", type=int, help="Keep running, reaping every N seconds.")
+
+    def handle(self, *args, **options):
+        while True:
+            self._reap_once(options)
+            if not options["every"]:
+                return
+            time.sleep(options["every"])
+
+    def _reap_once(self, options):
+        now = timezone.now()
+        writer = None
+        if not options["no_archive"]:
+            writer = RoomArchiveWriter(Path(options["output_dir"]) / now.strftime("rooms-%Y%m%dT%H%M%S.jsonl.gz"))
+
+        def progress(stats):
+            summary = stats.summary()
+            self.stdout.write(
+                f"batch {summary['batches']}: {summary['rooms']} rooms, "
+                f"{summary['rooms_per_second']} rooms/s, {summary['bytes_written']} bytes"
+            )
+
+        try:
+            stats = reap_rooms(
+                finished_before=now - timedelta(hours=options["finished_hours"]),
+                idle_before=now - timedelta(hours=options["idle_hours"]),
+                writer=writer,
+                batch_size=options["batch_size"],
+                max_rooms=options["max_rooms"],
+                pause_seconds=options["pause_ms"] / 1000,
+                progress=progress,
+            )
+        finally:
+            if writer is not None:
+                writer.close()
+        if writer is not None and not stats.rooms:
+            writer.path.unlink(missing_ok=True)
+        self.stdout.write(f"Reaped {stats.summary()}")
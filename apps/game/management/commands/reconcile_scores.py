@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.game.models import Room, RoomStatus
+from apps.game.services import reconcile_room_scores
+
+
+class Command(BaseCommand):
+    help = "Check incrementally maintained player scores against a full recompute."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--room", help="Only reconcile the room with this code.")
+        parser.add_argument(
+            "--include-finished",
+            action="store_true",
+            help="Also check rooms that have already finished.",
+        )
+        parser.add_argument("--fix", action="store_true", help="Overwrite drifted scores.")
+
+    def handle(self, *args, **options):
+        rooms = Room.objects.order_by("id")
+        if options["room"]:
+            rooms = rooms.filter(code=options["room"].upper())
+            if not rooms.exists():
+                raise CommandError(f"Room {options['room']} not found.")
+        elif not options["include_finished"]:
+            rooms = rooms.exclude(status=RoomStatus.FINISHED)
+
+        checked = 0
+        drifted = 0
+        for room in rooms.iterator():
+            checked += 1
+            for player, recorded, expected in reconcile_room_scores(room, fix=options["fix"]):
+                drifted += 1
+                self.stdout.write(f"{room.code} {player.name}: ledger={recorded} expected={expected}")
+
+        style = self.style.SUCCESS if drifted == 0 else self.style.WARNING
+        self.stdout.write(style(f"Checked {checked} rooms, {drifted} drifted scores."))
@@ -0,0 +1,20 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.game.codes import release_room_codes, room_code_pool_stats
+
+
+class Command(BaseCommand):
+    help = "Release the codes of long-finished rooms so new rooms can reuse them."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--older-than-hours", type=int, default=settings.ROOM_CODE_RETENTION_HOURS)
+        parser.add_argument("--limit", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(hours=options["older_than_hours"])
+        released = release_room_codes(cutoff, limit=options["limit"])
+        self.stdout.write(f"Released {len(released)} room codes; pool {room_code_pool_stats()}")
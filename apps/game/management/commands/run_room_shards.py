@@ -0,0 +1,43 @@
+import os
+import socket
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.game.sharding import assign_shards, sharding_enabled
+
+
+class Command(BaseCommand):
+    help = "Run channel workers for the room shards this worker owns."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--worker",
+            default=os.getenv("ROOM_SHARD_WORKER") or socket.gethostname(),
+            help="This worker's name; must appear in --workers.",
+        )
+        parser.add_argument(
+            "--workers",
+            default=",".join(settings.ROOM_SHARD_WORKERS),
+            help="Comma-separated names of every shard worker in the deployment.",
+        )
+        parser.add_argument("--dry-run", action="store_true", help="Print the assignment and exit.")
+
+    def handle(self, *args, **options):
+        if not sharding_enabled():
+            raise CommandError("Set ROOM_SHARDS to enable room affinity.")
+        workers = [worker.strip() for worker in options["workers"].split(",") if worker.strip()]
+        if options["worker"] not in workers:
+            raise CommandError(f"Worker {options['worker']!r} is not in the worker list {workers}.")
+
+        assignment = assign_shards(workers)
+        for worker, shards in assignment.items():
+            marker = "*" if worker == options["worker"] else " "
+            self.stdout.write(f"{marker} {worker}: {', '.join(shards) or '-'}")
+        shards = assignment[options["worker"]]
+        if options["dry_run"]:
+            return
+        if not shards:
+            raise CommandError(f"Worker {options['worker']!r} owns no shards; add shards or remove the worker.")
+        call_command("runworker", *shards)
@@ -0,0 +1,182 @@
+from __future__ import annotations
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from functools import wraps
+
+from django.conf import settings
+from django.db import connection
+
+DURATION_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+class Histogram:
+    def __init__(self, buckets: tuple[float, ...] = DURATION_BUCKETS) -> None:
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+
+@dataclass
+class ActionTrace:
+    queries: int = 0
+    db_seconds: float = 0.0
+    lock_wait_seconds: float = 0.0
+    embedding_seconds: float = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        # Installed as a Django execute wrapper for the duration of one action.
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.queries += 1
+            self.db_seconds += elapsed
+            # Row locks (Postgres) and the SQLite write lock taken by BEGIN IMMEDIATE are where actions queue.
+            if sql.startswith("BEGIN") or "FOR UPDATE" in sql:
+                self.lock_wait_seconds += elapsed
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._histograms: dict[tuple[str, tuple], Histogram] = {}
+        self._counters: dict[tuple[str, tuple], float] = {}
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        with self._lock:
+            self._observe((name, tuple(sorted(labels.items()))), value)
+
+    def increment(self, name: str, amount: float = 1.0, **labels) -> None:
+        with self._lock:
+            self._increment((name, tuple(sorted(labels.items()))), amount)
+
+    def record_action(self, action: str, seconds: float, trace: ActionTrace, failed: bool) -> None:
+        labels = (("action", action),)
+        with self._lock:
+            self._observe(("game_action_duration_seconds", labels), seconds)
+            self._increment(("game_action_db_queries_total", labels), trace.queries)
+            self._increment(("game_action_db_seconds_total", labels), trace.db_seconds)
+            self._increment(("game_action_lock_wait_seconds_total", labels), trace.lock_wait_seconds)
+            self._increment(("game_action_embedding_seconds_total", labels), trace.embedding_seconds)
+            self._increment(("game_action_errors_total", labels), int(failed))
+
+    def _observe(self, key: tuple[str, tuple], value: float) -> None:
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            histogram = self._histograms[key] = Histogram()
+        histogram.observe(value)
+
+    def _increment(self, key: tuple[str, tuple], amount: float) -> None:
+        self._counters[key] = self._counters.get(key, 0.0) + amount
+
+    def clear(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+    def snapshot(self) -> tuple[dict, dict]:
+        with self._lock:
+            histograms = {
+                key: (histogram.buckets, list(histogram.counts), histogram.total, histogram.count)
+                for key, histogram in self._histograms.items()
+            }
+            return histograms, dict(self._counters)
+
+
+_registry = MetricsRegistry()
+_current_trace: ContextVar[ActionTrace | None] = ContextVar("game_action_trace", default=None)
+
+
+def get_metrics_registry() -> MetricsRegistry:
+    return _registry
+
+
+def instrumented(action: str):
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            # Nested service calls are part of the outer action's numbers.
+            if not settings.METRICS_ENABLED or _current_trace.get() is not None:
+                return func(*args, **kwargs)
+            trace = ActionTrace()
+            token = _current_trace.set(trace)
+            started = time.perf_counter()
+            failed = True
+            try:
+                with connection.execute_wrapper(trace):
+                    result = func(*args, **kwargs)
+                failed = False
+                return result
+            finally:
+                _current_trace.reset(token)
+                _registry.record_action(action, time.perf_counter() - started, trace, failed)
+
+        return wrapper
+
+    return decorator
+
+
+@contextmanager
+def embedding_timer():
+    trace = _current_trace.get()
+    if trace is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace.embedding_seconds += time.perf_counter() - started
+
+
+def _format_labels(labels: tuple, extra: tuple = ()) -> str:
+    items = [*labels, *extra]
+    if not items:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in items) + "}"
+
+
+def _gauge_lines(prefix: str, values: dict) -> list[str]:
+    lines = []
+    for key, value in sorted(values.items()):
+        if isinstance(value, bool):
+            value = int(value)
+        if isinstance(value, (int, float)):
+            lines.append(f"{prefix}_{key} {value}")
+    return lines
+
+
+def render_metrics(gauges: dict[str, dict] | None = None) -> str:
+    histograms, counters = _registry.snapshot()
+    lines: list[str] = []
+    for name in sorted({name for name, _ in histograms}):
+        lines.append(f"# TYPE {name} histogram")
+        for (metric, labels), (buckets, counts, total, count) in sorted(histograms.items()):
+            if metric != name:
+                continue
+            cumulative = 0
+            for bound, bucket_count in zip((*buckets, "+Inf"), counts):
+                cumulative += bucket_count
+                lines.append(f"{name}_bucket{_format_labels(labels, (('le', bound),))} {cumulative}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {total}")
+            lines.append(f"{name}_count{_format_labels(labels)} {count}")
+    for name in sorted({name for name, _ in counters}):
+        lines.append(f"# TYPE {name} counter")
+        for (metric, labels), value in sorted(counters.items()):
+            if metric == name:
+                lines.append(f"{name}{_format_labels(labels)} {value}")
+    for prefix, values in (gauges or {}).items():
+        lines.extend(_gauge_lines(prefix, values))
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,17 @@
+import apps.ai.fields
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('game', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='answer',
+            name='embedding_blob',
+            field=apps.ai.fields.VectorField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,44 @@
+from django.db import migrations
+
+BATCH_SIZE = 500
+
+
+def json_to_blob(apps, schema_editor):
+    Answer = apps.get_model('game', 'Answer')
+    pending = []
+    rows = Answer.objects.filter(embedding_vector__isnull=False).only('id', 'embedding_vector')
+    for answer in rows.iterator(chunk_size=BATCH_SIZE):
+        if not answer.embedding_vector:
+            continue
+        answer.embedding_blob = answer.embedding_vector
+        pending.append(answer)
+        if len(pending) >= BATCH_SIZE:
+            Answer.objects.bulk_update(pending, ['embedding_blob'])
+            pending = []
+    if pending:
+        Answer.objects.bulk_update(pending, ['embedding_blob'])
+
+
+def blob_to_json(apps, schema_editor):
+    Answer = apps.get_model('game', 'Answer')
+    pending = []
+    rows = Answer.objects.filter(embedding_blob__isnull=False).only('id', 'embedding_blob')
+    for answer in rows.iterator(chunk_size=BATCH_SIZE):
+        answer.embedding_vector = answer.embedding_blob.astype(float).tolist()
+        pending.append(answer)
+        if len(pending) >= BATCH_SIZE:
+            Answer.objects.bulk_update(pending, ['embedding_vector'])
+            pending = []
+    if pending:
+        Answer.objects.bulk_update(pending, ['embedding_vector'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('game', '0002_answer_embedding_blob'),
+    ]
+
+    operations = [
+        migrations.RunPython(json_to_blob, blob_to_json),
+    ]
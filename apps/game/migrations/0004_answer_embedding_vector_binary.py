@@ -0,0 +1,20 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('game', '0003_copy_embeddings_to_blob'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='answer',
+            name='embedding_vector',
+        ),
+        migrations.RenameField(
+            model_name='answer',
+            old_name='embedding_blob',
+            new_name='embedding_vector',
+        ),
+    ]
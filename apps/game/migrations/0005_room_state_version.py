@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('game', '0004_answer_embedding_vector_binary'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='room',
+            name='state_version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('game', '0005_room_state_version'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='room',
+            name='code',
+            field=models.CharField(blank=True, max_length=6, null=True, unique=True),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('game', '0006_room_code_releasable'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='answer',
+            index=models.Index(condition=models.Q(('embedding_vector__isnull', True)), fields=['room'], name='game_answer_pending_embed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='guess',
+            index=models.Index(fields=['guesser', 'is_correct'], name='game_guess_guesser_correct_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='guess',
+            index=models.Index(condition=models.Q(('is_correct', True)), fields=['answer'], name='game_guess_correct_answer_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='player',
+            index=models.Index(fields=['room', 'joined_at'], name='game_player_room_joined_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='room',
+            index=models.Index(fields=['status', 'updated_at'], name='game_room_status_updated_idx'),
+        ),
+    ]
@@ -4,6 +4,8 @@ import uuid
 
 from django.db import models
 
+from apps.ai.fields import VectorField
+
 
 class RoomStatus(models.TextChoices):
     LOBBY = "LOBBY", "Lobby"
@@ -20,7 +22,8 @@ class QuestionType(models.TextChoices):
 
 
 class Room(models.Model):
-    code = models.CharField(max_length=6, unique=True)
+    # Cleared when a finished room's code is released for reuse.
+    code = models.CharField(max_length=6, unique=True, null=True, blank=True)
     host = models.ForeignKey(
         "Player",
         on_delete=models.SET_NULL,
@@ -45,9 +48,16 @@ class Room(models.Model):
         on_delete=models.SET_NULL,
         related_name="revealed_in_rooms",
     )
+    state_version = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Reaper and code release: finished or idle rooms by age.
+            models.Index(fields=["status", "updated_at"], name="game_room_status_updated_idx"),
+        ]
+
     def __str__(self) -> str:
         return f"Room {self.code}"
 
@@ -66,6 +76,9 @@ class Player(models.Model):
         constraints = [
             models.UniqueConstraint(fields=["room", "name"], name="uq_player_name_in_room"),
         ]
+        indexes = [
+            models.Index(fields=["room", "joined_at"], name="game_player_room_joined_idx"),
+        ]
 
     def __str__(self) -> str:
         return f"{self.name} ({self.room.code})"
@@ -110,7 +123,7 @@ class Answer(models.Model):
     player = models.ForeignKey(Player, on_delete=models.CASCADE, related_name="answers")
     text = models.TextField()
     normalized_text = models.TextField(blank=True)
-    embedding_vector = models.JSONField(null=True, blank=True)
+    embedding_vector = VectorField(null=True, blank=True)
     submitted_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
@@ -120,6 +133,14 @@ class Answer(models.Model):
                 name="uq_single_answer_per_round_player",
             )
         ]
+        indexes = [
+            # Answers still waiting for the embedding batcher; stays tiny once rooms are scored.
+            models.Index(
+                fields=["room"],
+                condition=models.Q(embedding_vector__isnull=True),
+                name="game_answer_pending_embed_idx",
+            ),
+        ]
 
     def __str__(self) -> str:
         return f"Answer {self.player.name} {self.round}"
@@ -141,6 +162,14 @@ class Guess(models.Model):
                 name="uq_single_guess_per_answer_player",
             )
         ]
+        indexes = [
+            models.Index(fields=["guesser", "is_correct"], name="game_guess_guesser_correct_idx"),
+            models.Index(
+                fields=["answer"],
+                condition=models.Q(is_correct=True),
+                name="game_guess_correct_answer_idx",
+            ),
+        ]
 
     def __str__(self) -> str:
         return f"{self.guesser.name} -> {self.guessed_player.name} ({self.is_correct})"
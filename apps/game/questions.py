@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import random
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+
+from .models import Question, Room, Round
+
+
+class QuestionSelector:
+    # Active question ids are held per type so a round draws its question without sorting the table.
+    # Saves and deletes invalidate through signals; the TTL covers other processes and queryset updates.
+    def __init__(self, ttl_seconds: float = 300.0, weights: dict[str, float] | None = None) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.weights = weights or {}
+        self._by_type: dict[str, list[int]] | None = None
+        self._all: list[int] = []
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+        self._stats = {"loads": 0, "invalidations": 0}
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._by_type = None
+            self._stats["invalidations"] += 1
+
+    def _pools(self) -> tuple[dict[str, list[int]], list[int]]:
+        with self._lock:
+            if self._by_type is None or time.monotonic() - self._loaded_at > self.ttl_seconds:
+                by_type: dict[str, list[int]] = defaultdict(list)
+                for question_id, question_type in Question.objects.filter(is_active=True).values_list("id", "type"):
+                    by_type[question_type].append(question_id)
+                self._by_type = dict(by_type)
+                self._all = [question_id for ids in self._by_type.values() for question_id in ids]
+                self._loaded_at = time.monotonic()
+                self._stats["loads"] += 1
+            return self._by_type, self._all
+
+    def sample(self, count: int, weighted: bool = True, rng: random.Random | None = None) -> list[int]:
+        rng = rng or random
+        by_type, everything = self._pools()
+        ids = everything
+        if weighted:
+            types = [qtype for qtype, pool in by_type.items() if pool and self.weights.get(qtype, 1.0) > 0]
+            if not types:
+                return []
+            qtype = rng.choices(types, weights=[self.weights.get(qtype, 1.0) for qtype in types])[0]
+            ids = by_type[qtype]
+        return rng.sample(ids, min(count, len(ids)))
+
+    def stats(self) -> dict:
+        with self._lock:
+            cached = self._by_type or {}
+            return {**self._stats, "cached": sum(len(ids) for ids in cached.values())}
+
+
+_selector: QuestionSelector | None = None
+_selector_lock = threading.Lock()
+
+
+def get_question_selector() -> QuestionSelector:
+    global _selector
+    if _selector is None:
+        with _selector_lock:
+            if _selector is None:
+                _selector = QuestionSelector(settings.QUESTION_CACHE_TTL_SECONDS, settings.QUESTION_TYPE_WEIGHTS)
+    return _selector
+
+
+def invalidate_question_cache(*args, **kwargs) -> None:
+    get_question_selector().invalidate()
+
+
+def _first_available(candidates: list[int], exclude=None) -> Question | None:
+    if not candidates:
+        return None
+    queryset = Question.objects.filter(id__in=candidates, is_active=True)
+    if exclude is not None:
+        queryset = queryset.exclude(id__in=exclude)
+    found = {question.id: question for question in queryset}
+    return next((found[question_id] for question_id in candidates if question_id in found), None)
+
+
+def choose_question(room: Room) -> Question | None:
+    selector = get_question_selector()
+    # At most current_round questions were used here, so one more candidate than that always leaves an
+    # unplayed one when the pool is big enough; the whole draw is a single query.
+    count = room.current_round + 1
+    used = Round.objects.filter(room_id=room.id).values("question_id")
+    question = _first_available(selector.sample(count), used)
+    if question is None:
+        question = _first_available(selector.sample(count, weighted=False), used)
+    if question is None:
+        # The room has seen every question, or the cache is stale: reload and allow a repeat.
+        selector.invalidate()
+        question = _first_available(selector.sample(count, weighted=False))
+    return question
@@ -1,7 +1,10 @@
 from django.urls import re_path
 
-from .consumers import GameConsumer
+from .consumers import GameConsumer, RoomShardConsumer
+from .sharding import shard_names
 
 websocket_urlpatterns = [
     re_path(r"^ws/game/(?P<room_code>[A-Z0-9]{6})/$", GameConsumer.as_asgi()),
 ]
+
+channel_routes = {name: RoomShardConsumer.as_asgi() for name in shard_names()}
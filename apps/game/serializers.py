@@ -68,6 +68,8 @@ class RoomSerializer(serializers.ModelSerializer):
 
 
 class SyncResultSerializer(serializers.ModelSerializer):
+    player_one = serializers.UUIDField(source="player_one_id", read_only=True)
+    player_two = serializers.UUIDField(source="player_two_id", read_only=True)
     player_one_name = serializers.CharField(source="player_one.name")
     player_two_name = serializers.CharField(source="player_two.name")
 
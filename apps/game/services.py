@@ -1,23 +1,53 @@
 from __future__ import annotations
 
 import random
-import string
-from itertools import combinations
 
+from django.conf import settings
 from django.db import IntegrityError, transaction
-from django.db.models import Q, Sum
+from django.db.models import Count, F, Sum
 
-from apps.ai.services.embedding import cosine_similarity, encode_text
+from apps.ai.services.cache import cached_encode_text
 from apps.ai.services.text import normalize_text
 
+from .codes import get_room_code_pool
+from .embeddings import ensure_room_embeddings, queue_answer_embedding
+from .metrics import embedding_timer, instrumented
 from .models import Answer, Guess, Player, Question, Room, RoomStatus, Round, SyncResult
-from .scoring import SyncComponents, calculate_sync_percentage, score_author_caught, score_guess
+from .questions import choose_question, invalidate_question_cache
+from .scoring import score_author_caught, score_guess
+from .sync_engine import build_sync_results
 
 
 class GameServiceError(Exception):
     pass
 
 
+ROOM_CODE_ATTEMPTS = 8
+
+
+# Which room states each action may run in, and the error players see otherwise. A finished room takes no more
+# actions; start_round may also restart a question that is still open.
+ACTION_RULES = {
+    "start_round": (
+        {RoomStatus.LOBBY, RoomStatus.QUESTION, RoomStatus.REVEAL, RoomStatus.SCOREBOARD},
+        "Room has finished.",
+    ),
+    "submit_answer": ({RoomStatus.QUESTION}, "Room is not accepting answers."),
+    "reveal_answer": ({RoomStatus.QUESTION, RoomStatus.REVEAL}, "Room cannot reveal answers right now."),
+    "submit_guess": ({RoomStatus.REVEAL}, "Room is not in reveal phase."),
+    "finish_room": (
+        {RoomStatus.LOBBY, RoomStatus.QUESTION, RoomStatus.REVEAL, RoomStatus.SCOREBOARD},
+        "Room has finished.",
+    ),
+}
+
+
+def ensure_action_allowed(status: str, action: str) -> None:
+    allowed, message = ACTION_RULES[action]
+    if status not in allowed:
+        raise GameServiceError("Room has finished." if status == RoomStatus.FINISHED else message)
+
+
 DEFAULT_QUESTIONS = [
     ("What is one tiny thing that instantly makes your day better?", "LIFE"),
     ("What is your most dramatic overreaction this month?", "FUNNY"),
@@ -33,49 +63,76 @@ def seed_default_questions() -> None:
     Question.objects.bulk_create(
         [Question(text=text, type=qtype) for text, qtype in DEFAULT_QUESTIONS]
     )
+    # bulk_create sends no post_save.
+    invalidate_question_cache()
+
 
+def generate_room_code() -> str:
+    code = get_room_code_pool().take()
+    if code is None:
+        raise GameServiceError("Unable to generate unique room code.")
+    return code
 
-def generate_room_code(length: int = 6) -> str:
-    alphabet = string.ascii_uppercase + string.digits
-    for _ in range(40):
-        code = "".join(random.choices(alphabet, k=length))
-        if not Room.objects.filter(code=code).exists():
-            return code
+
+def _create_room() -> Room:
+    pool = get_room_code_pool()
+    for _ in range(ROOM_CODE_ATTEMPTS):
+        code = generate_room_code()
+        try:
+            with transaction.atomic():
+                return Room.objects.create(code=code, status=RoomStatus.LOBBY)
+        except IntegrityError:
+            pool.record_collision()
     raise GameServiceError("Unable to generate unique room code.")
 
 
+@instrumented("create_room_with_host")
 @transaction.atomic
 def create_room_with_host(name: str) -> tuple[Room, Player]:
-    code = generate_room_code()
-    room = Room.objects.create(code=code, status=RoomStatus.LOBBY)
+    room = _create_room()
     host = Player.objects.create(room=room, name=name.strip(), is_host=True)
     room.host = host
-    room.save(update_fields=["host", "updated_at"])
+    _save_room(room, "host")
     seed_default_questions()
     return room, host
 
 
+@instrumented("join_room")
 @transaction.atomic
 def join_room(code: str, name: str) -> tuple[Room, Player]:
-    normalized_code = code.strip().upper()
-    try:
-        room = Room.objects.get(code=normalized_code)
-    except Room.DoesNotExist as exc:
-        raise GameServiceError("Room not found.") from exc
+    room = get_room(code.strip().upper(), for_update=True)
 
     if room.status == RoomStatus.FINISHED:
         raise GameServiceError("This room has already finished.")
 
-    if room.players.count() >= 12:
+    if room.players.count() >= settings.ROOM_MAX_PLAYERS:
         raise GameServiceError("Room is full.")
 
     try:
         player = Player.objects.create(room=room, name=name.strip())
     except IntegrityError as exc:
         raise GameServiceError("Name already taken in this room.") from exc
+    _save_room(room)
     return room, player
 
 
+def get_room(room_code: str, for_update: bool = False) -> Room:
+    # The snapshot reads the active question and revealed answer, so they ride along on the room query.
+    rooms = Room.objects.select_related("active_question", "revealed_answer")
+    if for_update:
+        rooms = rooms.select_for_update(of=("self",))
+    try:
+        return rooms.get(code=room_code)
+    except Room.DoesNotExist as exc:
+        raise GameServiceError("Room not found.") from exc
+
+
+def _save_room(room: Room, *fields: str) -> None:
+    # Callers hold the room row lock, so every committed mutation gets its own state version.
+    room.state_version += 1
+    room.save(update_fields=[*fields, "state_version", "updated_at"])
+
+
 def _resolve_round(room: Room) -> Round:
     try:
         return Round.objects.get(room=room, number=room.current_round)
@@ -83,13 +140,12 @@ def _resolve_round(room: Room) -> Round:
         raise GameServiceError("No active round found.") from exc
 
 
+@instrumented("start_round")
 @transaction.atomic
 def start_round(room_code: str, question_id: int | None = None) -> tuple[Room, Round]:
-    try:
-        room = Room.objects.select_for_update().get(code=room_code)
-    except Room.DoesNotExist as exc:
-        raise GameServiceError("Room not found.") from exc
+    room = get_room(room_code, for_update=True)
 
+    ensure_action_allowed(room.status, "start_round")
     if room.current_round >= room.max_rounds:
         raise GameServiceError("Maximum rounds reached.")
 
@@ -99,7 +155,7 @@ def start_round(room_code: str, question_id: int | None = None) -> tuple[Room, R
         except Question.DoesNotExist as exc:
             raise GameServiceError("Invalid question.") from exc
     else:
-        question = Question.objects.filter(is_active=True).order_by("?").first()
+        question = choose_question(room)
         if not question:
             raise GameServiceError("No active questions available.")
 
@@ -113,27 +169,16 @@ def start_round(room_code: str, question_id: int | None = None) -> tuple[Room, R
     room.active_question = question
     room.status = RoomStatus.QUESTION
     room.revealed_answer = None
-    room.save(
-        update_fields=[
-            "current_round",
-            "active_question",
-            "status",
-            "revealed_answer",
-            "updated_at",
-        ]
-    )
+    _save_room(room, "current_round", "active_question", "status", "revealed_answer")
     return room, game_round
 
 
+@instrumented("submit_answer")
 @transaction.atomic
 def submit_answer(room_code: str, player_id: str, text: str) -> tuple[Room, Round, Answer]:
-    try:
-        room = Room.objects.select_for_update().get(code=room_code)
-    except Room.DoesNotExist as exc:
-        raise GameServiceError("Room not found.") from exc
+    room = get_room(room_code, for_update=True)
 
-    if room.status != RoomStatus.QUESTION:
-        raise GameServiceError("Room is not accepting answers.")
+    ensure_action_allowed(room.status, "submit_answer")
 
     game_round = _resolve_round(room)
     try:
@@ -142,31 +187,35 @@ def submit_answer(room_code: str, player_id: str, text: str) -> tuple[Room, Roun
         raise GameServiceError("Player not found in room.") from exc
 
     normalized = normalize_text(text)
-    embedding = encode_text(normalized)
+    batched = settings.EMBEDDING_BATCH_ENABLED
+    embedding = None
+    if not batched:
+        with embedding_timer():
+            embedding = cached_encode_text(normalized)
 
     answer, _ = Answer.objects.update_or_create(
         round=game_round,
         player=player,
         defaults={
             "room": room,
-            "question": game_round.question,
+            "question_id": game_round.question_id,
             "text": text.strip(),
             "normalized_text": normalized,
             "embedding_vector": embedding,
         },
     )
+    if batched:
+        queue_answer_embedding(answer)
+    _save_room(room)
     return room, game_round, answer
 
 
+@instrumented("reveal_random_answer")
 @transaction.atomic
 def reveal_random_answer(room_code: str) -> tuple[Room, Round, Answer]:
-    try:
-        room = Room.objects.select_for_update().get(code=room_code)
-    except Room.DoesNotExist as exc:
-        raise GameServiceError("Room not found.") from exc
+    room = get_room(room_code, for_update=True)
 
-    if room.status not in {RoomStatus.QUESTION, RoomStatus.REVEAL}:
-        raise GameServiceError("Room cannot reveal answers right now.")
+    ensure_action_allowed(room.status, "reveal_answer")
 
     game_round = _resolve_round(room)
     answers = list(Answer.objects.filter(round=game_round))
@@ -179,11 +228,12 @@ def reveal_random_answer(room_code: str) -> tuple[Room, Round, Answer]:
 
     room.revealed_answer = revealed
     room.status = RoomStatus.REVEAL
-    room.save(update_fields=["revealed_answer", "status", "updated_at"])
+    _save_room(room, "revealed_answer", "status")
 
     return room, game_round, revealed
 
 
+@instrumented("submit_guess")
 @transaction.atomic
 def submit_guess(
     room_code: str,
@@ -191,13 +241,9 @@ def submit_guess(
     answer_id: int,
     guessed_player_id: str,
 ) -> tuple[Room, Round, Guess, bool]:
-    try:
-        room = Room.objects.select_for_update().get(code=room_code)
-    except Room.DoesNotExist as exc:
-        raise GameServiceError("Room not found.") from exc
+    room = get_room(room_code, for_update=True)
 
-    if room.status != RoomStatus.REVEAL:
-        raise GameServiceError("Room is not in reveal phase.")
+    ensure_action_allowed(room.status, "submit_guess")
 
     game_round = _resolve_round(room)
     try:
@@ -213,123 +259,102 @@ def submit_guess(
     is_correct = answer.player_id == guessed_player.id
     points = score_guess(is_correct)
 
-    guess, _ = Guess.objects.update_or_create(
-        round=game_round,
-        answer=answer,
-        guesser=guesser,
-        defaults={
-            "guessed_player": guessed_player,
-            "is_correct": is_correct,
-            "points_awarded": points,
-        },
+    guess = Guess.objects.filter(round=game_round, answer=answer, guesser=guesser).first()
+    if guess is None:
+        previous_points, previous_caught = 0, False
+        guess = Guess.objects.create(
+            round=game_round,
+            answer=answer,
+            guesser=guesser,
+            guessed_player=guessed_player,
+            is_correct=is_correct,
+            points_awarded=points,
+        )
+    else:
+        previous_points, previous_caught = guess.points_awarded, guess.is_correct
+        guess.guessed_player = guessed_player
+        guess.is_correct = is_correct
+        guess.points_awarded = points
+        guess.save(update_fields=["guessed_player", "is_correct", "points_awarded"])
+
+    apply_guess_score_delta(
+        guesser_id=guesser.id,
+        author_id=answer.player_id,
+        guess_delta=points - previous_points,
+        author_delta=score_author_caught(is_correct) - score_author_caught(previous_caught),
     )
 
-    recalculate_room_scores(room)
-
     expected_guesses = room.players.exclude(id=answer.player_id).count()
     submitted_guesses = Guess.objects.filter(round=game_round, answer=answer).count()
     reveal_complete = submitted_guesses >= expected_guesses
 
     if reveal_complete:
         room.status = RoomStatus.SCOREBOARD
-        room.save(update_fields=["status", "updated_at"])
+    _save_room(room, "status")
 
     return room, game_round, guess, reveal_complete
 
 
-def recalculate_room_scores(room: Room) -> None:
+def apply_guess_score_delta(guesser_id, author_id, guess_delta: int, author_delta: int) -> None:
+    # Only the guesser and the caught author can change score when one guess is written.
+    if guess_delta:
+        Player.objects.filter(id=guesser_id).update(score=F("score") + guess_delta)
+    if author_delta:
+        Player.objects.filter(id=author_id).update(score=F("score") + author_delta)
+
+
+def compute_room_scores(room: Room) -> dict:
     bonus_for_caught = score_author_caught(True)
-    players = list(room.players.all())
-    for player in players:
-        guess_points = (
-            Guess.objects.filter(guesser=player).aggregate(total=Sum("points_awarded"))["total"] or 0
-        )
-        times_caught = Guess.objects.filter(
-            answer__round__room=room,
-            answer__player=player,
-            is_correct=True,
-        ).count()
-        player.score = guess_points + (times_caught * bonus_for_caught)
-        player.save(update_fields=["score"])
-
-
-def player_correct_guess_rate(player: Player) -> float:
-    total = Guess.objects.filter(guesser=player).count()
-    if total == 0:
-        return 0.0
-    correct = Guess.objects.filter(guesser=player, is_correct=True).count()
-    return correct / total
-
-
-def _pair_answer_similarity(room: Room, p1: Player, p2: Player) -> float:
-    round_ids = (
-        Round.objects.filter(room=room).values_list("id", flat=True)
+    scores = {player_id: 0 for player_id in room.players.values_list("id", flat=True)}
+    guess_points = (
+        Guess.objects.filter(guesser__room=room)
+        .values("guesser_id")
+        .annotate(total=Sum("points_awarded"))
     )
-    similarities: list[float] = []
-    for round_id in round_ids:
-        a1 = Answer.objects.filter(round_id=round_id, player=p1).first()
-        a2 = Answer.objects.filter(round_id=round_id, player=p2).first()
-        if not a1 or not a2 or not a1.embedding_vector or not a2.embedding_vector:
-            continue
-        similarities.append(cosine_similarity(a1.embedding_vector, a2.embedding_vector))
-    if not similarities:
-        return 0.0
-    return float(sum(similarities) / len(similarities))
-
-
-def _pair_mutual_selection_rate(room: Room, p1: Player, p2: Player) -> float:
-    pair_guesses = Guess.objects.filter(
-        Q(guesser=p1, guessed_player=p2) | Q(guesser=p2, guessed_player=p1),
-        round__room=room,
+    for row in guess_points:
+        scores[row["guesser_id"]] = row["total"] or 0
+    times_caught = (
+        Guess.objects.filter(answer__round__room=room, is_correct=True)
+        .values("answer__player_id")
+        .annotate(total=Count("id"))
     )
-    opportunities = Guess.objects.filter(
-        Q(guesser=p1) | Q(guesser=p2),
-        round__room=room,
-    ).count()
-    if opportunities == 0:
-        return 0.0
-    return pair_guesses.count() / opportunities
-
-
+    for row in times_caught:
+        player_id = row["answer__player_id"]
+        scores[player_id] = scores.get(player_id, 0) + row["total"] * bonus_for_caught
+    return scores
+
+
+def reconcile_room_scores(room: Room, fix: bool = False) -> list[tuple[Player, int, int]]:
+    expected = compute_room_scores(room)
+    mismatches: list[tuple[Player, int, int]] = []
+    for player in room.players.order_by("joined_at"):
+        expected_score = expected.get(player.id, 0)
+        if player.score != expected_score:
+            mismatches.append((player, player.score, expected_score))
+            if fix:
+                player.score = expected_score
+                player.save(update_fields=["score"])
+    return mismatches
+
+
+@instrumented("calculate_sync_results")
 @transaction.atomic
-def calculate_sync_results(room_code: str) -> list[SyncResult]:
-    try:
-        room = Room.objects.select_for_update().get(code=room_code)
-    except Room.DoesNotExist as exc:
-        raise GameServiceError("Room not found.") from exc
+def calculate_sync_results(room_code: str) -> tuple[Room, list[SyncResult]]:
+    room = get_room(room_code, for_update=True)
 
+    ensure_action_allowed(room.status, "finish_room")
     players = list(room.players.order_by("joined_at"))
     if len(players) < 2:
         raise GameServiceError("Need at least two players to compute sync.")
 
+    ensure_room_embeddings(room)
     SyncResult.objects.filter(room=room).delete()
-    created: list[SyncResult] = []
-    for p1, p2 in combinations(players, 2):
-        answer_similarity = _pair_answer_similarity(room, p1, p2)
-        correct_guess_rate = (player_correct_guess_rate(p1) + player_correct_guess_rate(p2)) / 2
-        mutual_selection_rate = _pair_mutual_selection_rate(room, p1, p2)
-
-        components = SyncComponents(
-            answer_similarity=answer_similarity,
-            correct_guess_rate=correct_guess_rate,
-            mutual_selection_rate=mutual_selection_rate,
-        )
-
-        created.append(
-            SyncResult.objects.create(
-                room=room,
-                player_one=p1,
-                player_two=p2,
-                answer_similarity=answer_similarity,
-                correct_guess_rate=correct_guess_rate,
-                mutual_selection_rate=mutual_selection_rate,
-                sync_percentage=calculate_sync_percentage(components),
-            )
-        )
+    created = SyncResult.objects.bulk_create(build_sync_results(room, players))
 
     room.status = RoomStatus.FINISHED
-    room.save(update_fields=["status", "updated_at"])
-    return created
+    _save_room(room, "status")
+    created.sort(key=lambda result: result.sync_percentage, reverse=True)
+    return room, created
 
 
 def get_leaderboard(room: Room) -> list[dict]:
@@ -346,19 +371,16 @@ def get_leaderboard(room: Room) -> list[dict]:
 
 
 def get_room_snapshot(room: Room) -> dict:
-    current_round = (
-        Round.objects.filter(room=room, number=room.current_round)
-        .select_related("question")
-        .first()
-    )
+    question = room.active_question
     revealed_answer = room.revealed_answer
     return {
         "room_code": room.code,
         "status": room.status,
         "round": room.current_round,
         "max_rounds": room.max_rounds,
-        "question": current_round.question.text if current_round else None,
-        "question_type": current_round.question.type if current_round else None,
+        "version": room.state_version,
+        "question": question.text if question else None,
+        "question_type": question.type if question else None,
         "revealed_answer_id": revealed_answer.id if revealed_answer else None,
         "revealed_answer_text": revealed_answer.text if revealed_answer else None,
         "players": get_leaderboard(room),
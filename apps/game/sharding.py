@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+import hashlib
+from functools import lru_cache
+from typing import Iterable
+
+from django.conf import settings
+
+
+def _weight(node: str, key: str) -> int:
+    return int.from_bytes(hashlib.blake2b(f"{node}\x00{key}".encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def rendezvous_owner(key: str, nodes: Iterable[str]) -> str:
+    # Highest-random-weight hashing: adding or removing a node only moves the keys that node wins or held.
+    return max(nodes, key=lambda node: _weight(node, key))
+
+
+def shard_names(count: int | None = None) -> list[str]:
+    count = settings.ROOM_SHARDS if count is None else count
+    return [f"{settings.ROOM_SHARD_CHANNEL_PREFIX}-{index}" for index in range(count)]
+
+
+def sharding_enabled() -> bool:
+    return settings.ROOM_SHARDS > 0
+
+
+@lru_cache(maxsize=4096)
+def _room_shard(room_code: str, shards: tuple[str, ...]) -> str:
+    return rendezvous_owner(room_code, shards)
+
+
+def shard_for_room(room_code: str) -> str:
+    return _room_shard(room_code.upper(), tuple(shard_names()))
+
+
+def assign_shards(workers: Iterable[str], count: int | None = None) -> dict[str, list[str]]:
+    workers = list(dict.fromkeys(workers))
+    assignment: dict[str, list[str]] = {worker: [] for worker in workers}
+    for shard in shard_names(count):
+        assignment[rendezvous_owner(shard, workers)].append(shard)
+    return assignment
@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+import copy
+import logging
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .services import get_room, get_room_snapshot
+from .wire import new_frame_id
+
+logger = logging.getLogger(__name__)
+
+STATE_LOCK_SECONDS = 5
+STATE_LOCK_ATTEMPTS = 40
+STATE_LOCK_RETRY_SECONDS = 0.005
+
+
+def _state_cache():
+    return caches[settings.ROOM_STATE_CACHE_ALIAS]
+
+
+def _state_key(room_code: str) -> str:
+    return f"room-state:{room_code.upper()}"
+
+
+@contextmanager
+def _write_lock(cache, key: str):
+    # cache.add is atomic on Redis and LocMem, so it serves as a short per-room mutex around the
+    # version compare-and-set; the timeout frees it if a worker dies holding it.
+    lock_key = f"{key}:lock"
+    locked = False
+    for _ in range(STATE_LOCK_ATTEMPTS):
+        if cache.add(lock_key, 1, STATE_LOCK_SECONDS):
+            locked = True
+            break
+        time.sleep(STATE_LOCK_RETRY_SECONDS)
+    try:
+        yield locked
+    finally:
+        if locked:
+            cache.delete(lock_key)
+
+
+def _position(entry: dict) -> tuple[int, int]:
+    # Codes are reused once released, and a new room starts again at a low version. Room ids only grow, so
+    # ordering on (room id, version) lets the new room's state replace the old room's in every process.
+    return entry["room_id"], entry["snapshot"]["version"]
+
+
+def _swap_room_state(room_id: int, snapshot: dict) -> dict | None:
+    # Stores the snapshot unless the cache already holds it or something newer; returns the entry found there.
+    key = _state_key(snapshot["room_code"])
+    entry = {"room_id": room_id, "snapshot": snapshot}
+    try:
+        cache = _state_cache()
+        with _write_lock(cache, key) as locked:
+            previous = cache.get(key)
+            if previous is not None and _position(previous) >= _position(entry):
+                return previous
+            cache.set(key, entry, settings.ROOM_STATE_CACHE_TTL)
+        if not locked:
+            # Written without the lock: make sure a newer snapshot written meanwhile is not left behind ours.
+            current = cache.get(key)
+            if current is not None and _position(current) < _position(entry):
+                cache.set(key, entry, settings.ROOM_STATE_CACHE_TTL)
+    except Exception:
+        logger.exception("Room state cache write failed for %s", snapshot["room_code"])
+        return None
+    return previous
+
+
+def remember_room_state(room_id: int, snapshot: dict) -> dict | None:
+    # The snapshot this one replaced, if it was an older state of the same room.
+    previous = _swap_room_state(room_id, snapshot)
+    if previous is None or previous["room_id"] != room_id or previous["snapshot"]["version"] >= snapshot["version"]:
+        return None
+    return previous["snapshot"]
+
+
+def get_room_state(room_code: str) -> dict:
+    key = _state_key(room_code)
+    try:
+        cached = _state_cache().get(key)
+    except Exception:
+        logger.exception("Room state cache read failed for %s", room_code)
+        cached = None
+    if cached is not None:
+        return cached["snapshot"]
+    room = get_room(room_code)
+    snapshot = get_room_snapshot(room)
+    remember_room_state(room.id, snapshot)
+    return snapshot
+
+
+def _pointer(path: str, key) -> str:
+    return f"{path}/{str(key).replace('~', '~0').replace('/', '~1')}"
+
+
+def diff_state(old, new, path: str = "") -> list[dict]:
+    # RFC 6902 operations; equal-length lists are diffed element-wise, anything else is replaced.
+    if isinstance(old, dict) and isinstance(new, dict):
+        ops = [{"op": "remove", "path": _pointer(path, key)} for key in old if key not in new]
+        for key, value in new.items():
+            if key not in old:
+                ops.append({"op": "add", "path": _pointer(path, key), "value": value})
+            else:
+                ops.extend(diff_state(old[key], value, _pointer(path, key)))
+        return ops
+    if isinstance(old, list) and isinstance(new, list) and len(old) == len(new):
+        ops = []
+        for index, (before, after) in enumerate(zip(old, new)):
+            ops.extend(diff_state(before, after, _pointer(path, index)))
+        return ops
+    if old == new and type(old) is type(new):
+        return []
+    return [{"op": "replace", "path": path, "value": new}]
+
+
+def apply_state_patch(state, ops: list[dict]):
+    state = copy.deepcopy(state)
+    for op in ops:
+        if op["path"] == "":
+            state = copy.deepcopy(op["value"])
+            continue
+        *parents, last = [
+            part.replace("~1", "/").replace("~0", "~") for part in op["path"].split("/")[1:]
+        ]
+        target = state
+        for part in parents:
+            target = target[int(part)] if isinstance(target, list) else target[part]
+        if isinstance(target, list):
+            last = int(last)
+        if op["op"] == "remove":
+            del target[last]
+        else:
+            target[last] = copy.deepcopy(op["value"])
+    return state
+
+
+def state_event(room_id: int, snapshot: dict, payload: dict | None = None) -> dict | None:
+    # None when the cache already holds a newer state: publishing this one would roll clients back.
+    previous = _swap_room_state(room_id, snapshot)
+    position = (room_id, snapshot["version"])
+    if previous is not None and _position(previous) > position:
+        return None
+    message = {
+        "type": "game.event",
+        "event": "state_updated",
+        "payload": snapshot if payload is None else payload,
+        "frame_id": new_frame_id(),
+    }
+    if previous is not None and _position(previous) == (room_id, snapshot["version"] - 1):
+        message["patch"] = {
+            "from_version": previous["snapshot"]["version"],
+            "version": snapshot["version"],
+            "ops": diff_state(previous["snapshot"], snapshot),
+        }
+    return message
@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import numpy as np
+from django.db.models import Count
+
+from .models import Answer, Guess, Player, Room, Round, SyncResult
+from .scoring import SyncComponents, calculate_sync_percentage
+
+
+@dataclass
+class RoomSyncData:
+    players: list[Player]
+    embeddings: np.ndarray  # players x rounds x dim, float32
+    has_embedding: np.ndarray  # players x rounds, bool
+    selections: np.ndarray  # selections[i, j] = guesses by player i naming player j
+    guesses_made: np.ndarray  # total guesses per player
+    correct_guesses: np.ndarray  # correct guesses per player
+
+
+def load_room_sync_data(room: Room, players: list[Player]) -> RoomSyncData:
+    index = {player.id: i for i, player in enumerate(players)}
+    round_index = {
+        round_id: r
+        for r, round_id in enumerate(
+            Round.objects.filter(room=room).order_by("number").values_list("id", flat=True)
+        )
+    }
+
+    vectors: list[tuple[int, int, np.ndarray]] = []
+    dim = 0
+    for player_id, round_id, vector in Answer.objects.filter(round__room=room).values_list(
+        "player_id", "round_id", "embedding_vector"
+    ):
+        if player_id not in index or round_id not in round_index or vector is None or not len(vector):
+            continue
+        vectors.append((index[player_id], round_index[round_id], vector))
+        dim = dim or len(vector)
+
+    embeddings = np.zeros((len(players), len(round_index), dim), dtype=np.float32)
+    has_embedding = np.zeros((len(players), len(round_index)), dtype=bool)
+    for i, r, vector in vectors:
+        embeddings[i, r] = vector
+        has_embedding[i, r] = True
+
+    size = len(players)
+    selections = np.zeros((size, size), dtype=np.int64)
+    guesses_made = np.zeros(size, dtype=np.int64)
+    correct_guesses = np.zeros(size, dtype=np.int64)
+    guess_counts = (
+        Guess.objects.filter(round__room=room)
+        .values("guesser_id", "guessed_player_id", "is_correct")
+        .annotate(total=Count("id"))
+    )
+    for row in guess_counts:
+        i = index.get(row["guesser_id"])
+        if i is None:
+            continue
+        guesses_made[i] += row["total"]
+        if row["is_correct"]:
+            correct_guesses[i] += row["total"]
+        j = index.get(row["guessed_player_id"])
+        if j is not None:
+            selections[i, j] += row["total"]
+
+    return RoomSyncData(
+        players=players,
+        embeddings=embeddings,
+        has_embedding=has_embedding,
+        selections=selections,
+        guesses_made=guesses_made,
+        correct_guesses=correct_guesses,
+    )
+
+
+def pairwise_answer_similarity(data: RoomSyncData) -> np.ndarray:
+    size = len(data.players)
+    if data.embeddings.size == 0:
+        return np.zeros((size, size), dtype=np.float64)
+
+    per_round = data.embeddings.transpose(1, 0, 2)  # rounds x players x dim
+    dots = np.matmul(per_round, per_round.transpose(0, 2, 1))
+    norms = np.linalg.norm(per_round, axis=2)
+    denoms = norms[:, :, None] * norms[:, None, :]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cosines = np.where(denoms == 0, np.float32(0.0), dots / denoms)
+    cosines = np.clip(cosines, 0.0, 1.0)
+
+    present = data.has_embedding.T  # rounds x players
+    mask = present[:, :, None] & present[:, None, :]
+    counts = mask.sum(axis=0)
+    totals = np.where(mask, cosines.astype(np.float64), 0.0).sum(axis=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(counts == 0, 0.0, totals / np.maximum(counts, 1))
+
+
+def pairwise_correct_guess_rate(data: RoomSyncData) -> np.ndarray:
+    made = data.guesses_made.astype(np.float64)
+    rates = np.divide(
+        data.correct_guesses,
+        made,
+        out=np.zeros_like(made),
+        where=made > 0,
+    )
+    return (rates[:, None] + rates[None, :]) / 2
+
+
+def pairwise_mutual_selection_rate(data: RoomSyncData) -> np.ndarray:
+    pair_guesses = (data.selections + data.selections.T).astype(np.float64)
+    made = data.guesses_made.astype(np.float64)
+    opportunities = made[:, None] + made[None, :]
+    return np.divide(
+        pair_guesses,
+        opportunities,
+        out=np.zeros_like(pair_guesses),
+        where=opportunities > 0,
+    )
+
+
+def build_sync_results(room: Room, players: list[Player]) -> list[SyncResult]:
+    data = load_room_sync_data(room, players)
+    similarity = pairwise_answer_similarity(data)
+    guess_rate = pairwise_correct_guess_rate(data)
+    mutual = pairwise_mutual_selection_rate(data)
+
+    results: list[SyncResult] = []
+    rows, cols = np.triu_indices(len(players), k=1)
+    for i, j in zip(rows.tolist(), cols.tolist()):
+        components = SyncComponents(
+            answer_similarity=float(similarity[i, j]),
+            correct_guess_rate=float(guess_rate[i, j]),
+            mutual_selection_rate=float(mutual[i, j]),
+        )
+        results.append(
+            SyncResult(
+                room=room,
+                player_one=players[i],
+                player_two=players[j],
+                answer_similarity=components.answer_similarity,
+                correct_guess_rate=components.correct_guess_rate,
+                mutual_selection_rate=components.mutual_selection_rate,
+                sync_percentage=calculate_sync_percentage(components),
+            )
+        )
+    return results
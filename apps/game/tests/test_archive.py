@@ -0,0 +1,68 @@
+import gzip
+import json
+import tempfile
+from datetime import timedelta
+from pathlib import Path
+
+from django.test import TestCase
+from django.utils import timezone
+
+from apps.game.archive import RoomArchiveWriter, reap_rooms
+from apps.game.models import Answer, Guess, Player, Room, RoomStatus, Round, SyncResult
+from apps.game.services import (
+    calculate_sync_results,
+    create_room_with_host,
+    join_room,
+    reveal_random_answer,
+    start_round,
+    submit_answer,
+    submit_guess,
+)
+
+
+class RoomReaperTests(TestCase):
+    def play_room(self) -> Room:
+        room, host = create_room_with_host("Anu")
+        _, guest = join_room(room.code, "Biju")
+        start_round(room.code)
+        submit_answer(room.code, str(host.id), "pizza")
+        submit_answer(room.code, str(guest.id), "pwoli")
+        _, _, answer = reveal_random_answer(room.code)
+        guesser = guest if answer.player_id == host.id else host
+        submit_guess(room.code, str(guesser.id), answer.id, str(answer.player_id))
+        calculate_sync_results(room.code)
+        return room
+
+    def age(self, room: Room, hours: int) -> None:
+        Room.objects.filter(id=room.id).update(updated_at=timezone.now() - timedelta(hours=hours))
+
+    def test_archives_then_deletes_expired_rooms_in_batches(self):
+        finished = [self.play_room() for _ in range(3)]
+        for room in finished:
+            self.age(room, 100)
+        idle, _ = create_room_with_host("Idle")
+        self.age(idle, 20)
+        fresh = self.play_room()
+        path = Path(tempfile.mkdtemp()) / "rooms.jsonl.gz"
+        writer = RoomArchiveWriter(path)
+        now = timezone.now()
+
+        stats = reap_rooms(now - timedelta(hours=72), now - timedelta(hours=12), writer, batch_size=2)
+        writer.close()
+
+        self.assertEqual(stats.rooms, 4)
+        self.assertEqual(stats.batches, 2)
+        self.assertEqual(list(Room.objects.values_list("id", flat=True)), [fresh.id])
+        for model in (Player, Round, Answer, Guess, SyncResult):
+            self.assertFalse(model.objects.exclude(**{"round__room" if model is Guess else "room": fresh}).exists())
+
+        with gzip.open(path, "rt", encoding="utf-8") as archive:
+            content = archive.read()
+        records = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual(sorted(record["id"] for record in records), sorted([room.id for room in finished] + [idle.id]))
+        record = next(record for record in records if record["id"] == finished[0].id)
+        self.assertEqual(record["status"], RoomStatus.FINISHED)
+        self.assertEqual(len(record["answers"]["rows"]), 2)
+        self.assertEqual(len(record["sync_results"]["rows"]), 1)
+        self.assertIn("embedding_vector", record["answers"]["columns"])
+        self.assertEqual(stats.bytes_written, len(content))
@@ -0,0 +1,79 @@
+import asyncio
+from unittest import IsolatedAsyncioTestCase
+
+from django.conf import settings
+
+from apps.game.actions import ActionRateLimited
+from apps.game.backpressure import RoomBusy, RoomGate, get_room_gate
+
+
+class RoomGateTests(IsolatedAsyncioTestCase):
+    async def test_slots_bound_in_flight_work_and_reject_past_the_queue(self):
+        gate = RoomGate(rate=100, burst=100, max_inflight=2, max_waiting=1)
+        release = asyncio.Event()
+        peak = 0
+
+        async def action():
+            nonlocal peak
+            async with gate.slot("ROOM01"):
+                peak = max(peak, gate.stats()["active"])
+                await release.wait()
+
+        running = [asyncio.create_task(action()) for _ in range(3)]
+        await asyncio.sleep(0)
+        with self.assertRaises(RoomBusy):
+            async with gate.slot("ROOM01"):
+                pass
+        async with gate.slot("OTHER1"):
+            pass
+
+        release.set()
+        await asyncio.gather(*running)
+        self.assertEqual(peak, 2)
+        self.assertEqual((gate.stats()["busy"], gate.stats()["active"]), (1, 0))
+
+    async def test_concurrent_snapshot_requests_share_one_load(self):
+        gate = RoomGate(rate=100, burst=100, max_inflight=2, max_waiting=8)
+        loads = 0
+
+        async def load():
+            nonlocal loads
+            loads += 1
+            await asyncio.sleep(0.01)
+            return {"version": loads}
+
+        results = await asyncio.gather(*(gate.snapshot("ROOM01", load) for _ in range(5)))
+
+        self.assertEqual(loads, 1)
+        self.assertEqual(results, [{"version": 1}] * 5)
+        self.assertEqual(gate.stats()["merged_snapshots"], 4)
+        self.assertEqual(await gate.snapshot("ROOM01", load), {"version": 2})
+
+    async def test_room_rate_is_shared_across_connections(self):
+        gate = RoomGate(rate=0.001, burst=3, max_inflight=2, max_waiting=8)
+
+        for _ in range(3):
+            gate.check_rate("ROOM01")
+        with self.assertRaises(ActionRateLimited):
+            gate.check_rate("ROOM01")
+        gate.check_rate("OTHER1")
+
+    async def test_default_gate_admits_a_full_room_round(self):
+        gate = get_room_gate()
+        players = settings.ROOM_MAX_PLAYERS
+        release = asyncio.Event()
+
+        async def action():
+            async with gate.slot("ROOM01"):
+                await release.wait()
+
+        # Every player answers at once, then every answer is revealed and guessed by everyone else.
+        answers = [asyncio.create_task(action()) for _ in range(players)]
+        await asyncio.sleep(0)
+        release.set()
+        await asyncio.gather(*answers)
+        for _ in range(1 + players + players + players * (players - 1) + 1):
+            gate.check_rate("ROOM01")
+
+        self.assertEqual(gate.stats()["busy"], 0)
+        self.assertEqual(gate.stats()["limited"], 0)
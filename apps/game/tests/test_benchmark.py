@@ -0,0 +1,36 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.test import TransactionTestCase, override_settings
+
+from apps.game.benchmark import BenchmarkConfig, GameBenchmark, compare_results
+
+
+@override_settings(
+    CHANNEL_LAYERS={"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}},
+    BROADCAST_MODE="inline",
+    BROADCAST_COALESCE_WINDOW_MS=0,
+    EMBEDDING_BATCH_ENABLED=False,
+)
+class GameBenchmarkSmokeTests(TransactionTestCase):
+    def setUp(self):
+        caches["room_state"].clear()
+
+    async def test_rest_and_websocket_lifecycles_complete(self):
+        for transport in ("rest", "ws"):
+            with self.subTest(transport=transport):
+                results = await GameBenchmark(BenchmarkConfig(rooms=2, players=3, transport=transport)).run()
+
+                self.assertEqual(results["totals"]["errors"], 0)
+                actions = results["actions"]
+                self.assertEqual(actions["submit_answer"]["count"], 6)
+                self.assertEqual(actions["submit_guess"]["count"], 4)
+                self.assertEqual(actions["finish_room"]["count"], 2)
+                self.assertGreater(actions["submit_guess"]["queries_mean"], 0)
+                self.assertIn("submit_guess: p95", "\n".join(compare_results(results, results)))
+
+    async def test_full_room_completes_over_the_websocket(self):
+        config = BenchmarkConfig(rooms=1, players=settings.ROOM_MAX_PLAYERS, rounds=5, transport="ws")
+        results = await GameBenchmark(config).run()
+
+        self.assertEqual(results["totals"]["errors"], 0)
+        self.assertEqual(results["actions"]["submit_answer"]["count"], 5 * settings.ROOM_MAX_PLAYERS)
@@ -0,0 +1,43 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.test import TestCase
+from django.utils import timezone
+
+from apps.game.codes import RoomCodePool, release_room_codes
+from apps.game.models import Room, RoomStatus
+from apps.game.services import create_room_with_host
+
+
+class RoomCodePoolTests(TestCase):
+    def test_refill_checks_a_whole_batch_in_one_query(self):
+        Room.objects.create(code="AAAAAA")
+        pool = RoomCodePool(batch_size=64, low_water=8)
+
+        with mock.patch("apps.game.codes.random_code", side_effect=["AAAAAA", *(f"B{i:05d}" for i in range(63))]):
+            with self.assertNumQueries(1):
+                fresh = pool.refill()
+
+        self.assertEqual(fresh, 63)
+        self.assertNotIn("AAAAAA", {pool.take() for _ in range(63)})
+        self.assertEqual(pool.stats()["collisions"], 1)
+
+    def test_create_room_retries_when_a_code_was_taken_concurrently(self):
+        Room.objects.create(code="TAKEN1")
+        codes = iter(["TAKEN1", "FRESH1"])
+
+        with mock.patch("apps.game.services.generate_room_code", side_effect=lambda: next(codes)):
+            room, _ = create_room_with_host("Anu")
+
+        self.assertEqual(room.code, "FRESH1")
+
+    def test_releases_only_the_codes_of_long_finished_rooms(self):
+        old = Room.objects.create(code="OLD001", status=RoomStatus.FINISHED)
+        Room.objects.create(code="LIVE01", status=RoomStatus.LOBBY)
+        Room.objects.filter(id=old.id).update(updated_at=timezone.now() - timedelta(days=2))
+
+        released = release_room_codes(timezone.now() - timedelta(days=1))
+
+        self.assertEqual(released, ["OLD001"])
+        self.assertIsNone(Room.objects.get(id=old.id).code)
+        self.assertEqual(Room.objects.filter(code__isnull=False).count(), 1)
@@ -0,0 +1,187 @@
+import msgpack
+from channels.db import database_sync_to_async
+from channels.layers import get_channel_layer
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.core.cache import caches
+from django.test import TransactionTestCase, override_settings
+
+from apps.game.engine import room_group_name
+from apps.game.routing import websocket_urlpatterns
+from apps.game.services import create_room_with_host, join_room
+from apps.game.state import apply_state_patch
+from apps.game.wire import MSGPACK_SUBPROTOCOL, decode_msgpack, get_frame_cache
+
+IN_MEMORY_CHANNEL_LAYERS = {"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}}
+
+
+@override_settings(CHANNEL_LAYERS=IN_MEMORY_CHANNEL_LAYERS)
+class GameConsumerTests(TransactionTestCase):
+    def setUp(self):
+        caches["room_state"].clear()
+        self.room, self.host = create_room_with_host("Anu")
+        _, self.guest = join_room(self.room.code, "Biju")
+
+    async def _connect(self, query: str = ""):
+        path = f"/ws/game/{self.room.code}/" + (f"?{query}" if query else "")
+        communicator = WebsocketCommunicator(URLRouter(websocket_urlpatterns), path)
+        connected, _ = await communicator.connect()
+        self.assertTrue(connected)
+        self.assertEqual((await communicator.receive_json_from())["event"], "connected")
+        snapshot = await communicator.receive_json_from()
+        self.assertEqual(snapshot["event"], "state_updated")
+        return communicator, snapshot["payload"]
+
+    async def test_delta_clients_receive_patches(self):
+        full_client, _ = await self._connect()
+        delta_client, state = await self._connect("delta=1")
+
+        await full_client.send_json_to({"action": "start_round", "data": {}})
+        full = await full_client.receive_json_from()
+        patch = await delta_client.receive_json_from()
+
+        self.assertEqual(full["event"], "state_updated")
+        self.assertEqual(patch["event"], "state_patch")
+        self.assertEqual(patch["payload"]["from_version"], state["version"])
+        self.assertEqual(apply_state_patch(state, patch["payload"]["ops"]), full["payload"])
+
+        await full_client.disconnect()
+        await delta_client.disconnect()
+
+    async def test_delta_client_behind_gets_full_snapshot(self):
+        delta_client, _ = await self._connect("delta=1")
+        await database_sync_to_async(join_room)(self.room.code, "Chinnu")
+
+        await delta_client.send_json_to({"action": "start_round", "data": {}})
+        message = await delta_client.receive_json_from()
+
+        self.assertEqual(message["event"], "state_updated")
+        self.assertEqual([player["name"] for player in message["payload"]["players"]][-1], "Chinnu")
+        await delta_client.disconnect()
+
+    async def _receive_until(self, communicator, event: str):
+        while True:
+            message = await communicator.receive_json_from()
+            if message["event"] == event:
+                return message
+
+    async def test_malformed_payload_gets_an_error_not_a_disconnect(self):
+        client, _ = await self._connect()
+
+        await client.send_json_to({"action": "submit_answer", "data": {"player_id": "nope", "text": "hi"}})
+        error = await client.receive_json_from()
+        await client.send_json_to({"action": "sync_state"})
+        snapshot = await client.receive_json_from()
+
+        self.assertEqual(error["payload"]["message"], "Invalid submit_answer payload: player_id.")
+        self.assertEqual(snapshot["event"], "state_updated")
+        await client.disconnect()
+
+    async def test_undecodable_frames_get_an_error_not_a_disconnect(self):
+        client, _ = await self._connect()
+
+        await client.send_to(text_data="{not json")
+        first = await client.receive_json_from()
+        await client.send_to(bytes_data=b"\x81\xa6action")
+        second = await client.receive_json_from()
+        await client.send_json_to({"action": "sync_state"})
+        snapshot = await client.receive_json_from()
+
+        self.assertEqual(first, {"event": "error", "payload": {"message": "Malformed message."}})
+        self.assertEqual(second, first)
+        self.assertEqual(snapshot["event"], "state_updated")
+        await client.disconnect()
+
+    async def test_state_older_than_the_client_is_not_sent(self):
+        client, state = await self._connect()
+        layer = get_channel_layer()
+        group = room_group_name(self.room.code)
+
+        for version in (state["version"] + 2, state["version"] + 1):
+            payload = {**state, "version": version}
+            await layer.group_send(group, {"type": "game.event", "event": "state_updated", "payload": payload})
+        newer = await client.receive_json_from()
+
+        self.assertEqual(newer["payload"]["version"], state["version"] + 2)
+        self.assertTrue(await client.receive_nothing())
+        await client.disconnect()
+
+    async def test_batch_runs_actions_in_order_with_one_reply(self):
+        client, _ = await self._connect()
+
+        await client.send_json_to(
+            {
+                "action": "batch",
+                "data": [
+                    {"action": "start_round", "data": {}},
+                    {"action": "submit_answer", "data": {"player_id": str(self.host.id), "text": "pwoli"}},
+                    {"action": "submit_guess", "data": {}},
+                    {"action": "dance"},
+                ],
+            }
+        )
+        reply = await self._receive_until(client, "batch_result")
+
+        self.assertEqual(
+            [(result["action"], result["ok"]) for result in reply["payload"]["results"]],
+            [("start_round", True), ("submit_answer", True), ("submit_guess", False), ("dance", False)],
+        )
+        await client.disconnect()
+
+    @override_settings(WS_ACTION_RATE_LIMITS={"reveal_answer": (0.001, 2)})
+    async def test_actions_over_the_rate_limit_are_rejected(self):
+        client, _ = await self._connect()
+
+        await client.send_json_to(
+            {"action": "batch", "data": [{"action": "reveal_answer"} for _ in range(3)]}
+        )
+        reply = await self._receive_until(client, "batch_result")
+
+        self.assertEqual(
+            [result.get("error") for result in reply["payload"]["results"]],
+            [
+                "Room cannot reveal answers right now.",
+                "Room cannot reveal answers right now.",
+                "Too many reveal_answer actions; slow down.",
+            ],
+        )
+        await client.disconnect()
+
+    async def test_msgpack_subprotocol_gets_compact_frames_encoded_once(self):
+        path = f"/ws/game/{self.room.code}/"
+        clients = [
+            WebsocketCommunicator(URLRouter(websocket_urlpatterns), path, subprotocols=[MSGPACK_SUBPROTOCOL])
+            for _ in range(2)
+        ]
+        for client in clients:
+            connected, subprotocol = await client.connect()
+            self.assertEqual(subprotocol, MSGPACK_SUBPROTOCOL)
+            connected_event = decode_msgpack(await client.receive_from())
+            self.assertEqual(connected_event, {"e": "connected", "p": {"rc": self.room.code}})
+            await client.receive_from()
+        json_client, _ = await self._connect()
+        encoded = get_frame_cache().stats()["encoded"]
+
+        await clients[0].send_to(bytes_data=msgpack.packb({"action": "start_round"}))
+        frames = [await client.receive_from() for client in clients]
+        text = await json_client.receive_from()
+
+        self.assertEqual(frames[0], frames[1])
+        # The JSON frame came pre-encoded through the channel layer; only the msgpack one was encoded here.
+        self.assertEqual(get_frame_cache().stats()["encoded"] - encoded, 1)
+        state = decode_msgpack(frames[0])
+        self.assertEqual(state["e"], "state_updated")
+        self.assertEqual(state["p"]["s"], "QUESTION")
+        self.assertEqual([player["n"] for player in state["p"]["pl"]], ["Anu", "Biju"])
+        self.assertLess(len(frames[0]), len(text) * 0.8)
+
+        encoded = get_frame_cache().stats()["encoded"]
+        await clients[0].send_to(bytes_data=msgpack.packb({"action": "finish_room"}))
+        events = [[decode_msgpack(await client.receive_from()) for _ in range(2)] for client in clients]
+
+        self.assertEqual(events[0], events[1])
+        self.assertEqual([event["e"] for event in events[0]], ["final_results", "state_updated"])
+        # One msgpack encode per event, shared by both sockets.
+        self.assertEqual(get_frame_cache().stats()["encoded"] - encoded, 2)
+        for client in [*clients, json_client]:
+            await client.disconnect()
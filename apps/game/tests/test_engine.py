@@ -0,0 +1,122 @@
+import asyncio
+import json
+import threading
+import time
+
+from django.test import SimpleTestCase
+
+from apps.game.engine import BackgroundBroadcaster, BroadcastCoalescer
+
+
+class RecordingLayer:
+    def __init__(self):
+        self.sent = []
+
+    async def group_send(self, group, message):
+        self.sent.append((group, message))
+
+
+def state(version, ops=None):
+    message = {"type": "game.event", "event": "state_updated", "payload": {"version": version}}
+    if ops is not None:
+        message["patch"] = {"from_version": version - 1, "version": version, "ops": ops}
+    return message
+
+
+class BroadcastCoalescerTests(SimpleTestCase):
+    async def test_burst_sends_latest_state_once_with_merged_patch(self):
+        layer = RecordingLayer()
+        coalescer = BroadcastCoalescer(0.02)
+        await asyncio.gather(
+            coalescer.send_state(layer, "room_A", state(2, ["a"])),
+            coalescer.send_state(layer, "room_A", state(3, ["b"])),
+            coalescer.send_state(layer, "room_A", state(4, ["c"])),
+        )
+
+        self.assertEqual(len(layer.sent), 1)
+        message = layer.sent[0][1]
+        self.assertEqual((message["version"], message["patch"]), (4, {"from_version": 1, "version": 4}))
+        # Frames are encoded once, after merging, for every receiving socket to forward as-is; the payload
+        # only travels inside them.
+        self.assertNotIn("payload", message)
+        full = json.loads(message["json_frames"]["full"])
+        self.assertEqual(full, {"event": "state_updated", "payload": {"version": 4}})
+        patch = json.loads(message["json_frames"]["patch"])["payload"]
+        self.assertEqual(patch, {"from_version": 1, "version": 4, "ops": ["a", "b", "c"]})
+
+    async def test_broken_patch_chain_falls_back_to_full_state(self):
+        layer = RecordingLayer()
+        coalescer = BroadcastCoalescer(0.02)
+        await asyncio.gather(
+            coalescer.send_state(layer, "room_A", state(2, ["a"])),
+            coalescer.send_state(layer, "room_A", state(5)),
+        )
+        self.assertNotIn("patch", layer.sent[0][1])
+
+    async def test_late_lower_version_does_not_replace_pending_state(self):
+        layer = RecordingLayer()
+        coalescer = BroadcastCoalescer(0.02)
+        await asyncio.gather(
+            coalescer.send_state(layer, "room_A", state(6, ["b"])),
+            coalescer.send_state(layer, "room_A", state(5, ["a"])),
+        )
+
+        self.assertEqual(len(layer.sent), 1)
+        self.assertEqual(layer.sent[0][1]["version"], 6)
+
+    async def test_immediate_event_flushes_pending_state_first(self):
+        layer = RecordingLayer()
+        coalescer = BroadcastCoalescer(0.05)
+        leader = asyncio.ensure_future(coalescer.send_state(layer, "room_A", state(2)))
+        await asyncio.sleep(0)
+        await coalescer.send_immediate(layer, "room_A", {"type": "game.event", "event": "final_results", "payload": {}})
+        await leader
+
+        self.assertEqual(
+            [message["event"] for _, message in layer.sent],
+            ["state_updated", "final_results"],
+        )
+
+    async def test_rooms_are_coalesced_independently(self):
+        layer = RecordingLayer()
+        coalescer = BroadcastCoalescer(0.01)
+        await asyncio.gather(
+            coalescer.send_state(layer, "room_A", state(2)),
+            coalescer.send_state(layer, "room_B", state(7)),
+        )
+        self.assertEqual(sorted(group for group, _ in layer.sent), ["room_A", "room_B"])
+
+
+class FailingLayer:
+    async def group_send(self, group, message):
+        raise ConnectionError("redis down")
+
+
+class BackgroundBroadcasterTests(SimpleTestCase):
+    def test_publishes_off_the_calling_thread(self):
+        broadcaster = BackgroundBroadcaster()
+        layer = RecordingLayer()
+        threads = []
+
+        async def send(group, message):
+            threads.append(threading.current_thread().name)
+            await layer.group_send(group, message)
+
+        broadcaster.submit(send, "room_A", state(2))
+        self._wait_until_idle(broadcaster)
+
+        self.assertEqual(threads, ["room-broadcaster"])
+        self.assertEqual(broadcaster.stats(), {"published": 1, "failed": 0, "pending": 0})
+
+    def test_failures_are_logged_and_counted(self):
+        broadcaster = BackgroundBroadcaster()
+        with self.assertLogs("apps.game.engine", level="ERROR"):
+            broadcaster.submit(FailingLayer().group_send, "room_A", state(2))
+            self._wait_until_idle(broadcaster)
+            broadcaster.run_inline(FailingLayer().group_send, "room_A", state(3))
+        self.assertEqual(broadcaster.stats(), {"published": 0, "failed": 2, "pending": 0})
+
+    def _wait_until_idle(self, broadcaster):
+        deadline = time.monotonic() + 2
+        while broadcaster.stats()["pending"] and time.monotonic() < deadline:
+            time.sleep(0.005)
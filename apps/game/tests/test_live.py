@@ -0,0 +1,60 @@
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.core.cache import caches
+from django.test import TestCase, TransactionTestCase, override_settings
+
+from apps.game.live import PresenceWriter
+from apps.game.models import Player
+from apps.game.routing import websocket_urlpatterns
+from apps.game.services import create_room_with_host, join_room
+
+
+class PresenceWriterTests(TestCase):
+    def setUp(self):
+        self.room, self.host = create_room_with_host("Anu")
+        _, self.guest = join_room(self.room.code, "Biju")
+
+    def test_presence_writer_batches_latest_state_per_player(self):
+        writer = PresenceWriter()
+        writer._pending = {str(self.host.id): (self.room.code, False), str(self.guest.id): (self.room.code, True)}
+        writer._pending[str(self.host.id)] = (self.room.code, True)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(writer.flush(), 2)
+        self.assertTrue(Player.objects.get(id=self.host.id).is_connected)
+
+    def test_bad_or_foreign_player_ids_do_not_spoil_the_batch(self):
+        other_room, stranger = create_room_with_host("Chinnu")
+        Player.objects.filter(id=stranger.id).update(is_connected=False)
+        writer = PresenceWriter()
+        writer._ensure_started = lambda: None
+
+        writer.mark("not-a-uuid", self.room.code, True)
+        writer.mark(str(stranger.id), self.room.code, True)
+        writer.mark(str(self.guest.id), self.room.code.lower(), True)
+        writer.flush()
+
+        self.assertFalse(Player.objects.get(id=stranger.id).is_connected)
+        self.assertTrue(Player.objects.get(id=self.guest.id).is_connected)
+
+
+@override_settings(CHANNEL_LAYERS={"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}})
+class LiveConsumerTests(TransactionTestCase):
+    def setUp(self):
+        caches["room_state"].clear()
+        self.room, self.host = create_room_with_host("Anu")
+
+    async def test_out_of_order_actions_get_the_service_error(self):
+        communicator = WebsocketCommunicator(URLRouter(websocket_urlpatterns), f"/ws/game/{self.room.code}/")
+        await communicator.connect()
+        await communicator.receive_json_from()
+        await communicator.receive_json_from()
+
+        await communicator.send_json_to({"action": "reveal_answer", "data": {}})
+        error = await communicator.receive_json_from()
+        self.assertEqual(error["payload"]["message"], "Room cannot reveal answers right now.")
+
+        await communicator.send_json_to({"action": "finish_room", "data": {}})
+        error = await communicator.receive_json_from()
+        self.assertEqual(error["payload"]["message"], "Need at least two players to compute sync.")
+        await communicator.disconnect()
@@ -0,0 +1,59 @@
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from apps.game.metrics import get_metrics_registry
+from apps.game.services import create_room_with_host, join_room, start_round, submit_answer
+
+IN_MEMORY_CHANNEL_LAYERS = {"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}}
+
+
+@override_settings(EMBEDDING_BATCH_ENABLED=False)
+class ActionMetricsTests(TestCase):
+    def setUp(self):
+        registry = get_metrics_registry()
+        registry.clear()
+        self.addCleanup(registry.clear)
+
+    def counter(self, name, action):
+        return get_metrics_registry().snapshot()[1].get((name, (("action", action),)), 0)
+
+    def test_service_calls_record_duration_queries_and_embedding_time(self):
+        room, host = create_room_with_host("Anu")
+        join_room(room.code, "Biju")
+        start_round(room.code)
+
+        with CaptureQueriesContext(connection) as queries:
+            submit_answer(room.code, str(host.id), "pwoli")
+
+        histograms, _ = get_metrics_registry().snapshot()
+        self.assertEqual(histograms[("game_action_duration_seconds", (("action", "submit_answer"),))][3], 1)
+        self.assertEqual(self.counter("game_action_db_queries_total", "submit_answer"), len(queries.captured_queries))
+        self.assertGreater(self.counter("game_action_embedding_seconds_total", "submit_answer"), 0)
+        self.assertEqual(self.counter("game_action_errors_total", "submit_answer"), 0)
+
+    def test_failures_are_counted(self):
+        with self.assertRaises(Exception):
+            start_round("NOPE00")
+
+        self.assertEqual(self.counter("game_action_errors_total", "start_round"), 1)
+
+    @override_settings(CHANNEL_LAYERS=IN_MEMORY_CHANNEL_LAYERS)
+    def test_metrics_endpoint_renders_prometheus_text(self):
+        create_room_with_host("Anu")
+
+        response = self.client.get("/metrics")
+
+        self.assertEqual(response.status_code, 200)
+        body = response.content.decode()
+        self.assertIn("# TYPE game_action_duration_seconds histogram", body)
+        self.assertIn('game_action_duration_seconds_bucket{action="create_room_with_host",le="+Inf"} 1', body)
+        self.assertIn('game_action_db_queries_total{action="create_room_with_host"}', body)
+        self.assertIn("room_code_pool_allocated", body)
+
+    @override_settings(METRICS_ENABLED=False)
+    def test_disabled_metrics_record_nothing(self):
+        create_room_with_host("Anu")
+
+        self.assertEqual(get_metrics_registry().snapshot(), ({}, {}))
+        self.assertEqual(self.client.get("/metrics").status_code, 404)
@@ -0,0 +1,97 @@
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from apps.ai.services.cache import clear_memory_cache
+from apps.game.codes import get_room_code_pool
+from apps.game.questions import get_question_selector
+from apps.game.models import Answer
+
+IN_MEMORY_CHANNEL_LAYERS = {"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}}
+
+
+@override_settings(CHANNEL_LAYERS=IN_MEMORY_CHANNEL_LAYERS)
+class EndpointQueryCountTests(TestCase):
+    def post(self, name, data=None, **kwargs):
+        response = self.client.post(reverse(name, kwargs=kwargs), data or {}, content_type="application/json")
+        self.assertLess(response.status_code, 300, response.content)
+        return response.json()
+
+    def setUp(self):
+        caches["room_state"].clear()
+        # Counts include the embedding cache lookups, so earlier tests must not have warmed the in-process tier.
+        clear_memory_cache()
+        created = self.post("create-room", {"name": "Anu"})
+        self.code = created["room_code"]
+        self.host_id = created["player_id"]
+        self.guest_ids = [
+            self.post("join-room", {"room_code": self.code, "name": name})["player_id"]
+            for name in ("Biju", "Chinnu", "Dev")
+        ]
+
+    def _start_and_answer(self):
+        self.post("start-round", {"room_code": self.code})
+        for player_id in [self.host_id, *self.guest_ids]:
+            self.post("submit-answer", {"room_code": self.code, "player_id": player_id, "text": "pwoli"})
+
+    def _reveal(self):
+        answer_id = self.post("reveal-answer", room_code=self.code)["revealed_answer_id"]
+        author_id = str(Answer.objects.get(id=answer_id).player_id)
+        guessers = [pid for pid in [self.host_id, *self.guest_ids] if pid != author_id]
+        return answer_id, author_id, guessers
+
+    def test_create_room(self):
+        get_room_code_pool().refill()
+        with self.assertNumQueries(9):
+            self.post("create-room", {"name": "Eby"})
+
+    def test_join_room(self):
+        with self.assertNumQueries(7):
+            self.post("join-room", {"room_code": self.code, "name": "Eby"})
+
+    def test_room_state_is_served_from_cache(self):
+        with self.assertNumQueries(0):
+            self.client.get(reverse("room-state", kwargs={"room_code": self.code}))
+
+    def test_room_state_cold_cache(self):
+        caches["room_state"].clear()
+        with self.assertNumQueries(2):
+            self.client.get(reverse("room-state", kwargs={"room_code": self.code}))
+
+    def test_start_round(self):
+        get_question_selector().sample(1)
+        with self.assertNumQueries(7):
+            self.post("start-round", {"room_code": self.code})
+
+    def test_submit_answer(self):
+        self.post("start-round", {"room_code": self.code})
+        with self.assertNumQueries(13):
+            self.post("submit-answer", {"room_code": self.code, "player_id": self.host_id, "text": "pizza"})
+
+    def test_reveal_answer(self):
+        self._start_and_answer()
+        with self.assertNumQueries(8):
+            self.post("reveal-answer", room_code=self.code)
+
+    def test_submit_guess(self):
+        self._start_and_answer()
+        answer_id, author_id, guessers = self._reveal()
+        payload = {
+            "room_code": self.code,
+            "player_id": guessers[0],
+            "answer_id": answer_id,
+            "guessed_player_id": author_id,
+        }
+        with self.assertNumQueries(15):
+            self.post("submit-guess", payload)
+
+    def test_finish_room(self):
+        self._start_and_answer()
+        answer_id, author_id, guessers = self._reveal()
+        for guesser in guessers:
+            self.post(
+                "submit-guess",
+                {"room_code": self.code, "player_id": guesser, "answer_id": answer_id, "guessed_player_id": author_id},
+            )
+        with self.assertNumQueries(19):
+            self.post("finish-room", room_code=self.code)
@@ -0,0 +1,66 @@
+import re
+
+from django.db import connection
+from django.db.models import Count, Sum
+from django.test import TestCase
+from django.utils import timezone
+
+from apps.game.archive import expired_rooms
+from apps.game.models import Answer, Guess, Player, Room, Round
+from apps.game.services import create_room_with_host, join_room, start_round
+
+# SQLite says "SCAN <table>" and Postgres "Seq Scan on <table>" when a query reads the whole table.
+FULL_SCAN = {
+    "sqlite": r"\bSCAN {table}\b",
+    "postgresql": r"Seq Scan on {table}\b",
+}
+
+
+class HotQueryPlanTests(TestCase):
+    def setUp(self):
+        room, host = create_room_with_host("Anu")
+        _, guest = join_room(room.code, "Biju")
+        start_round(room.code)
+        self.room, self.host, self.guest = room, host, guest
+        self.round = Round.objects.get(room=room)
+
+    def assertIndexed(self, queryset, *tables):
+        pattern = FULL_SCAN.get(connection.vendor)
+        if pattern is None:
+            self.skipTest(f"No plan check for {connection.vendor}")
+        if connection.vendor == "postgresql":
+            # Tiny test tables are always cheaper to scan; make the planner show what it would use at size.
+            with connection.cursor() as cursor:
+                cursor.execute("SET LOCAL enable_seqscan = off")
+        plan = queryset.explain()
+        for table in tables:
+            self.assertNotRegex(plan, re.compile(pattern.format(table=table)), plan)
+
+    def test_guess_lookups(self):
+        self.assertIndexed(Guess.objects.filter(guesser=self.host, is_correct=True), "game_guess")
+        self.assertIndexed(
+            Guess.objects.filter(round=self.round, answer_id=1).values("id"),
+            "game_guess",
+        )
+        self.assertIndexed(
+            Guess.objects.filter(answer__round__room=self.room, is_correct=True)
+            .values("answer__player_id")
+            .annotate(total=Count("id")),
+            "game_guess",
+            "game_answer",
+        )
+        self.assertIndexed(
+            Guess.objects.filter(guesser__room=self.room).values("guesser_id").annotate(total=Sum("points_awarded")),
+            "game_guess",
+        )
+
+    def test_round_and_answer_lookups(self):
+        self.assertIndexed(Round.objects.filter(room=self.room, number=1), "game_round")
+        self.assertIndexed(Answer.objects.filter(round=self.round, player=self.host), "game_answer")
+        self.assertIndexed(Answer.objects.filter(room=self.room, embedding_vector__isnull=True), "game_answer")
+        self.assertIndexed(Answer.objects.filter(round__room=self.room), "game_answer", "game_round")
+
+    def test_room_lookups(self):
+        self.assertIndexed(Player.objects.filter(room=self.room).order_by("joined_at"), "game_player")
+        now = timezone.now()
+        self.assertIndexed(expired_rooms(now, now).values("id"), "game_room")
@@ -0,0 +1,55 @@
+import random
+
+from django.test import TestCase
+
+from apps.game.models import Question, QuestionType, Room, RoomStatus, Round
+from apps.game.questions import QuestionSelector, get_question_selector
+from apps.game.services import create_room_with_host, start_round
+
+
+class QuestionSelectorTests(TestCase):
+    def setUp(self):
+        Question.objects.all().delete()
+        self.funny = [Question.objects.create(text=f"Funny {i}", type=QuestionType.FUNNY) for i in range(3)]
+        self.life = [Question.objects.create(text=f"Life {i}", type=QuestionType.LIFE) for i in range(3)]
+
+    def test_samples_from_cache_after_one_load(self):
+        selector = QuestionSelector()
+        selector.sample(1)
+
+        with self.assertNumQueries(0):
+            for _ in range(20):
+                selector.sample(2)
+
+        self.assertEqual(selector.stats()["loads"], 1)
+
+    def test_weights_pick_categories(self):
+        selector = QuestionSelector(weights={QuestionType.FUNNY: 0})
+        life_ids = {question.id for question in self.life}
+
+        drawn = {question_id for _ in range(20) for question_id in selector.sample(1, rng=random.Random(_))}
+
+        self.assertTrue(drawn <= life_ids)
+
+    def test_saving_a_question_invalidates_the_shared_cache(self):
+        selector = get_question_selector()
+        selector.sample(1)
+        added = Question.objects.create(text="Romance", type=QuestionType.ROMANCE)
+
+        self.assertIn(added.id, selector.sample(10, weighted=False))
+
+        Question.objects.filter(id=added.id).delete()
+        self.assertNotIn(added.id, selector.sample(10, weighted=False))
+
+    def test_rounds_do_not_repeat_questions_until_the_bank_is_exhausted(self):
+        room, _ = create_room_with_host("Anu")
+        Room.objects.filter(id=room.id).update(max_rounds=8)
+
+        for _ in range(6):
+            start_round(room.code)
+            Room.objects.filter(id=room.id).update(status=RoomStatus.SCOREBOARD)
+        played = list(Round.objects.filter(room=room).values_list("question_id", flat=True))
+        self.assertEqual(len(set(played)), 6)
+
+        _, game_round = start_round(room.code)
+        self.assertIn(game_round.question_id, played)
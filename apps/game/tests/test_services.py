@@ -0,0 +1,160 @@
+from django.db.models import Q
+from django.test import TestCase
+
+from apps.ai.services.embedding import cosine_similarity
+from apps.game.embeddings import ensure_room_embeddings
+from apps.game.models import Answer, Guess, Player, RoomStatus, Round
+from apps.game.scoring import SyncComponents, calculate_sync_percentage
+from apps.game.services import (
+    GameServiceError,
+    calculate_sync_results,
+    compute_room_scores,
+    create_room_with_host,
+    join_room,
+    reveal_random_answer,
+    start_round,
+    submit_answer,
+    submit_guess,
+)
+
+
+# Straightforward per-pair queries, kept here as the reference the vectorized engine is checked against.
+def player_correct_guess_rate(player):
+    total = Guess.objects.filter(guesser=player).count()
+    if total == 0:
+        return 0.0
+    return Guess.objects.filter(guesser=player, is_correct=True).count() / total
+
+
+def pair_answer_similarity(room, p1, p2):
+    similarities = []
+    for round_id in Round.objects.filter(room=room).values_list("id", flat=True):
+        a1 = Answer.objects.filter(round_id=round_id, player=p1).first()
+        a2 = Answer.objects.filter(round_id=round_id, player=p2).first()
+        if a1 is None or a2 is None or a1.embedding_vector is None or a2.embedding_vector is None:
+            continue
+        similarities.append(cosine_similarity(a1.embedding_vector, a2.embedding_vector))
+    return float(sum(similarities) / len(similarities)) if similarities else 0.0
+
+
+def pair_mutual_selection_rate(room, p1, p2):
+    pair_guesses = Guess.objects.filter(
+        Q(guesser=p1, guessed_player=p2) | Q(guesser=p2, guessed_player=p1), round__room=room
+    ).count()
+    opportunities = Guess.objects.filter(Q(guesser=p1) | Q(guesser=p2), round__room=room).count()
+    return pair_guesses / opportunities if opportunities else 0.0
+
+
+class ActionRuleTests(TestCase):
+    def setUp(self):
+        self.room, self.host = create_room_with_host("Anu")
+        join_room(self.room.code, "Biju")
+
+    def test_start_round_can_restart_an_open_question(self):
+        start_round(self.room.code)
+        room, _ = start_round(self.room.code)
+        self.assertEqual((room.status, room.current_round), (RoomStatus.QUESTION, 2))
+
+    def test_finished_room_rejects_actions_with_its_own_error(self):
+        calculate_sync_results(self.room.code)
+        for action in (
+            lambda: start_round(self.room.code),
+            lambda: submit_answer(self.room.code, str(self.host.id), "pizza"),
+            lambda: calculate_sync_results(self.room.code),
+        ):
+            with self.assertRaisesMessage(GameServiceError, "Room has finished."):
+                action()
+
+
+class ScoreLedgerTests(TestCase):
+    def setUp(self):
+        self.room, self.host = create_room_with_host("Anu")
+        _, self.guest = join_room(self.room.code, "Biju")
+        _, self.third = join_room(self.room.code, "Chinnu")
+        start_round(self.room.code)
+        for player, text in ((self.host, "pizza"), (self.guest, "pwoli"), (self.third, "sleep")):
+            submit_answer(self.room.code, str(player.id), text)
+        _, _, self.answer = reveal_random_answer(self.room.code)
+        self.author = self.answer.player
+        self.guessers = [p for p in (self.host, self.guest, self.third) if p.id != self.author.id]
+
+    def _scores(self):
+        return {player.id: player.score for player in Player.objects.filter(room=self.room)}
+
+    def test_ledger_matches_recompute(self):
+        first, second = self.guessers
+        submit_guess(self.room.code, str(first.id), self.answer.id, str(self.author.id))
+        submit_guess(self.room.code, str(second.id), self.answer.id, str(first.id))
+
+        scores = self._scores()
+        self.assertEqual(scores, compute_room_scores(self.room))
+        self.assertEqual(scores[first.id], 10)
+        self.assertEqual(scores[self.author.id], 2)
+
+    def test_reguess_reverts_previous_delta(self):
+        first, second = self.guessers
+        submit_guess(self.room.code, str(first.id), self.answer.id, str(self.author.id))
+        submit_guess(self.room.code, str(first.id), self.answer.id, str(second.id))
+
+        scores = self._scores()
+        self.assertEqual(scores, compute_room_scores(self.room))
+        self.assertEqual(scores[first.id], 0)
+        self.assertEqual(scores[self.author.id], 0)
+
+
+class SyncEngineTests(TestCase):
+    def test_vectorized_results_match_pairwise_reference(self):
+        room, host = create_room_with_host("Anu")
+        players = [host] + [join_room(room.code, name)[1] for name in ("Biju", "Chinnu", "Dev")]
+        texts = [
+            ("pizza", "pwoli pizza", "sleep", "macha"),
+            ("beach", "beach", "rain", "chai"),
+            ("music", "movies", "music", None),
+        ]
+        for round_texts in texts:
+            start_round(room.code)
+            for player, text in zip(players, round_texts):
+                if text:
+                    submit_answer(room.code, str(player.id), text)
+            _, _, answer = reveal_random_answer(room.code)
+            for index, guesser in enumerate(players):
+                if guesser.id == answer.player_id:
+                    continue
+                guessed = players[(index + len(round_texts)) % len(players)]
+                submit_guess(room.code, str(guesser.id), answer.id, str(guessed.id))
+
+        room.refresh_from_db()
+        ensure_room_embeddings(room)
+        ordered = list(room.players.order_by("joined_at"))
+        expected = {}
+        for i, p1 in enumerate(ordered):
+            for p2 in ordered[i + 1:]:
+                components = SyncComponents(
+                    answer_similarity=pair_answer_similarity(room, p1, p2),
+                    correct_guess_rate=(player_correct_guess_rate(p1) + player_correct_guess_rate(p2)) / 2,
+                    mutual_selection_rate=pair_mutual_selection_rate(room, p1, p2),
+                )
+                expected[(p1.id, p2.id)] = (components, calculate_sync_percentage(components))
+
+        _, results = calculate_sync_results(room.code)
+
+        self.assertEqual(len(results), len(expected))
+        for result in results:
+            components, percentage = expected[(result.player_one_id, result.player_two_id)]
+            self.assertAlmostEqual(result.answer_similarity, components.answer_similarity, places=6)
+            self.assertAlmostEqual(result.correct_guess_rate, components.correct_guess_rate)
+            self.assertAlmostEqual(result.mutual_selection_rate, components.mutual_selection_rate)
+            self.assertEqual(result.sync_percentage, percentage)
+
+
+class DeferredEmbeddingTests(TestCase):
+    def test_answers_are_stored_before_embedding(self):
+        room, host = create_room_with_host("Anu")
+        _, guest = join_room(room.code, "Biju")
+        start_round(room.code)
+        submit_answer(room.code, str(host.id), "Pwoli!")
+        submit_answer(room.code, str(guest.id), "pizza")
+
+        self.assertEqual(Answer.objects.filter(room=room, embedding_vector__isnull=True).count(), 2)
+        self.assertEqual(ensure_room_embeddings(room), 2)
+        self.assertFalse(Answer.objects.filter(room=room, embedding_vector__isnull=True).exists())
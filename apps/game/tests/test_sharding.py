@@ -0,0 +1,127 @@
+import asyncio
+from unittest import mock
+
+from channels.layers import get_channel_layer
+from channels.routing import URLRouter
+from channels.testing import ApplicationCommunicator, WebsocketCommunicator
+from django.core.cache import caches
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+
+from apps.game.consumers import RoomShardConsumer
+from apps.game.routing import websocket_urlpatterns
+from apps.game.services import create_room_with_host, join_room
+from apps.game.sharding import assign_shards, shard_for_room, shard_names
+
+
+@override_settings(ROOM_SHARDS=16)
+class ShardAssignmentTests(SimpleTestCase):
+    def test_rooms_map_to_stable_shards_that_are_all_used(self):
+        codes = [f"R{index:05d}" for index in range(800)]
+        owners = [shard_for_room(code) for code in codes]
+
+        self.assertEqual(owners, [shard_for_room(code.lower()) for code in codes])
+        self.assertEqual(set(owners), set(shard_names()))
+
+    def test_removing_a_worker_only_moves_its_shards(self):
+        before = assign_shards(["web-1", "web-2", "web-3", "web-4"])
+        after = assign_shards(["web-1", "web-2", "web-4"])
+
+        self.assertEqual(sorted(sum(after.values(), [])), sorted(shard_names()))
+        for worker in ("web-1", "web-2", "web-4"):
+            self.assertTrue(set(before[worker]) <= set(after[worker]))
+
+
+@override_settings(
+    CHANNEL_LAYERS={"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}},
+    ROOM_SHARDS=2,
+    BROADCAST_COALESCE_WINDOW_MS=0,
+)
+class RoomAffinityTests(TransactionTestCase):
+    def setUp(self):
+        caches["room_state"].clear()
+        self.room, self.host = create_room_with_host("Anu")
+        _, self.guest = join_room(self.room.code, "Biju")
+
+    async def _run_on_shard(self):
+        shard = shard_for_room(self.room.code)
+        message = await get_channel_layer().receive(shard)
+        self.assertEqual(message["type"], "room.action")
+        worker = ApplicationCommunicator(RoomShardConsumer.as_asgi(), {"type": "channel", "channel": shard})
+        await worker.send_input(message)
+        await worker.wait(timeout=0.2)
+
+    async def test_actions_are_forwarded_to_the_owning_shard(self):
+        client = WebsocketCommunicator(URLRouter(websocket_urlpatterns), f"/ws/game/{self.room.code}/")
+        await client.connect()
+        await client.receive_json_from()
+        await client.receive_json_from()
+
+        await client.send_json_to({"action": "start_round", "data": {}})
+        self.assertTrue(await client.receive_nothing())
+        await self._run_on_shard()
+        state = await client.receive_json_from()
+        self.assertEqual(state["payload"]["status"], "QUESTION")
+
+        # Malformed payloads are rejected by the connection's worker and never reach the shard.
+        await client.send_json_to({"action": "submit_guess", "data": {}})
+        error = await client.receive_json_from()
+        self.assertEqual(error["payload"]["message"], "Invalid submit_guess payload: player_id is required.")
+
+        guess = {"player_id": str(self.host.id), "answer_id": 1, "guessed_player_id": str(self.guest.id)}
+        await client.send_json_to({"action": "submit_guess", "data": guess})
+        await self._run_on_shard()
+        error = await client.receive_json_from()
+        self.assertEqual(error, {"event": "error", "payload": {"message": "Room is not in reveal phase."}})
+        await client.disconnect()
+
+    async def test_batched_room_actions_are_reported_as_queued(self):
+        client = WebsocketCommunicator(URLRouter(websocket_urlpatterns), f"/ws/game/{self.room.code}/")
+        await client.connect()
+        await client.receive_json_from()
+        await client.receive_json_from()
+
+        batch = [{"action": "start_round", "data": {}}, {"action": "submit_guess", "data": {}}]
+        await client.send_json_to({"action": "batch", "data": batch})
+        reply = await client.receive_json_from()
+
+        self.assertEqual(
+            reply["payload"]["results"],
+            [
+                {"action": "start_round", "ok": None, "queued": True},
+                {
+                    "action": "submit_guess",
+                    "ok": False,
+                    "error": "Invalid submit_guess payload: player_id is required.",
+                },
+            ],
+        )
+        self.assertEqual((await get_channel_layer().receive(shard_for_room(self.room.code)))["action"], "start_round")
+        await client.disconnect()
+
+
+@override_settings(CHANNEL_LAYERS={"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}})
+class ShardWorkerTests(SimpleTestCase):
+    async def test_a_slow_room_does_not_hold_up_other_rooms_on_the_shard(self):
+        release = asyncio.Event()
+        ran = []
+
+        async def start_round(consumer, room_code, data):
+            ran.append(room_code)
+            if room_code == "SLOW01":
+                await release.wait()
+
+        worker = ApplicationCommunicator(RoomShardConsumer.as_asgi(), {"type": "channel", "channel": "room-shard-0"})
+        with mock.patch.object(RoomShardConsumer, "_start_round", start_round):
+            for room_code in ("SLOW01", "SLOW01", "FAST01"):
+                message = {"room_code": room_code, "action": "start_round", "data": {}, "reply_channel": "reply"}
+                await worker.send_input({"type": "room.action", **message})
+            for _ in range(20):
+                if ran == ["SLOW01", "FAST01"]:
+                    break
+                await asyncio.sleep(0.01)
+            self.assertEqual(ran, ["SLOW01", "FAST01"])
+
+            release.set()
+            await asyncio.sleep(0.05)
+            self.assertEqual(ran, ["SLOW01", "FAST01", "SLOW01"])
+        await worker.wait(timeout=0.1)
@@ -0,0 +1,126 @@
+import threading
+import time
+from datetime import timedelta
+from unittest import mock
+
+from django.core.cache import caches
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+
+from apps.game.codes import release_room_codes
+from apps.game.engine import broadcast_room_state
+from apps.game.models import Room, RoomStatus
+from apps.game.services import create_room_with_host, get_room_snapshot, join_room
+from apps.game.state import (
+    _state_key,
+    apply_state_patch,
+    diff_state,
+    get_room_state,
+    remember_room_state,
+    state_event,
+)
+
+
+class StateDiffTests(SimpleTestCase):
+    def test_patch_round_trip(self):
+        old = {
+            "status": "LOBBY",
+            "version": 3,
+            "question": None,
+            "players": [{"id": "a", "score": 0}, {"id": "b", "score": 10}],
+            "a/b": 1,
+        }
+        new = {
+            "status": "QUESTION",
+            "version": 4,
+            "question": "Pizza?",
+            "players": [{"id": "b", "score": 10}, {"id": "a", "score": 2}, {"id": "c", "score": 0}],
+            "extra": {"x": 1},
+        }
+        ops = diff_state(old, new)
+        self.assertEqual(apply_state_patch(old, ops), new)
+        self.assertIn({"op": "remove", "path": "/a~1b"}, ops)
+
+    def test_unchanged_state_has_no_ops(self):
+        state = {"players": [{"id": "a", "score": 1}], "round": 1}
+        self.assertEqual(diff_state(state, dict(state)), [])
+
+
+class RoomStateCacheTests(TestCase):
+    def setUp(self):
+        caches["room_state"].clear()
+        self.room, _ = create_room_with_host("Anu")
+
+    def test_consecutive_versions_carry_a_patch(self):
+        first = state_event(self.room.id, get_room_snapshot(self.room))
+        self.assertNotIn("patch", first)
+
+        room, _ = join_room(self.room.code, "Biju")
+        second = state_event(room.id, get_room_snapshot(room))
+        patch = second["patch"]
+        self.assertEqual((patch["from_version"], patch["version"]), (first["payload"]["version"], room.state_version))
+        self.assertEqual(apply_state_patch(first["payload"], patch["ops"]), second["payload"])
+
+    def test_skipped_versions_fall_back_to_full_state(self):
+        state_event(self.room.id, get_room_snapshot(self.room))
+        join_room(self.room.code, "Biju")
+        room, _ = join_room(self.room.code, "Chinnu")
+        self.assertNotIn("patch", state_event(room.id, get_room_snapshot(room)))
+
+    def test_stale_snapshot_does_not_replace_newer_state(self):
+        stale = get_room_snapshot(self.room)
+        room, _ = join_room(self.room.code, "Biju")
+        state_event(room.id, get_room_snapshot(room))
+        self.assertIsNone(state_event(self.room.id, stale))
+        self.assertEqual(get_room_state(self.room.code)["version"], room.state_version)
+
+    def test_state_already_cached_by_a_read_is_still_published(self):
+        room, _ = join_room(self.room.code, "Biju")
+        get_room_state(room.code)
+
+        message = state_event(room.id, get_room_snapshot(room))
+
+        self.assertEqual(message["payload"]["version"], room.state_version)
+        self.assertNotIn("patch", message)
+
+    def test_stale_snapshot_is_not_broadcast(self):
+        stale = get_room_snapshot(self.room)
+        room, _ = join_room(self.room.code, "Biju")
+        state_event(room.id, get_room_snapshot(room))
+
+        with mock.patch("apps.game.engine._publish") as publish:
+            broadcast_room_state(self.room, stale)
+
+        publish.assert_not_called()
+
+    def test_writes_compare_versions_under_the_room_lock(self):
+        stale = get_room_snapshot(self.room)
+        remember_room_state(self.room.id, stale)
+        room, _ = join_room(self.room.code, "Biju")
+        lock_key = f"{_state_key(self.room.code)}:lock"
+        self.assertTrue(caches["room_state"].add(lock_key, 1))
+
+        writer = threading.Thread(target=remember_room_state, args=(room.id, get_room_snapshot(room)))
+        writer.start()
+        time.sleep(0.05)
+        self.assertEqual(get_room_state(self.room.code)["version"], stale["version"])
+        caches["room_state"].delete(lock_key)
+        writer.join(5)
+
+        self.assertEqual(get_room_state(self.room.code)["version"], room.state_version)
+
+    def test_a_new_room_reusing_a_code_replaces_the_old_rooms_state(self):
+        for name in ("Biju", "Chinnu"):
+            room, _ = join_room(self.room.code, name)
+        state_event(room.id, get_room_snapshot(room))
+        finished_at = timezone.now() - timedelta(days=2)
+        Room.objects.filter(id=room.id).update(status=RoomStatus.FINISHED, updated_at=finished_at)
+        release_room_codes(timezone.now() - timedelta(days=1))
+
+        with mock.patch("apps.game.services.generate_room_code", return_value=self.room.code):
+            reused, _ = create_room_with_host("Dev")
+        state_event(reused.id, get_room_snapshot(reused))
+
+        state = get_room_state(self.room.code)
+        self.assertEqual([player["name"] for player in state["players"]], ["Dev"])
+        self.assertLess(state["version"], room.state_version)
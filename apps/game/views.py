@@ -1,12 +1,10 @@
 from __future__ import annotations
 
-from django.shortcuts import get_object_or_404
 from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from .engine import broadcast_room_event
-from .models import Room
+from .engine import broadcast_room_event, broadcast_room_state
 from .serializers import (
     CreateRoomSerializer,
     JoinRoomSerializer,
@@ -26,6 +24,7 @@ from .services import (
     submit_answer,
     submit_guess,
 )
+from .state import get_room_state, remember_room_state
 
 
 def _service_error_response(exc: GameServiceError) -> Response:
@@ -41,9 +40,9 @@ class CreateRoomView(APIView):
         except GameServiceError as exc:
             return _service_error_response(exc)
 
-        payload = get_room_snapshot(room)
-        payload["player_id"] = str(host.id)
-        payload["player_name"] = host.name
+        snapshot = get_room_snapshot(room)
+        remember_room_state(room.id, snapshot)
+        payload = {**snapshot, "player_id": str(host.id), "player_name": host.name}
         return Response(payload, status=status.HTTP_201_CREATED)
 
 
@@ -59,17 +58,19 @@ class JoinRoomView(APIView):
         except GameServiceError as exc:
             return _service_error_response(exc)
 
-        payload = get_room_snapshot(room)
-        payload["player_id"] = str(player.id)
-        payload["player_name"] = player.name
-        broadcast_room_event(room.code, "state_updated", payload)
+        snapshot = get_room_snapshot(room)
+        payload = {**snapshot, "player_id": str(player.id), "player_name": player.name}
+        broadcast_room_state(room, snapshot, payload)
         return Response(payload, status=status.HTTP_200_OK)
 
 
 class RoomStateView(APIView):
     def get(self, request, room_code: str):
-        room = get_object_or_404(Room, code=room_code.upper())
-        return Response(get_room_snapshot(room))
+        try:
+            snapshot = get_room_state(room_code.upper())
+        except GameServiceError as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_404_NOT_FOUND)
+        return Response(snapshot)
 
 
 class StartRoundView(APIView):
@@ -84,9 +85,9 @@ class StartRoundView(APIView):
         except GameServiceError as exc:
             return _service_error_response(exc)
 
-        payload = get_room_snapshot(room)
-        broadcast_room_event(room.code, "state_updated", payload)
-        return Response(payload)
+        snapshot = get_room_snapshot(room)
+        broadcast_room_state(room, snapshot)
+        return Response(snapshot)
 
 
 class SubmitAnswerView(APIView):
@@ -102,9 +103,9 @@ class SubmitAnswerView(APIView):
         except GameServiceError as exc:
             return _service_error_response(exc)
 
-        payload = get_room_snapshot(room)
-        payload["last_answer_id"] = answer.id
-        broadcast_room_event(room.code, "state_updated", payload)
+        snapshot = get_room_snapshot(room)
+        payload = {**snapshot, "last_answer_id": answer.id}
+        broadcast_room_state(room, snapshot, payload)
         return Response(payload)
 
 
@@ -115,10 +116,9 @@ class RevealAnswerView(APIView):
         except GameServiceError as exc:
             return _service_error_response(exc)
 
-        payload = get_room_snapshot(room)
-        payload["revealed_answer_id"] = revealed.id
-        payload["revealed_answer_text"] = revealed.text
-        broadcast_room_event(room.code, "state_updated", payload)
+        snapshot = get_room_snapshot(room)
+        payload = {**snapshot, "revealed_answer_id": revealed.id, "revealed_answer_text": revealed.text}
+        broadcast_room_state(room, snapshot, payload)
         return Response(payload)
 
 
@@ -136,26 +136,29 @@ class SubmitGuessView(APIView):
         except GameServiceError as exc:
             return _service_error_response(exc)
 
-        payload = get_room_snapshot(room)
-        payload["guess"] = {
-            "id": guess.id,
-            "is_correct": guess.is_correct,
-            "points_awarded": guess.points_awarded,
+        snapshot = get_room_snapshot(room)
+        payload = {
+            **snapshot,
+            "guess": {
+                "id": guess.id,
+                "is_correct": guess.is_correct,
+                "points_awarded": guess.points_awarded,
+            },
+            "reveal_complete": reveal_complete,
         }
-        payload["reveal_complete"] = reveal_complete
-        broadcast_room_event(room.code, "state_updated", payload)
+        broadcast_room_state(room, snapshot, payload)
         return Response(payload)
 
 
 class FinishRoomView(APIView):
     def post(self, request, room_code: str):
         try:
-            calculate_sync_results(room_code.upper())
+            room, results = calculate_sync_results(room_code.upper())
         except GameServiceError as exc:
             return _service_error_response(exc)
 
-        room = get_object_or_404(Room, code=room_code.upper())
-        payload = get_room_snapshot(room)
-        payload["pairs"] = SyncResultSerializer(room.sync_results.order_by("-sync_percentage"), many=True).data
+        snapshot = get_room_snapshot(room)
+        remember_room_state(room.id, snapshot)
+        payload = {**snapshot, "pairs": SyncResultSerializer(results, many=True).data}
         broadcast_room_event(room.code, "final_results", payload)
         return Response(payload)
@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import json
+import threading
+import uuid
+from collections import OrderedDict
+from typing import Callable
+
+import msgpack
+
+MSGPACK_SUBPROTOCOL = "game.msgpack.v1"
+
+# Short keys for the server -> client schema (events, snapshots, patches, results). Versioned with the
+# subprotocol: change the table, bump the version. Unknown keys are sent unchanged.
+KEYS = {
+    "event": "e",
+    "payload": "p",
+    "room_code": "rc",
+    "status": "s",
+    "round": "r",
+    "max_rounds": "mr",
+    "version": "v",
+    "question": "q",
+    "question_type": "qt",
+    "revealed_answer_id": "ra",
+    "revealed_answer_text": "rt",
+    "players": "pl",
+    "id": "i",
+    "name": "n",
+    "score": "sc",
+    "is_host": "h",
+    "message": "m",
+    "from_version": "fv",
+    "ops": "o",
+    "op": "op",
+    "path": "pa",
+    "value": "va",
+    "pairs": "pr",
+    "player_one": "p1",
+    "player_two": "p2",
+    "player_one_name": "n1",
+    "player_two_name": "n2",
+    "answer_similarity": "sim",
+    "correct_guess_rate": "cgr",
+    "mutual_selection_rate": "msr",
+    "sync_percentage": "sp",
+    "results": "rs",
+    "action": "a",
+    "ok": "ok",
+    "error": "er",
+}
+
+
+def _compact_path(path: str) -> str:
+    return "/".join(KEYS.get(segment, segment) for segment in path.split("/"))
+
+
+def compact(value):
+    if isinstance(value, dict):
+        return {
+            KEYS.get(key, key): _compact_path(item) if key == "path" and isinstance(item, str) else compact(item)
+            for key, item in value.items()
+        }
+    if isinstance(value, list):
+        return [compact(item) for item in value]
+    return value
+
+
+def encode_json(content: dict) -> str:
+    return json.dumps(content)
+
+
+def encode_msgpack(content: dict) -> bytes:
+    return msgpack.packb(compact(content), use_bin_type=True)
+
+
+def decode_msgpack(data: bytes):
+    # Client -> server messages keep their long keys; they are small and few.
+    return msgpack.unpackb(data, raw=False)
+
+
+CODECS = {"json": encode_json, "msgpack": encode_msgpack}
+
+
+def new_frame_id() -> str:
+    return uuid.uuid4().hex
+
+
+def event_content(message: dict, variant: str) -> dict:
+    if variant == "patch":
+        return {"event": "state_patch", "payload": message["patch"]}
+    return {"event": message["event"], "payload": message["payload"]}
+
+
+def message_version(message: dict) -> int | None:
+    # Channel-layer messages carry the version next to their frames; the publisher reads it from the state.
+    if "version" in message:
+        return message["version"]
+    patch = message.get("patch")
+    return patch["version"] if patch else message["payload"].get("version")
+
+
+def with_json_frames(message: dict) -> dict:
+    # The message that goes through the channel layer. The event is encoded once by the publisher and each
+    # receiving JSON socket forwards the text as-is. The payload is not sent alongside it: receivers only need
+    # the versions to pick a frame, and binary clients decode the JSON frame, once per process in the FrameCache.
+    frames = {"full": encode_json(event_content(message, "full"))}
+    framed = {"type": message["type"], "event": message["event"], "frame_id": message.get("frame_id")}
+    if message["event"] == "state_updated":
+        framed["version"] = message_version(message)
+    patch = message.get("patch")
+    if patch:
+        frames["patch"] = encode_json(event_content(message, "patch"))
+        framed["patch"] = {"from_version": patch["from_version"], "version": patch["version"]}
+    return {**framed, "json_frames": frames}
+
+
+def frame_content(message: dict, variant: str) -> dict:
+    frames = message.get("json_frames")
+    if frames is None:
+        return event_content(message, variant)
+    return json.loads(frames[variant])
+
+
+class FrameCache:
+    # Every socket in a room receives the same event; each process encodes it once per codec and variant.
+    def __init__(self, max_frames: int = 256) -> None:
+        self.max_frames = max_frames
+        self._frames: OrderedDict[tuple, str | bytes] = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "encoded": 0}
+
+    def encode(self, frame_id: str | None, variant: str, codec: str, content: Callable[[], dict]) -> str | bytes:
+        key = (frame_id, variant, codec)
+        if frame_id is not None:
+            with self._lock:
+                frame = self._frames.get(key)
+                if frame is not None:
+                    self._stats["hits"] += 1
+                    return frame
+        frame = CODECS[codec](content())
+        with self._lock:
+            self._stats["encoded"] += 1
+            if frame_id is not None:
+                self._frames[key] = frame
+                if len(self._frames) > self.max_frames:
+                    self._frames.popitem(last=False)
+        return frame
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {**self._stats, "frames": len(self._frames)}
+
+
+_frame_cache = FrameCache()
+
+
+def get_frame_cache() -> FrameCache:
+    return _frame_cache
@@ -5,10 +5,10 @@ os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
 django.setup()
 
 from channels.auth import AuthMiddlewareStack
-from channels.routing import ProtocolTypeRouter, URLRouter
+from channels.routing import ChannelNameRouter, ProtocolTypeRouter, URLRouter
 from django.core.asgi import get_asgi_application
 
-from .routing import websocket_urlpatterns
+from .routing import channel_routes, websocket_urlpatterns
 
 django_asgi_app = get_asgi_application()
 
@@ -18,5 +18,6 @@ application = ProtocolTypeRouter(
         "websocket": AuthMiddlewareStack(
             URLRouter(websocket_urlpatterns)
         ),
+        "channel": ChannelNameRouter(channel_routes),
     }
 )
@@ -1 +1 @@
-from apps.game.routing import websocket_urlpatterns
+from apps.game.routing import channel_routes, websocket_urlpatterns
@@ -74,6 +74,9 @@ else:
         "default": {
             "ENGINE": "django.db.backends.sqlite3",
             "NAME": BASE_DIR / "db.sqlite3",
+            # Background embedding writes run alongside request transactions; taking the write lock
+            # up front makes SQLite wait for it instead of failing a read-to-write upgrade.
+            "OPTIONS": {"transaction_mode": "IMMEDIATE"},
         }
     }
 
@@ -107,6 +110,82 @@ CHANNEL_LAYERS = {
     }
 }
 
+ROOM_STATE_CACHE_URL = os.getenv("ROOM_STATE_CACHE_URL", "")
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    # Multi-worker deployments should point this at Redis so every worker sees the same room state.
+    "room_state": (
+        {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": ROOM_STATE_CACHE_URL,
+        }
+        if ROOM_STATE_CACHE_URL
+        else {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "room-state",
+        }
+    ),
+}
+ROOM_STATE_CACHE_ALIAS = "room_state"
+BROADCAST_COALESCE_WINDOW_MS = int(os.getenv("BROADCAST_COALESCE_WINDOW_MS", "30"))
+BROADCAST_MODE = os.getenv("BROADCAST_MODE", "background")
+PRESENCE_FLUSH_MS = int(os.getenv("PRESENCE_FLUSH_MS", "500"))
+# Room affinity: with ROOM_SHARDS > 0, websocket actions are forwarded to the worker owning the room's shard.
+ROOM_SHARDS = int(os.getenv("ROOM_SHARDS", "0"))
+ROOM_SHARD_CHANNEL_PREFIX = os.getenv("ROOM_SHARD_CHANNEL_PREFIX", "room-shard")
+ROOM_SHARD_WORKERS = [worker.strip() for worker in os.getenv("ROOM_SHARD_WORKERS", "").split(",") if worker.strip()]
+ROOM_CODE_POOL_BATCH = int(os.getenv("ROOM_CODE_POOL_BATCH", "256"))
+ROOM_CODE_POOL_LOW_WATER = int(os.getenv("ROOM_CODE_POOL_LOW_WATER", "32"))
+ROOM_CODE_RETENTION_HOURS = int(os.getenv("ROOM_CODE_RETENTION_HOURS", "24"))
+ROOM_ARCHIVE_AFTER_HOURS = int(os.getenv("ROOM_ARCHIVE_AFTER_HOURS", "72"))
+ROOM_IDLE_TTL_HOURS = int(os.getenv("ROOM_IDLE_TTL_HOURS", "12"))
+ROOM_ARCHIVE_DIR = Path(os.getenv("ROOM_ARCHIVE_DIR", str(BASE_DIR / "archive")))
+QUESTION_CACHE_TTL_SECONDS = int(os.getenv("QUESTION_CACHE_TTL_SECONDS", "300"))
+# Relative draw weight per question type, e.g. "ROMANCE=2,FUNNY=1"; unlisted types weigh 1, 0 disables a type.
+QUESTION_TYPE_WEIGHTS = {
+    name.strip().upper(): float(weight)
+    for name, _, weight in (
+        item.partition("=") for item in os.getenv("QUESTION_TYPE_WEIGHTS", "").split(",") if "=" in item
+    )
+}
+ROOM_STATE_CACHE_TTL = int(os.getenv("ROOM_STATE_CACHE_TTL", "3600"))
+ROOM_MAX_PLAYERS = int(os.getenv("ROOM_MAX_PLAYERS", "12"))
+# Shared by all connections to a room on one worker: action rate, concurrent DB-bound actions, and queue depth.
+# The defaults follow the room size: the burst covers a whole round of a full room (every answer revealed and
+# guessed), and the queue holds one action from every player at once with as much again as headroom.
+WS_ROOM_ACTION_RATE = float(os.getenv("WS_ROOM_ACTION_RATE", "20"))
+WS_ROOM_ACTION_BURST = int(os.getenv("WS_ROOM_ACTION_BURST", str(ROOM_MAX_PLAYERS * (ROOM_MAX_PLAYERS + 1) + 2)))
+WS_ROOM_MAX_INFLIGHT = int(os.getenv("WS_ROOM_MAX_INFLIGHT", "2"))
+WS_ROOM_MAX_WAITING = int(os.getenv("WS_ROOM_MAX_WAITING", str(2 * ROOM_MAX_PLAYERS)))
+WS_BATCH_MAX_ACTIONS = int(os.getenv("WS_BATCH_MAX_ACTIONS", "20"))
+WS_RATE_LIMITS_ENABLED = os.getenv("WS_RATE_LIMITS_ENABLED", "True").lower() == "true"
+# Per-connection token buckets, e.g. "submit_answer=10/20" (actions per second / burst); unlisted actions keep
+# their defaults from apps/game/actions.py.
+WS_ACTION_RATE_LIMITS = {
+    name.strip(): (float(limit.partition("/")[0]), int(limit.partition("/")[2] or 1))
+    for name, _, limit in (
+        item.partition("=") for item in os.getenv("WS_ACTION_RATE_LIMITS", "").split(",") if "=" in item
+    )
+}
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "True").lower() == "true"
+
+# lazy: load on first encode; background: warm up in a thread at startup; blocking: warm up before serving.
+EMBEDDING_STARTUP_MODE = os.getenv("EMBEDDING_STARTUP_MODE", "lazy")
+# sentence-transformers, onnx, onnx-int8 or hash.
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "sentence-transformers")
+# Shared model served by `manage.py embedding_server`: unix:/path/to.sock or tcp://host:port; empty encodes in-process.
+EMBEDDING_SERVER_ADDRESS = os.getenv("EMBEDDING_SERVER_ADDRESS", "")
+EMBEDDING_SERVER_TIMEOUT = float(os.getenv("EMBEDDING_SERVER_TIMEOUT", "5"))
+EMBEDDING_BATCH_ENABLED = os.getenv("EMBEDDING_BATCH_ENABLED", "True").lower() == "true"
+EMBEDDING_BATCH_WINDOW_MS = int(os.getenv("EMBEDDING_BATCH_WINDOW_MS", "25"))
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "32"))
+EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "10000"))
+EMBEDDING_CACHE_STORE_ENABLED = os.getenv("EMBEDDING_CACHE_STORE_ENABLED", "True").lower() == "true"
+# Shared store entries older than this are deleted by `manage.py prune_embedding_cache`; 0 keeps them forever.
+EMBEDDING_CACHE_RETENTION_DAYS = int(os.getenv("EMBEDDING_CACHE_RETENTION_DAYS", "30"))
+
 REST_FRAMEWORK = {
     "DEFAULT_RENDERER_CLASSES": [
         "rest_framework.renderers.JSONRenderer",
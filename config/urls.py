@@ -1,12 +1,40 @@
 from django.contrib import admin
 from django.urls import include, path
-from django.http import HttpResponse
+from django.conf import settings
+from django.http import Http404, HttpResponse, JsonResponse
+
+from apps.ai.services.cache import cache_stats
+from apps.ai.services.embedding import startup_metrics
+from apps.game.backpressure import room_gate_stats
+from apps.game.codes import room_code_pool_stats
+from apps.game.engine import broadcast_stats
+from apps.game.metrics import render_metrics
+from apps.game.questions import get_question_selector
 
 def health_check(request):
     return HttpResponse("OK")
 
+def readiness_check(request):
+    metrics = startup_metrics()
+    return JsonResponse(metrics, status=200 if metrics["ready"] or metrics["mode"] == "lazy" else 503)
+
+def metrics(request):
+    if not settings.METRICS_ENABLED:
+        raise Http404
+    gauges = {
+        "embedding_cache": cache_stats(),
+        "embedding_startup": startup_metrics(),
+        "broadcast": broadcast_stats(),
+        "room_code_pool": room_code_pool_stats(),
+        "question_cache": get_question_selector().stats(),
+        "room_gate": room_gate_stats(),
+    }
+    return HttpResponse(render_metrics(gauges), content_type="text/plain; version=0.0.4")
+
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("api/game/", include("apps.game.urls")),
     path("healthz", health_check),
+    path("readyz", readiness_check),
+    path("metrics", metrics),
 ]